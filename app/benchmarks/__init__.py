@@ -0,0 +1,7 @@
+"""Offline benchmarks for the app's hot paths.
+
+Run benchmarks from the app/ directory as modules, i.e.:
+
+python -m benchmarks.serialization_bench --help
+"""
+from __future__ import annotations
@@ -0,0 +1,195 @@
+"""Shared helpers for benchmark modules.
+
+Timing loops, machine-readable results files, and comparison against a
+stored baseline.
+
+Results files are JSON, shaped like:
+
+{
+    "meta": {"suite": "serialization", "python": "3.11.4", ...},
+    "results": {
+        "<case name>": {"encode_per_sec": 1234.5, "size_bytes": 2048, ...},
+        ...
+    }
+}
+
+When comparing against a baseline, metrics whose name ends in "_per_sec" are
+treated as higher-is-better (throughput). Every other numeric metric is
+treated as lower-is-better (time, bytes, memory).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import platform
+import time
+from typing import Any, Callable, Union
+
+THIS_DIR = Path(__file__).parent
+
+default_results_dir: Path = THIS_DIR / "results"
+default_baselines_dir: Path = THIS_DIR / "baselines"
+
+## Suffix marking a metric where higher values are better
+higher_is_better_suffix: str = "_per_sec"
+
+
+@dataclass
+class Regression:
+    """A metric that moved past the allowed threshold in the wrong direction."""
+
+    case: str
+    metric: str
+    baseline: float
+    current: float
+    ## Fractional change in the "worse" direction, i.e. 0.25 = 25% worse
+    change: float
+
+
+def time_call(
+    func: Callable[[], Any] = None, min_time: float = 0.2, max_loops: int = 1_000_000
+) -> tuple[int, float]:
+    """Call func repeatedly until at least min_time seconds have passed.
+
+    Loops are doubled each round (like timeit.Timer.autorange) so the cost of
+    reading the clock stays negligible for fast functions.
+
+    Returns (loops, total_seconds).
+    """
+    if not func:
+        raise ValueError("Missing function to time")
+
+    loops: int = 1
+
+    while True:
+        start = time.perf_counter()
+
+        for _ in range(loops):
+            func()
+
+        elapsed = time.perf_counter() - start
+
+        if elapsed >= min_time or loops >= max_loops:
+            return loops, elapsed
+
+        loops *= 2
+
+
+def build_meta(suite: str = None, **extra) -> dict[str, Any]:
+    """Return metadata describing where/when a results file was produced."""
+    if not suite:
+        raise ValueError("Missing benchmark suite name")
+
+    meta = {
+        "suite": suite,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+    meta.update(extra)
+
+    return meta
+
+
+def write_results(
+    results: dict[str, dict[str, Any]] = None,
+    meta: dict[str, Any] = None,
+    path: Union[str, Path] = None,
+) -> Path:
+    """Write benchmark results to a JSON file."""
+    if results is None:
+        raise ValueError("Missing results to write")
+
+    if not path:
+        raise ValueError("Missing results file path")
+
+    if not isinstance(path, Path):
+        path = Path(path)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(path, "w") as out_file:
+        json.dump({"meta": meta or {}, "results": results}, out_file, indent=2)
+
+    return path
+
+
+def load_results(path: Union[str, Path] = None) -> dict[str, Any]:
+    """Load a results file written by write_results()."""
+    if not path:
+        raise ValueError("Missing results file path")
+
+    if not Path(path).exists():
+        raise FileNotFoundError(f"Could not find results file: {path}")
+
+    with open(path, "r") as in_file:
+        return json.load(in_file)
+
+
+def compare_results(
+    current: dict[str, Any] = None,
+    baseline: dict[str, Any] = None,
+    threshold: float = 0.10,
+) -> list[Regression]:
+    """Compare two results files and return metrics that regressed past threshold.
+
+    threshold is a fraction, i.e. 0.10 flags anything more than 10% worse.
+    Cases or metrics missing from either side are skipped.
+    """
+    if current is None or baseline is None:
+        raise ValueError("Missing current or baseline results to compare")
+
+    regressions: list[Regression] = []
+
+    current_results: dict = current.get("results", current)
+    baseline_results: dict = baseline.get("results", baseline)
+
+    for case, metrics in current_results.items():
+        if case not in baseline_results:
+            continue
+
+        for metric, value in metrics.items():
+            base_value = baseline_results[case].get(metric)
+
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+
+            if not isinstance(base_value, (int, float)) or not base_value:
+                continue
+
+            if metric.endswith(higher_is_better_suffix):
+                change = (base_value - value) / base_value
+            else:
+                change = (value - base_value) / base_value
+
+            if change > threshold:
+                regressions.append(
+                    Regression(
+                        case=case,
+                        metric=metric,
+                        baseline=base_value,
+                        current=value,
+                        change=change,
+                    )
+                )
+
+    return regressions
+
+
+def report_regressions(regressions: list[Regression] = None, threshold: float = 0.10):
+    """Print regressions found by compare_results()."""
+    if not regressions:
+        print(f"No regressions above {threshold:.0%} threshold.")
+        return
+
+    print(f"{len(regressions)} regression(s) above {threshold:.0%} threshold:")
+
+    for regression in regressions:
+        print(
+            f"  [{regression.case}] {regression.metric}: {regression.baseline:,.2f} -> {regression.current:,.2f} ({regression.change:+.1%} worse)"
+        )
+
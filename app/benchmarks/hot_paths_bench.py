@@ -0,0 +1,364 @@
+"""Hot path benchmark, at 1k/100k/1M records.
+
+Times the project's per-record code paths, offline, on records synthesized
+from the recorded responses in examples/responses/:
+
+    - parse/tv_show:         MediaTVShow.parse_obj() of full show details
+    - parse/media_response:  MediaResponse.parse_obj() of 20-show pages, plus
+                             MediaTVShow.parse_obj() of each result (as main.py does)
+    - parse/tv_show_pool:    ParsePool.parse() of full show details as raw JSON bytes,
+                             on one worker process per core (decode included)
+    - bad_ids/check_bad_id:  check_bad_id() against a bad ID file of <scale> lines
+    - bad_ids/generate_rand_id: generate_rand_id() with a bad ID file of <scale> lines
+    - msgpack/serialize:     msgpack_serialize() of <scale> records (no fsync)
+    - msgpack/deserialize:   msgpack_deserialize() of that file
+    - db/upsert_tv_shows:    upsert_tv_shows() into a fresh SQLite database
+                             through get_session(), one commit
+    - uuid/get_rand_uuid:    get_rand_uuid() calls
+    - uuid/gen_uuids:        gen_uuids() (bulk v4, as strings)
+    - uuid/gen_uuid7s:       gen_uuid7s() (bulk v7, as strings)
+
+Every case reports a *_per_sec throughput (records, or calls for the bad ID
+cases), so results compare against a baseline like the other suites. Runs
+happen in a temporary directory, since the bad ID and msgpack helpers use
+paths relative to the working directory.
+
+The default scales are 1k and 100k. 1M takes minutes (mostly parsing and the
+database); ask for it with --scale 1M.
+
+Usage (from the app/ directory):
+
+    python -m benchmarks.hot_paths_bench
+    python -m benchmarks.hot_paths_bench --scale 1k --scale 100k --scale 1M
+    python -m benchmarks.hot_paths_bench --case parse --case msgpack
+    python -m benchmarks.hot_paths_bench --save-baseline
+    python -m benchmarks.hot_paths_bench --compare --threshold 0.10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+import random
+import sys
+import tempfile
+import time
+
+from typing import Any, Callable, Union
+
+from benchmarks.bench_utils import (
+    build_meta,
+    compare_results,
+    default_baselines_dir,
+    default_results_dir,
+    load_results,
+    report_regressions,
+    time_call,
+    write_results,
+)
+from benchmarks.serialization_bench import load_payloads
+from core.db import Base, create_base_metadata, get_engine, get_session
+from domain.models.tmdb import tmdb_media_models  # noqa: F401 (registers tables)
+from domain.models.tmdb.tmdb_media_crud import upsert_tv_shows
+from domain.schemas.tmdb.tmdb_media_schemas import MediaResponse, MediaTVShow
+from utils.msgpack_utils import msgpack_deserialize, msgpack_serialize
+from utils.parse_pool_utils import ParsePool
+from utils.tmdb_utils import check_bad_id, generate_rand_id
+from utils.uuid_utils import gen_uuid7s, gen_uuids, get_rand_uuid
+
+suite_name: str = "hot_paths"
+default_results_file: Path = default_results_dir / f"{suite_name}.json"
+default_baseline_file: Path = default_baselines_dir / f"{suite_name}.json"
+
+scale_sizes: dict[str, int] = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000}
+default_scales: list[str] = ["1k", "100k"]
+
+## Records per /tv/popular page
+page_size: int = 20
+
+
+def build_records(count: int = None) -> tuple[list[dict], list[dict]]:
+    """Return (full show details, popular page summaries), count of each, with unique IDs."""
+    payloads = load_payloads()
+    details: dict = payloads["tv_details"]
+    summary: dict = payloads["popular_tv_page"]["results"][0]
+    ## Summaries carry genres too, so the database case writes associations
+    genres: list[dict] = details.get("genres", [])
+
+    full = [{**details, "id": i} for i in range(1, count + 1)]
+    summaries = [{**summary, "id": i, "genres": genres} for i in range(1, count + 1)]
+
+    return full, summaries
+
+
+def write_bad_ids(path: Union[str, Path] = None, count: int = None, seed: int = 0) -> Path:
+    """Write count random bad IDs, one per line."""
+    rand = random.Random(seed)
+    path = Path(path)
+    path.write_text("".join(f"{rand.randint(1, 10_000_000)}\n" for _ in range(count)))
+
+    return path
+
+
+def _throughput(
+    func: Callable[[], Any], items: int, min_time: float, single_pass: bool = False
+) -> dict[str, float]:
+    if single_pass:
+        start = time.perf_counter()
+        func()
+        loops, elapsed = 1, time.perf_counter() - start
+    else:
+        loops, elapsed = time_call(func, min_time=min_time)
+
+    return {"per_sec": loops * items / elapsed, "seconds_per_pass": elapsed / loops}
+
+
+def bench_scale(
+    scale: str = None, size: int = None, min_time: float = 0.2, only: list[str] = None
+) -> dict[str, dict[str, Any]]:
+    """Run every case at one scale, in the current working directory."""
+    results: dict[str, dict[str, Any]] = {}
+    full, summaries = build_records(size)
+    pages = [
+        {"page": i // page_size + 1, "results": summaries[i : i + page_size]}
+        for i in range(0, size, page_size)
+    ]
+
+    def _parse_pages() -> None:
+        for page in pages:
+            response = MediaResponse.parse_obj(page)
+
+            for result in response.results:
+                MediaTVShow.parse_obj(result)
+
+    ## Case group -> function returning {case name: metrics}
+    cases: dict[str, Callable[[], dict[str, dict[str, Any]]]] = {
+        "parse": lambda: {
+            "parse/tv_show": _rename(
+                _throughput(lambda: [MediaTVShow.parse_obj(r) for r in full], size, min_time),
+                "records",
+            ),
+            "parse/media_response": _rename(_throughput(_parse_pages, size, min_time), "records"),
+            "parse/tv_show_pool": _bench_parse_pool(full, min_time),
+        },
+        "bad_ids": lambda: {
+            "bad_ids/check_bad_id": _bench_check_bad_id(size, min_time),
+            "bad_ids/generate_rand_id": _bench_generate_rand_id(size, min_time),
+        },
+        "msgpack": lambda: _bench_msgpack(summaries, min_time),
+        "db": lambda: {"db/upsert_tv_shows": _bench_upsert(summaries, scale)},
+        "uuid": lambda: {
+            "uuid/get_rand_uuid": _rename(
+                _throughput(lambda: [get_rand_uuid() for _ in range(size)], size, min_time),
+                "uuids",
+            ),
+            "uuid/gen_uuids": _rename(
+                _throughput(lambda: gen_uuids(count=size, as_str=True), size, min_time), "uuids"
+            ),
+            "uuid/gen_uuid7s": _rename(
+                _throughput(lambda: gen_uuid7s(count=size, as_str=True), size, min_time), "uuids"
+            ),
+        },
+    }
+
+    for group, case in cases.items():
+        ## --case parse/tv_show still has to run the whole parse group
+        if only and not any(prefix.split("/")[0] == group for prefix in only):
+            continue
+
+        for name, metrics in case().items():
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+
+            key = f"{name}/{scale}"
+            results[key] = metrics
+
+            rate = next(v for k, v in metrics.items() if k.endswith("_per_sec"))
+            print(f"{key:<34} {rate:>14,.0f}/s")
+
+    return results
+
+
+def _rename(result: dict[str, float], unit: str) -> dict[str, float]:
+    return {f"{unit}_per_sec": result["per_sec"], "seconds_per_pass": result["seconds_per_pass"]}
+
+
+def _bench_parse_pool(records: list[dict], min_time: float) -> dict[str, float]:
+    raws = [(record["id"], json.dumps(record).encode()) for record in records]
+
+    with ParsePool(media_type="tv") as pool:
+        ## Start the worker processes outside the timed loop
+        pool.parse(raws[: pool.chunk_size * pool.max_workers])
+
+        result = _throughput(lambda: pool.parse(raws), len(raws), min_time)
+
+        return {**_rename(result, "records"), "workers": pool.max_workers}
+
+
+def _bench_check_bad_id(size: int, min_time: float) -> dict[str, float]:
+    bad_id_file = write_bad_ids("bad_ids_bench", count=size)
+    rand = random.Random(1)
+
+    result = _throughput(
+        lambda: check_bad_id(rand.randint(1, 10_000_000), bad_id_file=str(bad_id_file)),
+        1,
+        min_time,
+    )
+
+    return {"calls_per_sec": result["per_sec"], "file_bytes": bad_id_file.stat().st_size}
+
+
+def _bench_generate_rand_id(size: int, min_time: float) -> dict[str, float]:
+    ## generate_rand_id() reads bad_<type>_ids from the working directory
+    write_bad_ids("bad_tv_ids", count=size)
+
+    result = _throughput(lambda: generate_rand_id(type="tv", ceiling=10_000_000), 1, min_time)
+
+    return {"calls_per_sec": result["per_sec"]}
+
+
+def _bench_msgpack(records: list[dict], min_time: float) -> dict[str, dict[str, Any]]:
+    data = {"results": records}
+    filename = "hot_paths_bench"
+
+    serialized = _throughput(
+        lambda: msgpack_serialize(_json=data, filename=filename, fsync=False),
+        len(records),
+        min_time,
+    )
+    path = Path(".serialize") / f"{filename}.msgpack"
+    deserialized = _throughput(
+        lambda: msgpack_deserialize(filename=str(path)), len(records), min_time
+    )
+
+    size_bytes = path.stat().st_size
+
+    return {
+        "msgpack/serialize": {**_rename(serialized, "records"), "size_bytes": size_bytes},
+        "msgpack/deserialize": {**_rename(deserialized, "records"), "size_bytes": size_bytes},
+    }
+
+
+def _bench_upsert(records: list[dict], scale: str) -> dict[str, float]:
+    engine = get_engine(connection=f"hot_paths_{scale}.sqlite", sqlite_profile="bulk_load")
+    create_base_metadata(base_obj=Base, engine=engine)
+    SessionLocal = get_session(engine=engine)
+
+    shows = [MediaTVShow.parse_obj(record) for record in records]
+
+    def _upsert() -> None:
+        with SessionLocal() as session:
+            upsert_tv_shows(session=session, shows=shows)
+            session.commit()
+
+    result = _throughput(_upsert, len(shows), min_time=0, single_pass=True)
+    engine.dispose()
+
+    return _rename(result, "rows")
+
+
+def run(
+    scales: list[str] = None,
+    min_time: float = 0.2,
+    only: list[str] = None,
+    sizes: dict[str, int] = None,
+) -> dict[str, dict[str, Any]]:
+    """Run the suite at each scale, in a temporary directory. Returns results keyed by case."""
+    sizes = sizes or scale_sizes
+    results: dict[str, dict[str, Any]] = {}
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory(prefix="hot_paths_bench-") as work_dir:
+        os.chdir(work_dir)
+
+        try:
+            for scale in scales or default_scales:
+                if scale not in sizes:
+                    raise ValueError(f"Invalid scale: {scale}. Must be one of {list(sizes)}")
+
+                results.update(
+                    bench_scale(scale=scale, size=sizes[scale], min_time=min_time, only=only)
+                )
+        finally:
+            os.chdir(cwd)
+
+    return results
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scale",
+        action="append",
+        dest="scales",
+        choices=list(scale_sizes),
+        help=f"Record count to run at (repeatable). Default: {default_scales}",
+    )
+    parser.add_argument(
+        "--case",
+        action="append",
+        dest="cases",
+        help="Only run cases starting with this prefix (repeatable), i.e. --case parse --case db",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="Minimum seconds to spend timing each repeatable case.",
+    )
+    parser.add_argument("--out", type=Path, default=default_results_file)
+    parser.add_argument("--baseline", type=Path, default=default_baseline_file)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Also write results to the baseline file.",
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Compare results to the baseline file, exit 1 on regressions.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Fractional regression allowed before failing, i.e. 0.10 = 10%%.",
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] = None) -> int:
+    args = parse_args(argv)
+
+    ## Resolve output paths before run() changes directory
+    out_file = args.out.resolve()
+    baseline_file = args.baseline.resolve()
+
+    results = run(scales=args.scales, min_time=args.min_time, only=args.cases)
+    meta = build_meta(suite=suite_name, scales=args.scales or default_scales)
+
+    out_path = write_results(results=results, meta=meta, path=out_file)
+    print(f"Results written to {out_path}")
+
+    if args.save_baseline:
+        base_path = write_results(results=results, meta=meta, path=baseline_file)
+        print(f"Baseline written to {base_path}")
+
+    if args.compare:
+        regressions = compare_results(
+            current={"results": results},
+            baseline=load_results(baseline_file),
+            threshold=args.threshold,
+        )
+        report_regressions(regressions, threshold=args.threshold)
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
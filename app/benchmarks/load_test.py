@@ -0,0 +1,475 @@
+"""Offline load test for the TMDB client.
+
+Drives utils.tmdb_utils.make_request() from N concurrent callers against a
+stub TMDB API serving the recorded responses in examples/responses/, and
+reports per concurrency level:
+
+    - requests_per_sec: completed requests (including failed ones) per second
+    - p50_ms/p95_ms/p99_ms/max_ms: per-call latency, including retries
+    - errors: calls that ended in a non-200 response or an exception
+    - retries: retried attempts (429/5xx), from the client's request metrics
+    - cpu_seconds/cpu_ms_per_request: process CPU time (user + system)
+    - max_rss_mb: peak resident memory of the process
+
+The stub runs either in-process behind httpx.MockTransport (--transport mock,
+the default; measures the client alone), or as a local HTTP server
+(--transport server; adds real sockets, connection pooling and HTTP parsing).
+Either way it can add latency, fail a fraction of requests with a 503, and
+rate limit a fraction with a 429 (Retry-After: 0).
+
+--transport replay instead replays recorded responses (VCR cassettes or a
+packed cassette, see utils.replay_utils), cycling through every recorded GET.
+Error and rate limit injection do not apply.
+
+Per-request client logging is silenced during the run (--verbose keeps it).
+
+Usage (from the app/ directory):
+
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --transport server --concurrency 1 --concurrency 16 --requests 5000
+    python -m benchmarks.load_test --latency 0.05 --error-rate 0.02 --rate-limit-rate 0.05 --retries 3
+    python -m benchmarks.load_test --transport replay --cassette tests/cassettes
+    python -m benchmarks.load_test --save-baseline
+    python -m benchmarks.load_test --compare --threshold 0.15
+"""
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import cycle, islice
+import json
+import logging
+from pathlib import Path
+import random
+import re
+import resource
+import sys
+import threading
+import time
+
+from typing import Any, Optional, Union
+
+from benchmarks.bench_utils import (
+    build_meta,
+    compare_results,
+    default_baselines_dir,
+    default_results_dir,
+    load_results,
+    report_regressions,
+    write_results,
+)
+from benchmarks.serialization_bench import load_payloads
+import httpx
+from utils.metrics_utils import MetricsRegistry
+from utils.replay_utils import ReplayTransport, load_cassette
+from utils.time_utils import percentile
+from utils.tmdb_utils import make_request
+
+suite_name: str = "load_test"
+default_results_file: Path = default_results_dir / f"{suite_name}.json"
+default_baseline_file: Path = default_baselines_dir / f"{suite_name}.json"
+
+## Host the mock transport pretends to be; never resolved
+stub_base_url: str = "https://api.themoviedb.org/3"
+
+default_concurrency: list[int] = [1, 8, 32]
+
+valid_transports: list[str] = ["mock", "server", "replay"]
+
+## Share of generated requests per endpoint
+endpoint_mix: list[tuple[str, float]] = [
+    ("/tv/{id}", 0.45),
+    ("/movie/{id}", 0.45),
+    ("/tv/popular", 0.10),
+]
+
+_detail_path = re.compile(r"^/3/(tv|movie)/(\d+)$")
+
+
+class StubTMDB:
+    """Serves recorded TMDB responses, with injected latency, errors and rate limits.
+
+    Params:
+        latency: Seconds added to every response.
+        jitter: Up to this many extra seconds, uniformly random, per response.
+        error_rate: Fraction of requests answered with a 503.
+        rate_limit_rate: Fraction of requests answered with a 429.
+        seed: Seed for the injection decisions, so runs are repeatable.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+
+        payloads = load_payloads()
+        ## Bodies are encoded once; the stub should cost as little as possible
+        self.bodies: dict[str, bytes] = {
+            "tv": json.dumps(payloads["tv_details"]).encode("utf-8"),
+            "movie": json.dumps(payloads["movie_details"]).encode("utf-8"),
+            "popular": json.dumps(payloads["popular_tv_page"]).encode("utf-8"),
+        }
+
+        self._rand = random.Random(seed)
+        self._lock = threading.Lock()
+        self.served = 0
+
+    def respond(self, path: str = None) -> tuple[int, dict[str, str], bytes]:
+        """Return (status, headers, body) for a GET of path."""
+        with self._lock:
+            self.served += 1
+            roll = self._rand.random()
+            delay = self.latency + (self._rand.random() * self.jitter if self.jitter else 0)
+
+        if delay:
+            time.sleep(delay)
+
+        if roll < self.rate_limit_rate:
+            return 429, {"retry-after": "0"}, b'{"status_code":25}'
+
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 503, {}, b'{"status_code":11}'
+
+        if path == "/3/tv/popular":
+            body = self.bodies["popular"]
+        elif match := _detail_path.match(path):
+            body = self.bodies[match.group(1)]
+        else:
+            return 404, {}, b'{"status_code":34}'
+
+        return 200, {"content-type": "application/json;charset=utf-8"}, body
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        """httpx.MockTransport handler."""
+        status, headers, body = self.respond(request.url.path)
+
+        return httpx.Response(status, headers=headers, content=body)
+
+
+def start_stub_server(stub: StubTMDB = None, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve a StubTMDB over HTTP on a free port, on a daemon thread."""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        ## Headers & body are separate writes; without this, delayed ACKs add ~40ms
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            status, headers, body = stub.respond(self.path.split("?", 1)[0])
+
+            self.send_response(status)
+
+            for name, value in headers.items():
+                self.send_header(name, value)
+
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, 0), StubHandler)
+    server.daemon_threads = True
+
+    threading.Thread(target=server.serve_forever, name="stub-tmdb", daemon=True).start()
+
+    return server
+
+
+def build_urls(base_url: str = None, count: int = None, seed: int = 0) -> list[str]:
+    """Return count request URLs, following endpoint_mix."""
+    rand = random.Random(seed)
+    templates = [template for template, _ in endpoint_mix]
+    weights = [weight for _, weight in endpoint_mix]
+
+    return [
+        base_url + template.replace("{id}", str(rand.randint(1, 100_000)))
+        for template in rand.choices(templates, weights=weights, k=count)
+    ]
+
+
+@dataclass
+class LoadResult:
+    concurrency: int
+    requests: int
+    errors: int
+    retries: int
+    elapsed: float
+    latencies_ms: list[float]
+    cpu_seconds: float
+    max_rss_mb: float
+
+    def summary(self) -> dict[str, Any]:
+        ordered = sorted(self.latencies_ms)
+
+        return {
+            "requests": self.requests,
+            "requests_per_sec": self.requests / self.elapsed if self.elapsed else 0.0,
+            "p50_ms": percentile(ordered, 50),
+            "p95_ms": percentile(ordered, 95),
+            "p99_ms": percentile(ordered, 99),
+            "max_ms": ordered[-1] if ordered else 0.0,
+            "errors": self.errors,
+            "retries": self.retries,
+            "cpu_seconds": self.cpu_seconds,
+            "cpu_ms_per_request": self.cpu_seconds * 1000 / self.requests if self.requests else 0.0,
+            "max_rss_mb": self.max_rss_mb,
+        }
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+
+    return usage.ru_utime + usage.ru_stime
+
+
+def max_rss_mb() -> float:
+    ## ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_load(
+    client: httpx.Client = None,
+    urls: list[str] = None,
+    concurrency: int = 8,
+    retries: int = 0,
+    backoff: float = 0.0,
+) -> LoadResult:
+    """GET every URL from concurrency threads through one shared client."""
+    requests = len(urls)
+    registry = MetricsRegistry()
+    headers = {"accept": "application/json", "Authorization": "Bearer load-test"}
+
+    def _call(url: str) -> tuple[float, bool]:
+        start = time.perf_counter()
+
+        try:
+            res = make_request(
+                url=url,
+                headers=headers,
+                client=client,
+                retries=retries,
+                backoff=backoff,
+                metrics_registry=registry,
+            )
+            ok = res.status_code == 200
+        except Exception:
+            ok = False
+
+        return (time.perf_counter() - start) * 1000, ok
+
+    cpu_start = cpu_seconds()
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load") as executor:
+        outcomes = list(executor.map(_call, urls))
+
+    elapsed = time.perf_counter() - start
+
+    return LoadResult(
+        concurrency=concurrency,
+        requests=requests,
+        errors=sum(1 for _, ok in outcomes if not ok),
+        retries=int(registry.get_counter_total("tmdb_request_retries_total")),
+        elapsed=elapsed,
+        latencies_ms=[latency for latency, _ in outcomes],
+        cpu_seconds=cpu_seconds() - cpu_start,
+        max_rss_mb=max_rss_mb(),
+    )
+
+
+def run(
+    transport: str = "mock",
+    cassette: Union[str, Path] = None,
+    concurrency_levels: list[int] = None,
+    requests: int = 1000,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    retries: int = 0,
+    backoff: float = 0.0,
+    seed: int = 0,
+) -> dict[str, dict[str, Any]]:
+    """Run the load test at each concurrency level. Returns results keyed by case name."""
+    if transport not in valid_transports:
+        raise ValueError(f"Invalid transport: {transport}. Must be one of {valid_transports}")
+
+    if transport == "replay" and not cassette:
+        raise ValueError("The replay transport needs a cassette path")
+
+    stub = StubTMDB(
+        latency=latency,
+        jitter=jitter,
+        error_rate=error_rate,
+        rate_limit_rate=rate_limit_rate,
+        seed=seed,
+    )
+    server: Optional[ThreadingHTTPServer] = None
+
+    if transport == "server":
+        server = start_stub_server(stub=stub)
+        host, port = server.server_address[:2]
+        base_url = f"http://{host}:{port}/3"
+    else:
+        base_url = stub_base_url
+
+    if transport == "replay":
+        recorded = load_cassette(cassette)
+        replay = ReplayTransport(recorded, latency=latency, jitter=jitter)
+        recorded_urls = [key.split(" ", 1)[1] for key in recorded.keys() if key.startswith("GET ")]
+
+        if not recorded_urls:
+            raise ValueError(f"No recorded GET requests in {cassette}")
+
+        urls = list(islice(cycle(recorded_urls), requests))
+    else:
+        urls = build_urls(base_url=base_url, count=requests, seed=seed)
+
+    results: dict[str, dict[str, Any]] = {}
+
+    try:
+        for concurrency in concurrency_levels or default_concurrency:
+            if transport == "server":
+                client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=concurrency, max_keepalive_connections=concurrency
+                    )
+                )
+            elif transport == "replay":
+                client = httpx.Client(transport=replay)
+            else:
+                client = httpx.Client(transport=httpx.MockTransport(stub.handle))
+
+            with client:
+                result = run_load(
+                    client=client,
+                    urls=urls,
+                    concurrency=concurrency,
+                    retries=retries,
+                    backoff=backoff,
+                )
+
+            case = f"{transport}/c{concurrency}"
+            results[case] = result.summary()
+
+            print(
+                f"{case:<14} {results[case]['requests_per_sec']:>10,.0f} req/s  "
+                f"p50 {results[case]['p50_ms']:>8.2f} ms  p99 {results[case]['p99_ms']:>8.2f} ms  "
+                f"errors {result.errors:>5}  retries {result.retries:>5}  "
+                f"cpu {results[case]['cpu_ms_per_request']:.3f} ms/req  rss {result.max_rss_mb:.0f} MB"
+            )
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    return results
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transport", choices=valid_transports, default="mock")
+    parser.add_argument(
+        "--cassette",
+        type=Path,
+        help="VCR cassette file/directory or packed cassette, for --transport replay.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        action="append",
+        dest="concurrency_levels",
+        help=f"Concurrent callers (repeatable). Default: {default_concurrency}",
+    )
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per concurrency level.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to each response.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction answered with 503.")
+    parser.add_argument(
+        "--rate-limit-rate", type=float, default=0.0, help="Fraction answered with 429."
+    )
+    parser.add_argument("--retries", type=int, default=0, help="Client retries for 429/5xx.")
+    parser.add_argument("--backoff", type=float, default=0.0, help="Client retry backoff, seconds.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Keep per-request client logging.")
+    parser.add_argument("--out", type=Path, default=default_results_file)
+    parser.add_argument("--baseline", type=Path, default=default_baseline_file)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Also write results to the baseline file.",
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Compare results to the baseline file, exit 1 on regressions.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Fractional regression allowed before failing, i.e. 0.10 = 10%%.",
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] = None) -> int:
+    args = parse_args(argv)
+
+    if not args.verbose:
+        logging.getLogger("utils.tmdb_utils.requests").setLevel(logging.CRITICAL)
+
+    settings = {
+        "transport": args.transport,
+        "cassette": str(args.cassette) if args.cassette else None,
+        "requests": args.requests,
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "error_rate": args.error_rate,
+        "rate_limit_rate": args.rate_limit_rate,
+        "retries": args.retries,
+        "backoff": args.backoff,
+        "seed": args.seed,
+    }
+
+    results = run(concurrency_levels=args.concurrency_levels, **settings)
+    meta = build_meta(suite=suite_name, **settings)
+
+    out_path = write_results(results=results, meta=meta, path=args.out)
+    print(f"Results written to {out_path}")
+
+    if args.save_baseline:
+        base_path = write_results(results=results, meta=meta, path=args.baseline)
+        print(f"Baseline written to {base_path}")
+
+    if args.compare:
+        regressions = compare_results(
+            current={"results": results},
+            baseline=load_results(args.baseline),
+            threshold=args.threshold,
+        )
+        report_regressions(regressions, threshold=args.threshold)
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""Serialization format benchmark for TMDB payloads.
+
+Measures encode/decode throughput, encoded size (bytes on disk) and peak
+memory for each storage format we could use for the catalog cache:
+
+    - stdlib json
+    - orjson (skipped if not installed)
+    - msgpack (via utils.msgpack_utils)
+    - pickle
+    - zlib, bz2 and lzma compressed variants of each of the above
+
+Payloads are the recorded responses in examples/responses/, plus a popular
+TV page built from the recorded TV show (the popular endpoint returns a page
+of 20 summarized shows).
+
+Usage (from the app/ directory):
+
+    ## Run and write results
+    python -m benchmarks.serialization_bench
+
+    ## Store the current run as the baseline
+    python -m benchmarks.serialization_bench --save-baseline
+
+    ## Run and fail (exit 1) on anything >10% worse than the baseline
+    python -m benchmarks.serialization_bench --compare --threshold 0.10
+"""
+from __future__ import annotations
+
+import argparse
+import bz2
+import json
+import lzma
+from pathlib import Path
+import pickle
+import sys
+import tracemalloc
+from typing import Any, Callable
+import zlib
+
+from benchmarks.bench_utils import (
+    build_meta,
+    compare_results,
+    default_baselines_dir,
+    default_results_dir,
+    load_results,
+    report_regressions,
+    time_call,
+    write_results,
+)
+from utils.msgpack_utils import msgpack_dumps, msgpack_loads
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+THIS_DIR = Path(__file__).parent
+
+responses_dir: Path = THIS_DIR.parent / "examples" / "responses"
+
+suite_name: str = "serialization"
+default_results_file: Path = default_results_dir / f"{suite_name}.json"
+default_baseline_file: Path = default_baselines_dir / f"{suite_name}.json"
+
+## Keys TMDB includes for each show on a /tv/popular page
+popular_result_keys: list[str] = [
+    "adult",
+    "backdrop_path",
+    "first_air_date",
+    "id",
+    "name",
+    "origin_country",
+    "original_language",
+    "original_name",
+    "overview",
+    "popularity",
+    "poster_path",
+    "vote_average",
+    "vote_count",
+]
+
+## name -> (encode, decode)
+Codec = tuple[Callable[[Any], bytes], Callable[[bytes], Any]]
+
+
+def load_payloads() -> dict[str, Any]:
+    """Load recorded TMDB responses to benchmark against."""
+    with open(responses_dir / "ex_tvshow_response.json", "r") as in_file:
+        tv_details: dict = json.load(in_file)
+
+    with open(responses_dir / "ex_movie_response.json", "r") as in_file:
+        movie_details: dict = json.load(in_file)
+
+    popular_results: list[dict] = []
+
+    for i in range(20):
+        result = {k: tv_details.get(k) for k in popular_result_keys}
+        result["id"] = tv_details["id"] + i
+        result["genre_ids"] = [g["id"] for g in tv_details.get("genres", [])]
+
+        popular_results.append(result)
+
+    popular_page: dict = {
+        "page": 1,
+        "results": popular_results,
+        "total_pages": 500,
+        "total_results": 10000,
+    }
+
+    return {
+        "popular_tv_page": popular_page,
+        "tv_details": tv_details,
+        "movie_details": movie_details,
+    }
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj).encode("utf-8")
+
+
+def _json_loads(in_bytes: bytes) -> Any:
+    return json.loads(in_bytes)
+
+
+def _pickle_dumps(obj: Any) -> bytes:
+    return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _compressed(codec: Codec, compress: Callable, decompress: Callable) -> Codec:
+    encode, decode = codec
+
+    return (lambda obj: compress(encode(obj)), lambda b: decode(decompress(b)))
+
+
+def build_codecs() -> dict[str, Codec]:
+    """Return every codec to benchmark, keyed by name."""
+    base: dict[str, Codec] = {
+        "json": (_json_dumps, _json_loads),
+        "msgpack": (msgpack_dumps, msgpack_loads),
+        "pickle": (_pickle_dumps, pickle.loads),
+    }
+
+    if orjson is not None:
+        base["orjson"] = (orjson.dumps, orjson.loads)
+
+    compressors: dict[str, tuple[Callable, Callable]] = {
+        "zlib": (zlib.compress, zlib.decompress),
+        "bz2": (bz2.compress, bz2.decompress),
+        "lzma": (lzma.compress, lzma.decompress),
+    }
+
+    codecs: dict[str, Codec] = dict(base)
+
+    for base_name, codec in base.items():
+        for comp_name, (compress, decompress) in compressors.items():
+            codecs[f"{base_name}+{comp_name}"] = _compressed(codec, compress, decompress)
+
+    return codecs
+
+
+def peak_memory(func: Callable[[], Any] = None) -> int:
+    """Return peak bytes allocated by Python while running func once."""
+    tracemalloc.start()
+
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def bench_codec(payload: Any = None, codec: Codec = None, min_time: float = 0.2):
+    """Benchmark a single codec against a single payload."""
+    encode, decode = codec
+
+    encoded: bytes = encode(payload)
+
+    if decode(encoded) != payload:
+        raise ValueError("Codec did not round-trip payload")
+
+    enc_loops, enc_seconds = time_call(lambda: encode(payload), min_time=min_time)
+    dec_loops, dec_seconds = time_call(lambda: decode(encoded), min_time=min_time)
+
+    raw_size: int = len(_json_dumps(payload))
+
+    return {
+        "encode_per_sec": enc_loops / enc_seconds,
+        "decode_per_sec": dec_loops / dec_seconds,
+        "encode_mb_per_sec": raw_size * enc_loops / enc_seconds / 1_000_000,
+        "decode_mb_per_sec": raw_size * dec_loops / dec_seconds / 1_000_000,
+        "size_bytes": len(encoded),
+        "size_ratio_vs_json": len(encoded) / raw_size,
+        "encode_peak_bytes": peak_memory(lambda: encode(payload)),
+        "decode_peak_bytes": peak_memory(lambda: decode(encoded)),
+    }
+
+
+def run(min_time: float = 0.2, only: list[str] = None) -> dict[str, dict[str, Any]]:
+    """Run every codec against every payload. Returns results keyed by case name."""
+    payloads = load_payloads()
+    codecs = build_codecs()
+
+    if only:
+        codecs = {k: v for k, v in codecs.items() if k in only}
+
+    results: dict[str, dict[str, Any]] = {}
+
+    for payload_name, payload in payloads.items():
+        for codec_name, codec in codecs.items():
+            case = f"{payload_name}/{codec_name}"
+            results[case] = bench_codec(payload=payload, codec=codec, min_time=min_time)
+
+            print(
+                f"{case:<36} enc {results[case]['encode_per_sec']:>12,.0f}/s  dec {results[case]['decode_per_sec']:>12,.0f}/s  {results[case]['size_bytes']:>8,} B"
+            )
+
+    return results
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="Minimum seconds to spend timing each encode/decode.",
+    )
+    parser.add_argument(
+        "--codec",
+        action="append",
+        dest="codecs",
+        help="Only run this codec (repeatable), i.e. --codec msgpack --codec json+zlib",
+    )
+    parser.add_argument("--out", type=Path, default=default_results_file)
+    parser.add_argument("--baseline", type=Path, default=default_baseline_file)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Also write results to the baseline file.",
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Compare results to the baseline file, exit 1 on regressions.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Fractional regression allowed before failing, i.e. 0.10 = 10%%.",
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] = None) -> int:
+    args = parse_args(argv)
+
+    results = run(min_time=args.min_time, only=args.codecs)
+    meta = build_meta(suite=suite_name, orjson=orjson is not None)
+
+    out_path = write_results(results=results, meta=meta, path=args.out)
+    print(f"Results written to {out_path}")
+
+    if args.save_baseline:
+        base_path = write_results(results=results, meta=meta, path=args.baseline)
+        print(f"Baseline written to {base_path}")
+
+    if args.compare:
+        regressions = compare_results(
+            current={"results": results},
+            baseline=load_results(args.baseline),
+            threshold=args.threshold,
+        )
+        report_regressions(regressions, threshold=args.threshold)
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""Import-time (startup) benchmark.
+
+Imports each of the app's modules in a fresh interpreter with
+`python -X importtime`, and reports:
+
+    - cumulative_us: import time of the module, including everything it imports
+    - self_us: import time of the module's own top-level code
+    - wall_ms: wall time of the whole interpreter run (startup + import)
+    - the slowest imports in the module's import tree
+    - any files/directories the import created (import-time side effects)
+
+Each interpreter runs in an empty temporary directory (with app/ on
+PYTHONPATH), so side effects like creating logs/ or a SQLite database show
+up instead of silently landing in app/.
+
+Usage (from the app/ directory):
+
+    python -m benchmarks.startup_bench
+    python -m benchmarks.startup_bench --module core.db --module main --top 15
+    python -m benchmarks.startup_bench --save-baseline
+    python -m benchmarks.startup_bench --compare --threshold 0.25
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, field
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_utils import (
+    build_meta,
+    compare_results,
+    default_baselines_dir,
+    default_results_dir,
+    load_results,
+    report_regressions,
+    write_results,
+)
+
+THIS_DIR = Path(__file__).parent
+app_dir: Path = THIS_DIR.parent
+
+suite_name: str = "startup"
+default_results_file: Path = default_results_dir / f"{suite_name}.json"
+default_baseline_file: Path = default_baselines_dir / f"{suite_name}.json"
+
+default_modules: list[str] = [
+    "core.config",
+    "core.db",
+    "lib.constants",
+    "utils.logger",
+    "utils.msgpack_utils",
+    "utils.tmdb_utils",
+    "domain.schemas.tmdb.tmdb_media_schemas",
+    "domain.models.tmdb.tmdb_media_models",
+    "main",
+]
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class StartupResult:
+    module: str
+    wall_ms: float
+    cumulative_us: int = 0
+    self_us: int = 0
+    imports: list[ImportTiming] = field(default_factory=list)
+    created_files: list[str] = field(default_factory=list)
+
+
+def parse_importtime(stderr: str = None) -> list[ImportTiming]:
+    """Parse `-X importtime` output lines.
+
+    Lines look like:
+        import time: self [us] | cumulative | imported package
+        import time:       217 |        217 |   _io
+    """
+    timings: list[ImportTiming] = []
+
+    for line in (stderr or "").splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        parts = line[len("import time:") :].split("|")
+
+        if len(parts) != 3:
+            continue
+
+        try:
+            self_us = int(parts[0].strip())
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            ## Header line
+            continue
+
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+
+        timings.append(
+            ImportTiming(
+                module=name.strip(),
+                self_us=self_us,
+                cumulative_us=cumulative_us,
+                depth=depth,
+            )
+        )
+
+    return timings
+
+
+def measure_import(module: str = None) -> StartupResult:
+    """Import a module in a fresh interpreter and time it."""
+    if not module:
+        raise ValueError("Missing module name to import")
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in [str(app_dir), env.get("PYTHONPATH")] if p
+    )
+    ## Keep stale bytecode from skewing results one way or the other
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        start = time.perf_counter()
+
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=scratch_dir,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        created = sorted(
+            str(p.relative_to(scratch_dir)) for p in Path(scratch_dir).rglob("*")
+        )
+
+    if proc.returncode != 0:
+        raise Exception(
+            f"Unhandled exception importing {module}. Details: {proc.stderr.splitlines()[-1:]}"
+        )
+
+    imports = parse_importtime(proc.stderr)
+    result = StartupResult(
+        module=module, wall_ms=wall_ms, imports=imports, created_files=created
+    )
+
+    for timing in imports:
+        if timing.module == module:
+            result.cumulative_us = timing.cumulative_us
+            result.self_us = timing.self_us
+
+    return result
+
+
+def best_of(module: str = None, repeat: int = 3) -> StartupResult:
+    """Return the fastest of repeat runs; the minimum is the least noisy figure."""
+    runs = [measure_import(module) for _ in range(repeat)]
+
+    return min(runs, key=lambda r: r.cumulative_us)
+
+
+def report(result: StartupResult = None, top: int = 10) -> None:
+    print(
+        f"{result.module:<40} {result.cumulative_us / 1000:>8.1f} ms cumulative  {result.self_us / 1000:>7.1f} ms self  {result.wall_ms:>8.1f} ms wall"
+    )
+
+    slowest = sorted(result.imports, key=lambda t: t.self_us, reverse=True)[:top]
+
+    for timing in slowest:
+        print(f"    {timing.self_us / 1000:>8.2f} ms self  {timing.module}")
+
+    if result.created_files:
+        print(f"    !! import created: {', '.join(result.created_files)}")
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--module",
+        action="append",
+        dest="modules",
+        help="Module to import (repeatable). Defaults to the app's main modules.",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--top", type=int, default=5, help="Slowest imports to list per module."
+    )
+    parser.add_argument("--out", type=Path, default=default_results_file)
+    parser.add_argument("--baseline", type=Path, default=default_baseline_file)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25)
+
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] = None) -> int:
+    args = parse_args(argv)
+
+    results: dict[str, dict] = {}
+
+    for module in args.modules or default_modules:
+        result = best_of(module=module, repeat=args.repeat)
+        report(result, top=args.top)
+
+        results[module] = {
+            "cumulative_us": result.cumulative_us,
+            "self_us": result.self_us,
+            "wall_ms": result.wall_ms,
+            "created_files": result.created_files,
+        }
+
+    meta = build_meta(suite=suite_name, repeat=args.repeat)
+
+    out_path = write_results(results=results, meta=meta, path=args.out)
+    print(f"Results written to {out_path}")
+
+    if args.save_baseline:
+        base_path = write_results(results=results, meta=meta, path=args.baseline)
+        print(f"Baseline written to {base_path}")
+
+    if args.compare:
+        regressions = compare_results(
+            current={"results": results},
+            baseline=load_results(args.baseline),
+            threshold=args.threshold,
+        )
+        report_regressions(regressions, threshold=args.threshold)
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
 
 from pydantic import BaseModel, BaseSettings, Field, ValidationError, validator
@@ -20,17 +21,38 @@ class AppSettings(BaseSettings):
         env_file = f"{THIS_DIR}/env_files/.env"
 
 
+default_base_url: str = "https://api.themoviedb.org/3"
+
+
 class APISettings(BaseSettings):
-    BASE_URL: str = Field(default=None, env="BASE_URL")
+    BASE_URL: str = Field(default=default_base_url, env="BASE_URL")
     API_KEY: str = Field(default=None, env="API_KEY")
     API_READ_KEY: str = Field(default=None, env="API_READ_KEY")
+    ## Retries for 429/5xx responses & transport errors (utils.tmdb_utils.make_request)
+    REQUEST_RETRIES: int = Field(default=0, env="REQUEST_RETRIES")
+    ## Base seconds for exponential backoff between retries
+    REQUEST_BACKOFF: float = Field(default=0.5, env="REQUEST_BACKOFF")
+
+    @validator("BASE_URL")
+    def valid_base_url(cls, v) -> str:
+        if not v:
+            v = default_base_url
+
+        return v.rstrip("/")
 
     class Config:
         env_file = f"{THIS_DIR}/env_files/api.env"
 
 
+allowed_log_formats = ["text", "json"]
+
+
 class LoggingSetting(BaseSettings):
     LOG_LEVEL: str = "INFO"
+    ## "text" or "json" (one JSON object per line)
+    LOG_FORMAT: str = "text"
+    ## Log 1 in N per-request lines (utils.tmdb_utils). 1 logs every request.
+    LOG_REQUEST_SAMPLE_N: int = 1
 
     @validator("LOG_LEVEL")
     def valid_log_level(cls, v) -> str:
@@ -44,10 +66,79 @@ class LoggingSetting(BaseSettings):
 
         return v
 
+    @validator("LOG_FORMAT")
+    def valid_log_format(cls, v) -> str:
+        if not v:
+            v = "text"
+
+        if v.lower() not in allowed_log_formats:
+            raise ValueError(f"Invalid log format [{v}]. Must be one of {allowed_log_formats}")
+
+        return v.lower()
+
     class Config:
         env_file = f"{THIS_DIR}/env_files/logging.env"
 
 
-app_settings = AppSettings()
-logging_settings = LoggingSetting()
-api_settings = APISettings()
+allowed_profile_modes = ["off", "cpu", "memory", "all"]
+
+
+class ProfilingSettings(BaseSettings):
+    ## "off", "cpu" (cProfile), "memory" (tracemalloc) or "all". See utils.profile_utils.
+    PROFILE_MODE: str = "off"
+    ## Directory .pstats files & memory reports are written to
+    PROFILE_DIR: str = "profiles"
+    ## Allocation sites/functions listed per report section
+    PROFILE_TOP_N: int = 10
+
+    @validator("PROFILE_MODE")
+    def valid_profile_mode(cls, v) -> str:
+        if not v:
+            v = "off"
+
+        if v.lower() not in allowed_profile_modes:
+            raise ValueError(f"Invalid profile mode [{v}]. Must be one of {allowed_profile_modes}")
+
+        return v.lower()
+
+    class Config:
+        env_file = f"{THIS_DIR}/env_files/profiling.env"
+
+
+## Settings are read from the environment/.env files on first use, not at import.
+#  Call the get_*_settings() functions, or import app_settings, logging_settings
+#  or api_settings as before; module __getattr__ below resolves them lazily.
+@lru_cache(maxsize=None)
+def get_app_settings() -> AppSettings:
+    return AppSettings()
+
+
+@lru_cache(maxsize=None)
+def get_logging_settings() -> LoggingSetting:
+    return LoggingSetting()
+
+
+@lru_cache(maxsize=None)
+def get_api_settings() -> APISettings:
+    return APISettings()
+
+
+@lru_cache(maxsize=None)
+def get_profiling_settings() -> ProfilingSettings:
+    return ProfilingSettings()
+
+
+_lazy_settings = {
+    "app_settings": get_app_settings,
+    "logging_settings": get_logging_settings,
+    "api_settings": get_api_settings,
+    "profiling_settings": get_profiling_settings,
+}
+
+
+def __getattr__(name: str):
+    """Resolve module-level settings objects on first access (PEP 562)."""
+    if name in _lazy_settings:
+        return _lazy_settings[name]()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
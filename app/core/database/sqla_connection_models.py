@@ -2,15 +2,48 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any
 
 import sqlalchemy as sa
 
+from sqlalchemy import pool as sa_pool
+
+## Pool class names accepted by saConnectionBase.poolclass
+valid_poolclasses: dict[str, type[sa_pool.Pool]] = {
+    "queue": sa_pool.QueuePool,
+    "static": sa_pool.StaticPool,
+    "null": sa_pool.NullPool,
+    "singleton": sa_pool.SingletonThreadPool,
+}
+
+## Pools that hold a fixed number of connections don't accept sizing arguments
+unsized_poolclasses: list[str] = ["static", "null", "singleton"]
+
+## Sync drivername -> asyncio drivername, for create_async_engine()
+async_drivernames: dict[str, str] = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
 @dataclass
 class saConnectionBase:
     """Base class for SQLAlchemy connection models.
 
     Each model will inherit the connection_string propery,
     which outputs a URL conection object.
+
+    Pool settings left as None use SQLAlchemy's defaults. They are passed
+    to create_engine() through the engine_kwargs property:
+        - poolclass: One of "queue", "static", "null", "singleton"
+        - pool_size: Connections kept open in a QueuePool
+        - max_overflow: Extra connections a QueuePool may open under load
+        - pool_recycle: Seconds before a connection is replaced
+        - pool_timeout: Seconds to wait for a free connection before raising
+
+    https://docs.sqlalchemy.org/en/20/core/pooling.html
     """
 
     drivername: str = field(default=None)
@@ -21,6 +54,47 @@ class saConnectionBase:
     port: int = field(default=None)
     database: str = field(default=None)
 
+    ## Connection pool settings
+    poolclass: str = field(default=None)
+    pool_size: int = field(default=None)
+    max_overflow: int = field(default=None)
+    pool_recycle: int = field(default=None)
+    pool_timeout: float = field(default=None)
+
+    @property
+    def async_connection_string(self) -> sa.engine.url.URL:
+        """Return connection_string with the matching asyncio driver.
+
+        Drivers that are already async (i.e. sqlite+aiosqlite) are kept.
+        """
+        _string: sa.engine.url.URL = self.connection_string
+
+        if _string.drivername in async_drivernames.values():
+            return _string
+
+        if _string.drivername not in async_drivernames:
+            raise ValueError(
+                f"No asyncio driver known for {_string.drivername}. Must be one of: {list(async_drivernames)}"
+            )
+
+        return _string.set(drivername=async_drivernames[_string.drivername])
+
+    @property
+    def engine_kwargs(self) -> dict[str, Any]:
+        """Return pool arguments for create_engine(), omitting unset values."""
+        kwargs: dict[str, Any] = {}
+
+        if self.poolclass:
+            kwargs["poolclass"] = valid_poolclasses[self.poolclass]
+
+        for name in ["pool_size", "max_overflow", "pool_recycle", "pool_timeout"]:
+            value = getattr(self, name)
+
+            if value is not None:
+                kwargs[name] = value
+
+        return kwargs
+
     @property
     def connection_string(self) -> sa.engine.url.URL:
         _string: sa.engine.url.URL = sa.engine.url.URL.create(
@@ -75,6 +149,32 @@ class saConnectionBase:
                 f"Database should be of type str, not {type(self.database).__name__}"
             )
 
+        if self.poolclass and self.poolclass not in valid_poolclasses:
+            raise ValueError(
+                f"Invalid poolclass: {self.poolclass}. Must be one of: {list(valid_poolclasses)}"
+            )
+
+        for name in ["pool_size", "max_overflow", "pool_recycle"]:
+            value = getattr(self, name)
+
+            if value is not None and not isinstance(value, int):
+                raise TypeError(
+                    f"{name} should be of type int, not {type(value).__name__}"
+                )
+
+        if self.pool_size is not None and self.pool_size < 1:
+            raise ValueError("pool_size must be 1 or greater")
+
+        if self.pool_timeout is not None and self.pool_timeout <= 0:
+            raise ValueError("pool_timeout must be greater than 0")
+
+        if self.poolclass in unsized_poolclasses and (
+            self.pool_size is not None or self.max_overflow is not None
+        ):
+            raise ValueError(
+                f"pool_size/max_overflow cannot be used with poolclass '{self.poolclass}'"
+            )
+
 
 @dataclass
 class saSQLiteConnection(saConnectionBase):
@@ -89,10 +189,28 @@ class saSQLiteConnection(saConnectionBase):
     Pass a value for $database to change the name of the database file.
     If you use a path (i.e. db/test.sqlite), you need to create the Path
     manually.
+
+    Set read_only=True to open the database through a read-only URI
+    (file:...?mode=ro). Read-only connections can never take SQLite's write
+    lock, so readers on this engine don't contend with a writer on another.
     """
 
     drivername: str = field(default="sqlite+pysqlite")
     database: str = field(default="default_unnamed.sqlite")
+    read_only: bool = field(default=False)
+
+    @property
+    def connection_string(self) -> sa.engine.url.URL:
+        if not self.read_only:
+            return super().connection_string
+
+        _string: sa.engine.url.URL = sa.engine.url.URL.create(
+            drivername=self.drivername,
+            database=f"file:{Path(self.database).absolute().as_posix()}",
+            query=dict(mode="ro", uri="true"),
+        )
+
+        return _string
 
     def ensure_path(self) -> None:
         """Ensure path to self.database exists.
@@ -0,0 +1,382 @@
+"""Sharded SQLite storage.
+
+SQLite allows one writer per database file, which caps ingestion at one core.
+ShardedSQLite spreads records over shard_count SQLite files, keyed by
+tmdb_id % shard_count. Each shard has its own engine, so shards are written in
+parallel: by a ShardedWriter (one DatabaseWriter thread per shard), or by
+separate crawler processes that each own a subset of the shards.
+
+Each shard is a complete database with every table. Rows shared between
+records (genres, networks, creators) are repeated in every shard that
+references them, so foreign keys hold within each shard.
+
+Reads:
+    - get()/session_for() go straight to the one shard that owns an ID.
+    - select()/scalars() fan a statement out to every shard on a thread pool
+      and merge the results, optionally in key order with a limit.
+    - count() sums a COUNT(*) over every shard.
+
+compact() merges every shard into one database (i.e. to hand off a finished
+crawl), upserting rows so the duplicated shared rows collapse to one.
+
+Usage:
+
+shards = ShardedSQLite(shard_dir="db/shards", shard_count=4)
+shards.create_all()
+
+with shards.get_writer(
+    handler=lambda session, records: upsert_tv_shows(session=session, shows=records)
+) as writer:
+    for show in shows:
+        writer.put(show)
+
+top = shards.scalars(
+    sa.select(TVShow).order_by(TVShow.popularity.desc()).limit(20),
+    key=lambda show: show.popularity or 0,
+    reverse=True,
+    limit=20,
+)
+
+shards.compact(target="db/merged.sqlite")
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+from itertools import islice
+from pathlib import Path
+
+from typing import Any, Callable, Iterable, Optional, TypeVar, Union
+
+from core.database.sqla_base import Base
+from core.database.sqla_sqlite_profile import SQLiteProfile
+from core.database.sqla_writer import DatabaseWriter
+from core.db import create_base_metadata, get_engine, get_session
+import sqlalchemy as sa
+
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+
+T = TypeVar("T")
+
+default_shard_template: str = "shard_{index:03d}.sqlite"
+
+
+def shard_index(tmdb_id: int = None, shard_count: int = None) -> int:
+    """Return the index of the shard that owns tmdb_id."""
+    if tmdb_id is None:
+        raise ValueError("Missing ID to shard on.")
+
+    return int(tmdb_id) % shard_count
+
+
+class ShardedSQLite:
+    """A set of SQLite files, each holding the records whose ID maps to it.
+
+    Params:
+        shard_dir: Directory the shard files live in.
+        shard_count: Number of shards. Must not change once data is written,
+            since it decides which shard owns an ID.
+        base_obj: DeclarativeBase whose tables every shard gets.
+        shard_template: Shard filename, formatted with the shard's index.
+        sqlite_profile: PRAGMA profile for every shard engine (see get_engine()).
+        echo: Echo SQL on every shard engine.
+    """
+
+    def __init__(
+        self,
+        shard_dir: Union[str, Path] = None,
+        shard_count: int = 4,
+        base_obj: type[DeclarativeBase] = Base,
+        shard_template: str = default_shard_template,
+        sqlite_profile: Union[SQLiteProfile, str, None] = "default",
+        echo: bool = False,
+    ) -> None:
+        if not shard_dir:
+            raise ValueError("Missing directory to store shards in.")
+
+        if shard_count < 1:
+            raise ValueError("shard_count must be 1 or greater")
+
+        self.shard_dir = Path(shard_dir)
+        self.shard_count = shard_count
+        self.base_obj = base_obj
+
+        self.paths: list[Path] = [
+            self.shard_dir / shard_template.format(index=i) for i in range(shard_count)
+        ]
+        self.engines: list[sa.Engine] = [
+            get_engine(connection=str(path), echo=echo, sqlite_profile=sqlite_profile)
+            for path in self.paths
+        ]
+        self.session_factories: list[sessionmaker[Session]] = [
+            get_session(engine=engine) for engine in self.engines
+        ]
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def create_all(self) -> None:
+        """Create the tables in every shard."""
+        for engine in self.engines:
+            create_base_metadata(base_obj=self.base_obj, engine=engine)
+
+    def shard_for(self, tmdb_id: int = None) -> int:
+        return shard_index(tmdb_id=tmdb_id, shard_count=self.shard_count)
+
+    def session_for(self, tmdb_id: int = None) -> sessionmaker[Session]:
+        """Return the sessionmaker of the shard that owns tmdb_id."""
+        return self.session_factories[self.shard_for(tmdb_id)]
+
+    def partition(
+        self, records: Iterable[T] = None, key: Callable[[T], int] = None
+    ) -> dict[int, list[T]]:
+        """Group records by shard index. key returns a record's ID (default: .tmdb_id)."""
+        key = key or (lambda record: record.tmdb_id)
+        groups: dict[int, list[T]] = {}
+
+        for record in records or []:
+            groups.setdefault(self.shard_for(key(record)), []).append(record)
+
+        return groups
+
+    def write(
+        self,
+        records: Iterable[T] = None,
+        handler: Callable[[Session, list[T]], Any] = None,
+        key: Callable[[T], int] = None,
+    ) -> int:
+        """Write records to their shards in parallel, one transaction per shard.
+
+        handler is called as handler(session, records), i.e. upsert_tv_shows.
+        Returns the number of records written.
+        """
+        groups = self.partition(records=records, key=key)
+
+        def _write(index: int) -> int:
+            with self.session_factories[index]() as session:
+                try:
+                    handler(session, groups[index])
+                    session.commit()
+                except Exception:
+                    session.rollback()
+                    raise
+
+            return len(groups[index])
+
+        return sum(self._get_executor().map(_write, list(groups)))
+
+    def get_writer(
+        self,
+        handler: Callable[[Session, list[Any]], Any] = None,
+        key: Callable[[Any], int] = None,
+        **writer_kwargs,
+    ) -> ShardedWriter:
+        """Return a ShardedWriter with one DatabaseWriter thread per shard.
+
+        writer_kwargs are passed to each DatabaseWriter (batch_size, etc).
+        """
+        return ShardedWriter(shards=self, handler=handler, key=key, **writer_kwargs)
+
+    def get(self, model: type[T] = None, tmdb_id: int = None) -> Optional[T]:
+        """Load one object by ID from the shard that owns it."""
+        with self.session_for(tmdb_id)() as session:
+            return session.get(model, tmdb_id)
+
+    def fan_out(self, func: Callable[[Session], T] = None) -> list[T]:
+        """Call func(session) on every shard concurrently. Returns results in shard order."""
+
+        def _run(session_factory: sessionmaker[Session]) -> T:
+            with session_factory() as session:
+                return func(session)
+
+        return list(self._get_executor().map(_run, self.session_factories))
+
+    def select(
+        self,
+        stmt: sa.Select = None,
+        key: Callable[[Any], Any] = None,
+        reverse: bool = False,
+        limit: int = None,
+    ) -> list[sa.Row]:
+        """Run a SELECT on every shard and merge the rows.
+
+        If key is passed, each shard's statement must already be ordered by
+        that key (ascending, or descending with reverse=True); the per-shard
+        results are then merged in order. Put the same LIMIT on stmt as
+        limit, so each shard returns at most limit rows.
+        """
+        results = self.fan_out(lambda session: session.execute(stmt).all())
+
+        return self._merge(results, key=key, reverse=reverse, limit=limit)
+
+    def scalars(
+        self,
+        stmt: sa.Select = None,
+        key: Callable[[Any], Any] = None,
+        reverse: bool = False,
+        limit: int = None,
+    ) -> list[Any]:
+        """Like select(), returning the first column (i.e. ORM objects)."""
+        results = self.fan_out(lambda session: session.scalars(stmt).all())
+
+        return self._merge(results, key=key, reverse=reverse, limit=limit)
+
+    def count(self, table: Union[sa.Table, type[DeclarativeBase]] = None) -> int:
+        """Return the total row count of a table across shards."""
+        stmt = sa.select(sa.func.count()).select_from(table)
+
+        return sum(self.fan_out(lambda session: session.scalar(stmt)))
+
+    @staticmethod
+    def _merge(
+        results: list[list[T]], key: Callable = None, reverse: bool = False, limit: int = None
+    ) -> list[T]:
+        if key is not None:
+            merged: Iterable[T] = heapq.merge(*results, key=key, reverse=reverse)
+        else:
+            merged = (item for result in results for item in result)
+
+        return list(islice(merged, limit))
+
+    def compact(
+        self,
+        target: Union[str, Path] = None,
+        sqlite_profile: Union[SQLiteProfile, str, None] = "bulk_load",
+    ) -> sa.Engine:
+        """Merge every shard into a single SQLite database at target.
+
+        Each shard is ATTACHed to the target and copied table by table with
+        INSERT ... SELECT ... ON CONFLICT DO UPDATE, so rows never pass through
+        Python. Returns the target's engine.
+        """
+        if not target:
+            raise ValueError("Missing path to compact shards into.")
+
+        engine = get_engine(connection=str(target), sqlite_profile=sqlite_profile)
+        create_base_metadata(base_obj=self.base_obj, engine=engine)
+
+        preparer = engine.dialect.identifier_preparer
+        tables = self.base_obj.metadata.sorted_tables
+
+        try:
+            with engine.connect() as conn:
+                for path in self.paths:
+                    if not path.exists():
+                        continue
+
+                    ## ATTACH cannot run inside a transaction
+                    conn.exec_driver_sql("ATTACH DATABASE ? AS shard", (str(path),))
+
+                    try:
+                        for table in tables:
+                            conn.exec_driver_sql(_copy_table_sql(table, preparer))
+
+                        conn.commit()
+                    except Exception:
+                        ## DETACH fails ("database shard is locked") while the
+                        #  failed copy's transaction is still open
+                        conn.rollback()
+                        raise
+                    finally:
+                        conn.exec_driver_sql("DETACH DATABASE shard")
+
+        except Exception as exc:
+            engine.dispose()
+
+            raise Exception(
+                f"Unhandled exception compacting shards into {target}. Details: {exc}"
+            ) from exc
+
+        return engine
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.shard_count, thread_name_prefix="shard"
+            )
+
+        return self._executor
+
+    def dispose(self) -> None:
+        """Close every shard's connections and the fan-out thread pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+        for engine in self.engines:
+            engine.dispose()
+
+
+def _copy_table_sql(table: sa.Table = None, preparer: Any = None) -> str:
+    """Build an INSERT ... SELECT copying a table from the attached shard into main."""
+    name = preparer.quote(table.name)
+    columns = [preparer.quote(c.name) for c in table.columns]
+    pk_columns = [preparer.quote(c.name) for c in table.primary_key.columns]
+    update_columns = [c for c in columns if c not in pk_columns]
+
+    column_list = ", ".join(columns)
+
+    if update_columns:
+        on_conflict = "DO UPDATE SET " + ", ".join(
+            f"{c} = excluded.{c}" for c in update_columns
+        )
+    else:
+        on_conflict = "DO NOTHING"
+
+    ## "WHERE true" keeps SQLite from parsing ON CONFLICT as a join constraint
+    return (
+        f"INSERT INTO main.{name} ({column_list}) "
+        f"SELECT {column_list} FROM shard.{name} WHERE true "
+        f"ON CONFLICT ({', '.join(pk_columns)}) {on_conflict}"
+    )
+
+
+class ShardedWriter:
+    """Route queued records to one DatabaseWriter per shard.
+
+    Each shard's writer thread commits independently, so shards are written
+    in parallel. Use like a DatabaseWriter: put(), flush(), close(), or as a
+    context manager.
+    """
+
+    def __init__(
+        self,
+        shards: ShardedSQLite = None,
+        handler: Callable[[Session, list[Any]], Any] = None,
+        key: Callable[[Any], int] = None,
+        **writer_kwargs,
+    ) -> None:
+        if shards is None:
+            raise ValueError("Missing ShardedSQLite to write to.")
+
+        self.shards = shards
+        self.key = key or (lambda record: record.tmdb_id)
+        self.writers: list[DatabaseWriter] = [
+            DatabaseWriter(
+                session_factory=session_factory,
+                handler=handler,
+                name=f"shard-writer-{i}",
+                **writer_kwargs,
+            )
+            for i, session_factory in enumerate(shards.session_factories)
+        ]
+
+    def put(self, record: Any = None, block: bool = True, timeout: float = None) -> None:
+        index = self.shards.shard_for(self.key(record))
+        self.writers[index].put(record, block=block, timeout=timeout)
+
+    def flush(self, timeout: float = None) -> None:
+        for writer in self.writers:
+            writer.flush(timeout=timeout)
+
+    def close(self) -> None:
+        for writer in self.writers:
+            writer.close()
+
+    def stats(self) -> list[dict]:
+        return [writer.stats() for writer in self.writers]
+
+    def __enter__(self) -> ShardedWriter:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,248 @@
+"""SQLite performance profiles.
+
+SQLite's defaults (rollback journal, synchronous=FULL, ~2MB page cache) fsync
+on every commit and re-read pages from disk constantly. A SQLiteProfile holds
+PRAGMA settings that are applied to every new DBAPI connection through a
+SQLAlchemy "connect" event listener, so every pooled connection is tuned the
+same way.
+
+Presets:
+    - default: WAL journal, synchronous=NORMAL. Safe against corruption, and
+        commits no longer fsync (a power loss can lose the last transactions).
+    - bulk_load: synchronous=OFF and a large cache for one-off ingestion. Pair
+        with deferred_indexes() to build secondary indexes after the load.
+    - read_serving: large page cache and mmap for read-heavy API serving.
+
+Docs:
+https://www.sqlite.org/pragma.html
+https://docs.sqlalchemy.org/en/20/dialects/sqlite.html#foreign-key-support
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, Union
+
+import sqlalchemy as sa
+
+valid_journal_modes: list[str] = ["DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"]
+valid_synchronous: list[str] = ["OFF", "NORMAL", "FULL", "EXTRA"]
+valid_temp_stores: list[str] = ["DEFAULT", "FILE", "MEMORY"]
+
+
+@dataclass
+class SQLiteProfile:
+    """PRAGMA settings applied to each new SQLite connection.
+
+    Fields left as None are not set, leaving SQLite's default in place.
+
+    cache_size follows SQLite's convention: a negative number is a size in KiB,
+    a positive number is a count of pages.
+    """
+
+    journal_mode: Optional[str] = field(default="WAL")
+    synchronous: Optional[str] = field(default="NORMAL")
+    ## 64MB page cache
+    cache_size: Optional[int] = field(default=-64_000)
+    ## 256MB memory-mapped I/O
+    mmap_size: Optional[int] = field(default=268_435_456)
+    temp_store: Optional[str] = field(default="MEMORY")
+    ## Milliseconds to wait on a locked database before raising "database is locked"
+    busy_timeout: Optional[int] = field(default=5_000)
+    foreign_keys: Optional[bool] = field(default=None)
+
+    def __post_init__(self):
+        if self.journal_mode:
+            self.journal_mode = self.journal_mode.upper()
+
+            if self.journal_mode not in valid_journal_modes:
+                raise ValueError(
+                    f"Invalid journal_mode: {self.journal_mode}. Must be one of: {valid_journal_modes}"
+                )
+
+        if self.synchronous:
+            self.synchronous = self.synchronous.upper()
+
+            if self.synchronous not in valid_synchronous:
+                raise ValueError(
+                    f"Invalid synchronous: {self.synchronous}. Must be one of: {valid_synchronous}"
+                )
+
+        if self.temp_store:
+            self.temp_store = self.temp_store.upper()
+
+            if self.temp_store not in valid_temp_stores:
+                raise ValueError(
+                    f"Invalid temp_store: {self.temp_store}. Must be one of: {valid_temp_stores}"
+                )
+
+        for name in ["cache_size", "mmap_size", "busy_timeout"]:
+            value = getattr(self, name)
+
+            if value is not None and not isinstance(value, int):
+                raise TypeError(
+                    f"{name} should be of type int, not {type(value).__name__}"
+                )
+
+        if self.mmap_size is not None and self.mmap_size < 0:
+            raise ValueError("mmap_size must be 0 or greater")
+
+        if self.busy_timeout is not None and self.busy_timeout < 0:
+            raise ValueError("busy_timeout must be 0 or greater")
+
+    @property
+    def pragmas(self) -> list[str]:
+        """Return the PRAGMA statements for this profile, in execution order."""
+        _pragmas: list[str] = []
+
+        ## busy_timeout first, so the journal_mode switch waits on a locked file
+        if self.busy_timeout is not None:
+            _pragmas.append(f"PRAGMA busy_timeout={self.busy_timeout}")
+
+        if self.journal_mode:
+            _pragmas.append(f"PRAGMA journal_mode={self.journal_mode}")
+
+        if self.synchronous:
+            _pragmas.append(f"PRAGMA synchronous={self.synchronous}")
+
+        if self.cache_size is not None:
+            _pragmas.append(f"PRAGMA cache_size={self.cache_size}")
+
+        if self.mmap_size is not None:
+            _pragmas.append(f"PRAGMA mmap_size={self.mmap_size}")
+
+        if self.temp_store:
+            _pragmas.append(f"PRAGMA temp_store={self.temp_store}")
+
+        if self.foreign_keys is not None:
+            _pragmas.append(f"PRAGMA foreign_keys={'ON' if self.foreign_keys else 'OFF'}")
+
+        return _pragmas
+
+
+## Presets
+default_profile: SQLiteProfile = SQLiteProfile()
+
+bulk_load_profile: SQLiteProfile = SQLiteProfile(
+    synchronous="OFF",
+    ## 256MB page cache
+    cache_size=-256_000,
+    busy_timeout=30_000,
+)
+
+read_serving_profile: SQLiteProfile = SQLiteProfile(
+    ## 128MB page cache
+    cache_size=-128_000,
+    ## 1GB memory-mapped I/O
+    mmap_size=1_073_741_824,
+)
+
+sqlite_profiles: dict[str, SQLiteProfile] = {
+    "default": default_profile,
+    "bulk_load": bulk_load_profile,
+    "read_serving": read_serving_profile,
+}
+
+
+def get_sqlite_profile(profile: Union[SQLiteProfile, str] = None) -> SQLiteProfile:
+    """Return a SQLiteProfile, looking up preset names like "bulk_load"."""
+    if isinstance(profile, SQLiteProfile):
+        return profile
+
+    if profile not in sqlite_profiles:
+        raise ValueError(
+            f"Invalid SQLite profile: {profile}. Must be a SQLiteProfile or one of: {list(sqlite_profiles)}"
+        )
+
+    return sqlite_profiles[profile]
+
+
+def apply_sqlite_profile(
+    engine: sa.Engine = None, profile: Union[SQLiteProfile, str] = default_profile
+) -> None:
+    """Run a profile's PRAGMAs on every new connection the engine opens."""
+    if not engine:
+        raise ValueError("Missing a SQLAlchemy engine object.")
+
+    if engine.dialect.name != "sqlite":
+        raise ValueError(
+            f"SQLite profiles only apply to SQLite engines, not '{engine.dialect.name}'"
+        )
+
+    pragmas = get_sqlite_profile(profile).pragmas
+
+    @sa.event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def get_secondary_indexes(
+    metadata_obj: sa.MetaData = None, tables: list[str] = None
+) -> list[sa.Index]:
+    """Return non-unique indexes declared on a MetaData object's tables.
+
+    Unique indexes are left out; upserts depend on them to detect conflicts.
+    """
+    if not isinstance(metadata_obj, sa.MetaData):
+        raise ValueError("Missing a SQLAlchemy MetaData object.")
+
+    indexes: list[sa.Index] = []
+
+    for table in metadata_obj.sorted_tables:
+        if tables and table.name not in tables:
+            continue
+
+        indexes.extend(index for index in table.indexes if not index.unique)
+
+    return indexes
+
+
+@contextmanager
+def deferred_indexes(
+    engine: sa.Engine = None,
+    metadata_obj: sa.MetaData = None,
+    tables: list[str] = None,
+    analyze: bool = True,
+) -> Iterator[list[sa.Index]]:
+    """Drop secondary indexes for the duration of a bulk load, then rebuild them.
+
+    Maintaining a B-tree index on every insert costs far more than building it
+    once over the loaded data. Indexes are rebuilt even if the load raises,
+    and the query planner statistics are refreshed with ANALYZE afterwards.
+
+    Usage:
+
+    engine = get_engine(connection="db/demo.sqlite", sqlite_profile="bulk_load")
+
+    with deferred_indexes(engine=engine, metadata_obj=Base.metadata):
+        with SessionLocal() as session:
+            upsert_tv_shows(session=session, shows=shows)
+            session.commit()
+    """
+    if not engine:
+        raise ValueError("Missing a SQLAlchemy engine object.")
+
+    indexes = get_secondary_indexes(metadata_obj=metadata_obj, tables=tables)
+
+    with engine.begin() as conn:
+        for index in indexes:
+            index.drop(bind=conn, checkfirst=True)
+
+    try:
+        yield indexes
+    finally:
+        with engine.begin() as conn:
+            for index in indexes:
+                index.create(bind=conn, checkfirst=True)
+
+            if analyze and engine.dialect.name == "sqlite":
+                conn.exec_driver_sql("ANALYZE")
+            elif analyze and engine.dialect.name == "postgresql":
+                for table in {index.table.name for index in indexes}:
+                    conn.exec_driver_sql(f'ANALYZE "{table}"')
@@ -0,0 +1,203 @@
+"""Bulk INSERT ... ON CONFLICT (upsert) for SQLAlchemy tables.
+
+Adding ORM objects one at a time with session.add()/session.merge() issues a
+SELECT and an INSERT or UPDATE per object. bulk_upsert() instead builds a
+single dialect-specific INSERT ... ON CONFLICT statement and executes it with
+a list of parameter dicts, which SQLAlchemy sends as batched multi-row
+INSERTs (executemany).
+
+Supported dialects:
+    - [x] SQLite (3.24+)
+    - [x] Postgres
+    - [ ] MSSQL (no ON CONFLICT; use MERGE)
+
+Docs:
+https://docs.sqlalchemy.org/en/20/dialects/sqlite.html#insert-on-conflict-upsert
+https://docs.sqlalchemy.org/en/20/dialects/postgresql.html#insert-on-conflict-upsert
+"""
+from __future__ import annotations
+
+from typing import Any, Iterator, Union
+
+import sqlalchemy as sa
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import DeclarativeBase, Session
+
+## Dialect name -> dialect-specific insert() construct
+upsert_dialects: dict[str, Any] = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+default_batch_size: int = 500
+
+
+def get_table(table: Union[sa.Table, type[DeclarativeBase]] = None) -> sa.Table:
+    """Return the Table for a Table or mapped class."""
+    if table is None:
+        raise ValueError("Missing a SQLAlchemy Table or mapped class.")
+
+    if isinstance(table, sa.Table):
+        return table
+
+    if hasattr(table, "__table__"):
+        return table.__table__
+
+    raise ValueError(
+        f"Expected a Table or mapped class, not object of type '{type(table).__name__}'"
+    )
+
+
+def iter_batches(
+    rows: list[Any] = None, batch_size: int = default_batch_size
+) -> Iterator[list[Any]]:
+    """Yield successive slices of rows, each at most batch_size long."""
+    if batch_size < 1:
+        raise ValueError("batch_size must be 1 or greater")
+
+    for i in range(0, len(rows), batch_size):
+        yield rows[i : i + batch_size]
+
+
+def normalize_rows(rows: list[dict[str, Any]] = None) -> list[dict[str, Any]]:
+    """Ensure every row has the same keys.
+
+    executemany requires identical parameter sets. Keys missing from a row
+    are filled with None.
+    """
+    keys: dict[str, None] = {}
+
+    for row in rows:
+        keys.update(dict.fromkeys(row))
+
+    return [{k: row.get(k) for k in keys} for row in rows]
+
+
+def build_upsert_stmt(
+    table: Union[sa.Table, type[DeclarativeBase]] = None,
+    dialect_name: str = None,
+    columns: list[str] = None,
+    index_elements: list[str] = None,
+    update_columns: list[str] = None,
+    coalesce: bool = False,
+):
+    """Build a dialect-specific INSERT ... ON CONFLICT statement.
+
+    Params:
+        table: Table or mapped class to insert into.
+        dialect_name: Name of the engine's dialect, i.e. engine.dialect.name.
+        columns: Columns present in the rows being inserted.
+        index_elements: Columns of the unique constraint to detect conflicts on.
+            Defaults to the table's primary key.
+        update_columns: Columns to overwrite on conflict. Defaults to every
+            inserted column not in index_elements. Pass an empty list to
+            DO NOTHING on conflict.
+        coalesce: When True, a NULL in the new row keeps the stored value, i.e.
+            SET col = COALESCE(excluded.col, table.col). Use this when upserting
+            partial records (like a /popular page) over full ones.
+    """
+    _table = get_table(table)
+
+    if dialect_name not in upsert_dialects:
+        raise ValueError(
+            f"Unsupported dialect for upsert: {dialect_name}. Must be one of: {list(upsert_dialects)}"
+        )
+
+    if not index_elements:
+        index_elements = [c.name for c in _table.primary_key.columns]
+
+    if update_columns is None:
+        update_columns = [c for c in columns or [] if c not in index_elements]
+
+    stmt = upsert_dialects[dialect_name](_table)
+
+    if not update_columns:
+        return stmt.on_conflict_do_nothing(index_elements=index_elements)
+
+    if coalesce:
+        set_ = {
+            c: sa.func.coalesce(stmt.excluded[c], _table.c[c]) for c in update_columns
+        }
+    else:
+        set_ = {c: stmt.excluded[c] for c in update_columns}
+
+    return stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+
+
+def bulk_upsert(
+    session: Session = None,
+    table: Union[sa.Table, type[DeclarativeBase]] = None,
+    rows: list[dict[str, Any]] = None,
+    index_elements: list[str] = None,
+    update_columns: list[str] = None,
+    coalesce: bool = False,
+    batch_size: int = default_batch_size,
+) -> int:
+    """Insert rows, updating existing rows on conflict. Returns the number of rows sent.
+
+    Rows are plain dicts keyed by column name. They are sent in executemany
+    batches of batch_size. The caller owns the transaction; commit the session
+    after calling this function.
+
+    See build_upsert_stmt() for index_elements, update_columns and coalesce.
+    """
+    if session is None:
+        raise ValueError("Missing a SQLAlchemy Session.")
+
+    if not rows:
+        return 0
+
+    rows = normalize_rows(rows)
+
+    stmt = build_upsert_stmt(
+        table=table,
+        dialect_name=session.get_bind().dialect.name,
+        columns=list(rows[0].keys()),
+        index_elements=index_elements,
+        update_columns=update_columns,
+        coalesce=coalesce,
+    )
+
+    for batch in iter_batches(rows, batch_size=batch_size):
+        session.execute(stmt, batch)
+
+    return len(rows)
+
+
+async def async_bulk_upsert(
+    session: AsyncSession = None,
+    table: Union[sa.Table, type[DeclarativeBase]] = None,
+    rows: list[dict[str, Any]] = None,
+    index_elements: list[str] = None,
+    update_columns: list[str] = None,
+    coalesce: bool = False,
+    batch_size: int = default_batch_size,
+) -> int:
+    """Async counterpart to bulk_upsert(), for an AsyncSession.
+
+    Each batch is awaited, so other tasks on the event loop (i.e. fetches)
+    keep running while the database works.
+    """
+    if session is None:
+        raise ValueError("Missing a SQLAlchemy AsyncSession.")
+
+    if not rows:
+        return 0
+
+    rows = normalize_rows(rows)
+
+    stmt = build_upsert_stmt(
+        table=table,
+        dialect_name=session.get_bind().dialect.name,
+        columns=list(rows[0].keys()),
+        index_elements=index_elements,
+        update_columns=update_columns,
+        coalesce=coalesce,
+    )
+
+    for batch in iter_batches(rows, batch_size=batch_size):
+        await session.execute(stmt, batch)
+
+    return len(rows)
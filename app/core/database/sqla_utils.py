@@ -1,11 +1,13 @@
 """Custom functions/utilities for SQLAlchemy.
 
 Includes functions to print SQLAlchemy table creation SQL statements,
-as well as a MetaData object's table data.
+as well as a MetaData object's table data, and a query counter for catching
+N+1 query patterns.
 """
 from __future__ import annotations
 
-from typing import Any
+from contextlib import contextmanager
+from typing import Any, Iterator
 
 import sqlalchemy as sa
 
@@ -69,3 +71,31 @@ def create_metadata(metadata_obj: sa.MetaData = None, engine: sa.Engine = None)
         metadata_obj.create_all(engine)
     except Exception as exc:
         raise Exception(f"Error creating table metadata. Details: {exc}")
+
+
+@contextmanager
+def count_queries(engine: sa.Engine = None) -> Iterator[list[str]]:
+    """Record every SQL statement executed on engine inside the block.
+
+    Yields a list that fills with statement strings, so len() is the query
+    count. Use it to check a code path issues a fixed number of queries:
+
+    with count_queries(engine) as queries:
+        repo.list(page_size=100)
+
+    assert len(queries) == 2
+    """
+    if not engine:
+        raise ValueError("Missing a SQLAlchemy engine object.")
+
+    queries: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany) -> None:
+        queries.append(statement)
+
+    sa.event.listen(engine, "before_cursor_execute", _record)
+
+    try:
+        yield queries
+    finally:
+        sa.event.remove(engine, "before_cursor_execute", _record)
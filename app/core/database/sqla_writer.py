@@ -0,0 +1,82 @@
+"""Single-writer database persistence.
+
+SQLite allows one writer at a time, and a commit per record spends most of
+its time waiting on the journal. DatabaseWriter runs one dedicated writer
+thread that pulls records off a bounded queue and commits them in batches,
+either every batch_size records or every flush_interval seconds, whichever
+comes first.
+
+Any number of fetch workers can call .put() concurrently. They only touch
+the queue, so they never wait on SQLite's write lock. When the queue is full,
+.put() blocks until the writer catches up.
+
+Usage:
+
+SessionLocal = get_session(engine=engine)
+
+with DatabaseWriter(
+    session_factory=SessionLocal,
+    handler=lambda session, records: upsert_tv_shows(session=session, shows=records),
+) as writer:
+    for show in shows:
+        writer.put(show)
+
+log.info(writer.stats())
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Optional
+
+from sqlalchemy.orm import Session, sessionmaker
+from utils.batch_writer import BaseBatchWriter
+
+class DatabaseWriter(BaseBatchWriter):
+    """Commit queued records in batches from a single background thread.
+
+    Params:
+        session_factory: A sessionmaker, i.e. from core.db.get_session().
+        handler: Callable writing a batch, called as handler(session, records).
+            It should not commit; the writer commits once per batch, and rolls
+            back the whole batch if the handler raises.
+        batch_size: Maximum records per transaction.
+        flush_interval: Maximum seconds to wait for a batch to fill.
+        max_queue_size: Bound on queued records. put() blocks when full.
+        on_batch: Optional callback, called as on_batch(item_count, latency_seconds).
+        name: Name of the writer thread.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker[Session] = None,
+        handler: Callable[[Session, list[Any]], Any] = None,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        max_queue_size: int = 10_000,
+        on_batch: Optional[Callable[[int, float], None]] = None,
+        name: str = "db-writer",
+    ) -> None:
+        if session_factory is None:
+            raise ValueError("Missing a sessionmaker to write with.")
+
+        if handler is None:
+            raise ValueError("Missing a handler function to write batches with.")
+
+        super().__init__(
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            max_queue_size=max_queue_size,
+            on_batch=on_batch,
+            name=name,
+        )
+
+        self.session_factory = session_factory
+        self.handler = handler
+
+    def write_batch(self, batch: list[Any]) -> None:
+        with self.session_factory() as session:
+            try:
+                self.handler(session, batch)
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
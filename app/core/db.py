@@ -7,7 +7,8 @@ other projects utilizing SQLAlchemy for database operations.
 
 The default engine and session are customizable using the get_engine() and get_session()
 functions. These functions can be imported & called from another app, with customized
-values to control engine & session behavior.
+values to control engine & session behavior. get_async_engine() and get_async_session()
+are asyncio equivalents, built from the same connection dataclasses.
 
 Currently supported databases:
     - [x] SQLite
@@ -22,7 +23,8 @@ create/import an engine, and immediately run the metadata create function.
 """
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
 from pathlib import Path
 from typing import Union
 
@@ -35,6 +37,13 @@ from core.database.sqla_connection_models import (
     saPGConnection,
     saSQLiteConnection,
 )
+
+## Import SQLite PRAGMA profiles
+from core.database.sqla_sqlite_profile import (
+    SQLiteProfile,
+    apply_sqlite_profile,
+    get_sqlite_profile,
+)
 import sqlalchemy as sa
 
 from sqlalchemy import (
@@ -42,6 +51,13 @@ from sqlalchemy import (
     orm as sa_orm,
 )
 
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
 ## Import SQLAlchemy exceptions
 from sqlalchemy.exc import DBAPIError, OperationalError
 from sqlalchemy.orm import Session, sessionmaker
@@ -94,25 +110,14 @@ default_sqlite_conn: saSQLiteConnection = saSQLiteConnection(database="test.sqli
 # default_mssql_conn: saMSSQLConnection = saMSSQLConnection()
 
 
-def get_engine(
-    connection: Union[saSQLiteConnection, saPGConnection, str] = default_sqlite_conn,
+def prepare_connection(
+    connection: Union[saSQLiteConnection, saPGConnection, str] = None,
     db_type: str = "sqlite",
-    echo: bool = False,
-    pool_pre_ping: bool = False,
-) -> sa.Engine:
-    """Return a SQLAlchemy Engine object.
-
-    https://docs.sqlalchemy.org/en/20/tutorial/engine.html
-
-    To use a database other than SQLite, i.e. Postgres or MySQL, pass
-    the lowercase string name of the database.
+) -> tuple[Union[saSQLiteConnection, saPGConnection], str]:
+    """Validate connection & db_type inputs shared by get_engine() and get_async_engine().
 
-    Currently supported:
-        - [x] SQLite
-        - [x] Postgres
-        - [ ] MySQL
-        - [x] MSSQL
-        - [ ] Azure Cosmos
+    Converts a SQLite path string to a saSQLiteConnection, and ensures the
+    path to a SQLite database file exists. Returns (connection, db_type).
     """
     if not connection:
         raise ValueError("Missing connection object/string.")
@@ -144,11 +149,65 @@ def get_engine(
     if db_type == "mssql":
         pass
 
+    return connection, db_type
+
+
+def get_connection_profile(
+    connection: Union[saSQLiteConnection, saPGConnection] = None,
+    sqlite_profile: Union[SQLiteProfile, str] = "default",
+) -> SQLiteProfile:
+    """Return the SQLiteProfile to apply to a SQLite connection."""
+    _profile: SQLiteProfile = get_sqlite_profile(sqlite_profile)
+
+    if getattr(connection, "read_only", False):
+        ## A read-only connection cannot change the journal mode
+        _profile = replace(_profile, journal_mode=None)
+
+    return _profile
+
+
+def get_engine(
+    connection: Union[saSQLiteConnection, saPGConnection, str] = default_sqlite_conn,
+    db_type: str = "sqlite",
+    echo: bool = False,
+    pool_pre_ping: bool = False,
+    sqlite_profile: Union[SQLiteProfile, str, None] = "default",
+) -> sa.Engine:
+    """Return a SQLAlchemy Engine object.
+
+    https://docs.sqlalchemy.org/en/20/tutorial/engine.html
+
+    To use a database other than SQLite, i.e. Postgres or MySQL, pass
+    the lowercase string name of the database.
+
+    SQLite engines apply a PRAGMA profile (WAL journal, synchronous=NORMAL, etc.)
+    to every new connection. Pass a SQLiteProfile or a preset name ("default",
+    "bulk_load", "read_serving") to change it, or None to keep SQLite's defaults.
+    See core.database.sqla_sqlite_profile.
+
+    Currently supported:
+        - [x] SQLite
+        - [x] Postgres
+        - [ ] MySQL
+        - [x] MSSQL
+        - [ ] Azure Cosmos
+    """
+    connection, db_type = prepare_connection(connection=connection, db_type=db_type)
+
     try:
         engine = create_engine(
-            connection.connection_string, echo=echo, pool_pre_ping=pool_pre_ping
+            connection.connection_string,
+            echo=echo,
+            pool_pre_ping=pool_pre_ping,
+            **connection.engine_kwargs,
         )
 
+        if db_type == "sqlite" and sqlite_profile:
+            apply_sqlite_profile(
+                engine=engine,
+                profile=get_connection_profile(connection, sqlite_profile),
+            )
+
         return engine
 
     except OperationalError as op_exc:
@@ -160,8 +219,51 @@ def get_engine(
         raise Exception(f"Unhandled exception creating database engine. Details: {exc}")
 
 
-## Create a default engine
-default_engine: sa.Engine = get_engine()
+def get_async_engine(
+    connection: Union[saSQLiteConnection, saPGConnection, str] = default_sqlite_conn,
+    db_type: str = "sqlite",
+    echo: bool = False,
+    pool_pre_ping: bool = False,
+    sqlite_profile: Union[SQLiteProfile, str, None] = "default",
+) -> AsyncEngine:
+    """Return a SQLAlchemy AsyncEngine object.
+
+    Async counterpart to get_engine(), built from the same connection dataclasses.
+    The sync driver is swapped for its asyncio equivalent (aiosqlite for SQLite,
+    asyncpg for Postgres). Requires the "async" optional dependencies.
+
+    https://docs.sqlalchemy.org/en/20/orm/extensions/asyncio.html
+
+    Currently supported:
+        - [x] SQLite
+        - [x] Postgres
+        - [ ] MySQL
+        - [ ] MSSQL
+        - [ ] Azure Cosmos
+    """
+    connection, db_type = prepare_connection(connection=connection, db_type=db_type)
+
+    try:
+        engine = create_async_engine(
+            connection.async_connection_string,
+            echo=echo,
+            pool_pre_ping=pool_pre_ping,
+            **connection.engine_kwargs,
+        )
+
+        if db_type == "sqlite" and sqlite_profile:
+            ## PRAGMAs run through the sync engine's connect event
+            apply_sqlite_profile(
+                engine=engine.sync_engine,
+                profile=get_connection_profile(connection, sqlite_profile),
+            )
+
+        return engine
+
+    except Exception as exc:
+        raise Exception(
+            f"Unhandled exception creating async database engine. Details: {exc}"
+        )
 
 
 def get_session(
@@ -191,5 +293,145 @@ def get_session(
         return _sess
 
 
-## Default database session object
-DefaultSession: sessionmaker[Session] = get_session()
+class RoutingSession(Session):
+    """Session that sends writes to a writer engine and reads to a reader engine.
+
+    INSERT/UPDATE/DELETE statements and ORM flushes go to writer_engine.
+    Everything else (SELECTs, session.get(), lazy loads) goes to reader_engine,
+    i.e. a read-only SQLite engine on the same file, or a Postgres replica.
+
+    Reads on the reader may not see this session's uncommitted writes (or,
+    with a replica, writes that haven't replicated yet). Call use_writer() to
+    route everything to the writer for the rest of the session.
+
+    Raw text() statements are routed as reads. Run raw writes with use_writer().
+
+    https://docs.sqlalchemy.org/en/20/orm/persistence_techniques.html#custom-vertical-partitioning
+    """
+
+    def __init__(
+        self,
+        *args,
+        writer_engine: sa.Engine = None,
+        reader_engine: sa.Engine = None,
+        **kwargs,
+    ) -> None:
+        if writer_engine is None:
+            raise ValueError("Missing a writer engine.")
+
+        super().__init__(*args, **kwargs)
+
+        self.writer_engine = writer_engine
+        self.reader_engine = reader_engine or writer_engine
+        self._force_writer: bool = False
+
+    def use_writer(self) -> RoutingSession:
+        """Route every statement on this session to the writer engine."""
+        self._force_writer = True
+
+        return self
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._force_writer or self._flushing:
+            return self.writer_engine
+
+        if isinstance(clause, (sa.Insert, sa.Update, sa.Delete)):
+            return self.writer_engine
+
+        return self.reader_engine
+
+
+def get_routing_session(
+    writer_engine: sa.Engine = None,
+    reader_engine: sa.Engine = None,
+    autoflush: bool = False,
+    expire_on_commit: bool = False,
+) -> sessionmaker[RoutingSession]:
+    """Return a sessionmaker for RoutingSessions.
+
+    Usage:
+
+    writer = get_engine(connection=saSQLiteConnection(database="db/demo.sqlite"))
+    reader = get_engine(
+        connection=saSQLiteConnection(database="db/demo.sqlite", read_only=True),
+        sqlite_profile="read_serving",
+    )
+    SessionLocal = get_routing_session(writer_engine=writer, reader_engine=reader)
+    """
+    if writer_engine is None:
+        raise ValueError("Missing a writer engine.")
+
+    try:
+        _sess = sessionmaker(
+            autoflush=autoflush,
+            expire_on_commit=expire_on_commit,
+            class_=RoutingSession,
+            writer_engine=writer_engine,
+            reader_engine=reader_engine,
+        )
+    except Exception as exc:
+        raise Exception(
+            f"Unhandled exception creating a routing sessionmaker. Details: {exc}"
+        )
+
+    return _sess
+
+
+def get_async_session(
+    engine: AsyncEngine = None,
+    autoflush: bool = False,
+    expire_on_commit: bool = False,
+    class_=AsyncSession,
+) -> async_sessionmaker[AsyncSession]:
+    """Define factory function for creating SQLAlchemy AsyncSessions.
+
+    Async counterpart to get_session(). Usage:
+
+    AsyncSessionLocal = get_async_session(engine=get_async_engine())
+
+    async with AsyncSessionLocal() as session:
+        ...
+        await session.commit()
+    """
+    try:
+        _sess = async_sessionmaker(
+            bind=engine,
+            autoflush=autoflush,
+            expire_on_commit=expire_on_commit,
+            class_=class_,
+        )
+    except Exception as exc:
+        raise Exception(
+            f"Unhandled exception creating an async_sessionmaker AsyncSession. Details: {exc}"
+        )
+
+    return _sess
+
+
+## The default engine & session are created on first use, not at import time.
+#  Creating an engine at import would create the default SQLite database on disk
+#  for every script that imports this module.
+@lru_cache(maxsize=None)
+def get_default_engine() -> sa.Engine:
+    """Return the default engine, creating it on first call."""
+    return get_engine()
+
+
+@lru_cache(maxsize=None)
+def get_default_session() -> sessionmaker[Session]:
+    """Return a sessionmaker bound to the default engine, creating it on first call."""
+    return get_session(engine=get_default_engine())
+
+
+_lazy_defaults = {
+    "default_engine": get_default_engine,
+    "DefaultSession": get_default_session,
+}
+
+
+def __getattr__(name: str):
+    """Resolve default_engine & DefaultSession on first access (PEP 562)."""
+    if name in _lazy_defaults:
+        return _lazy_defaults[name]()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,382 @@
+"""Bulk persistence for TMDB media.
+
+Converts parsed Pydantic schemas (domain.schemas.tmdb.tmdb_media_schemas) into
+row dicts and writes them with core.database.sqla_upsert.bulk_upsert(), one
+executemany batch per table instead of one session.add() per object.
+
+Shows/movies are upserted with coalesce=True, so a partial record (i.e. an
+item on a /popular page) never blanks out fields a previous detail fetch
+stored. Association rows (genres, networks, creators) are replaced for a show
+only when the incoming record carries that list.
+
+Usage:
+
+with SessionLocal() as session:
+    upsert_tv_shows(session=session, shows=pop_tv.results)
+    session.commit()
+
+For many concurrent producers, get_tv_show_writer()/get_movie_writer() return
+a DatabaseWriter that commits queued records in batches from one thread.
+
+The async_* variants take an AsyncSession and run the same upsert logic
+through AsyncSession.run_sync(), so it is not duplicated.
+"""
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from core.database.sqla_upsert import bulk_upsert, default_batch_size, iter_batches
+from core.database.sqla_writer import DatabaseWriter
+import sqlalchemy as sa
+
+from domain.models.tmdb.tmdb_media_models import (
+    Creator,
+    Genre,
+    Movie,
+    Network,
+    TVSeason,
+    TVShow,
+    movie_genres,
+    tv_show_creators,
+    tv_show_genres,
+    tv_show_networks,
+)
+from domain.schemas.tmdb.tmdb_media_schemas import MediaMovie, MediaTVShow
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+
+tv_show_columns: list[str] = [c.name for c in TVShow.__table__.columns]
+tv_season_columns: list[str] = [c.name for c in TVSeason.__table__.columns]
+movie_columns: list[str] = [c.name for c in Movie.__table__.columns]
+
+
+def schema_to_row(schema_obj: Any = None, columns: list[str] = None) -> dict[str, Any]:
+    """Pick the attributes matching a table's columns from a Pydantic schema object."""
+    if schema_obj is None:
+        raise ValueError("Missing schema object to convert")
+
+    return {c: getattr(schema_obj, c, None) for c in columns}
+
+
+def _genre_ids(media: Any = None) -> list[int]:
+    """Return a media item's genre IDs, from genres (detail) or genre_ids (list pages)."""
+    if media.genres is not None:
+        return [g.id for g in media.genres if g.id is not None]
+
+    return [g for g in media.genre_ids or [] if g is not None]
+
+
+def replace_associations(
+    session: Session = None,
+    table: sa.Table = None,
+    owner_column: str = None,
+    related_column: str = None,
+    pairs: dict[int, list[int]] = None,
+    batch_size: int = default_batch_size,
+) -> None:
+    """Replace association rows for each owner ID in pairs.
+
+    Existing rows for the owners are deleted in batches, then the new pairs
+    are inserted with a single executemany.
+    """
+    if not pairs:
+        return
+
+    owner_ids = list(pairs.keys())
+
+    for batch in iter_batches(owner_ids, batch_size=batch_size):
+        session.execute(sa.delete(table).where(table.c[owner_column].in_(batch)))
+
+    rows = [
+        {owner_column: owner_id, related_column: related_id}
+        for owner_id, related_ids in pairs.items()
+        for related_id in dict.fromkeys(related_ids)
+    ]
+
+    bulk_upsert(
+        session=session,
+        table=table,
+        rows=rows,
+        update_columns=[],
+        batch_size=batch_size,
+    )
+
+
+def upsert_genres(
+    session: Session = None,
+    media: Iterable[Any] = None,
+    batch_size: int = default_batch_size,
+) -> None:
+    """Upsert genres referenced by media items.
+
+    Named genres (from detail responses) update the stored name. Bare genre IDs
+    (from list pages) are only inserted if missing, so association rows always
+    have a genre to point at.
+    """
+    named: dict[int, dict] = {}
+    bare: dict[int, dict] = {}
+
+    for item in media:
+        for genre in item.genres or []:
+            if genre.id is not None:
+                named[genre.id] = {"tmdb_id": genre.id, "name": genre.name}
+
+        for genre_id in item.genre_ids or []:
+            if genre_id is not None and genre_id not in named:
+                bare[genre_id] = {"tmdb_id": genre_id}
+
+    bulk_upsert(
+        session=session, table=Genre, rows=list(named.values()), batch_size=batch_size
+    )
+    bulk_upsert(
+        session=session,
+        table=Genre,
+        rows=[row for k, row in bare.items() if k not in named],
+        update_columns=[],
+        batch_size=batch_size,
+    )
+
+
+def upsert_tv_shows(
+    session: Session = None,
+    shows: Iterable[MediaTVShow] = None,
+    batch_size: int = default_batch_size,
+) -> int:
+    """Upsert TV shows and their genres, networks, creators and seasons.
+
+    Returns the number of shows written. The caller commits the session.
+    """
+    if session is None:
+        raise ValueError("Missing a SQLAlchemy Session.")
+
+    ## Last record wins if the same show appears twice
+    shows_by_id: dict[int, MediaTVShow] = {
+        show.tmdb_id: show for show in shows or [] if show.tmdb_id is not None
+    }
+
+    if not shows_by_id:
+        return 0
+
+    shows = list(shows_by_id.values())
+
+    network_rows: dict[int, dict] = {}
+    creator_rows: dict[int, dict] = {}
+    season_rows: list[dict] = []
+
+    genre_pairs: dict[int, list[int]] = {}
+    network_pairs: dict[int, list[int]] = {}
+    creator_pairs: dict[int, list[int]] = {}
+
+    for show in shows:
+        if show.genres is not None or show.genre_ids is not None:
+            genre_pairs[show.tmdb_id] = _genre_ids(show)
+
+        if show.networks is not None:
+            network_pairs[show.tmdb_id] = []
+
+            for network in show.networks:
+                if network.tmdb_id is None:
+                    continue
+
+                network_rows[network.tmdb_id] = {
+                    "tmdb_id": network.tmdb_id,
+                    "name": network.name,
+                    "logo_path": network.logo_path,
+                    "origin_country": network.origin_country,
+                }
+                network_pairs[show.tmdb_id].append(network.tmdb_id)
+
+        if show.created_by is not None:
+            creator_pairs[show.tmdb_id] = []
+
+            for creator in show.created_by:
+                if creator.id is None:
+                    continue
+
+                creator_rows[creator.id] = {
+                    "tmdb_id": creator.id,
+                    "credit_id": creator.credit_id,
+                    "name": creator.name,
+                    "gender": creator.gender,
+                    "profile_path": creator.profile_path,
+                }
+                creator_pairs[show.tmdb_id].append(creator.id)
+
+        for season in show.seasons or []:
+            if season.tmdb_id is None:
+                continue
+
+            row = schema_to_row(season, tv_season_columns)
+            row["tv_show_id"] = show.tmdb_id
+
+            season_rows.append(row)
+
+    ## Parents first, so association rows satisfy foreign keys
+    upsert_genres(session=session, media=shows, batch_size=batch_size)
+    bulk_upsert(
+        session=session,
+        table=Network,
+        rows=list(network_rows.values()),
+        batch_size=batch_size,
+    )
+    bulk_upsert(
+        session=session,
+        table=Creator,
+        rows=list(creator_rows.values()),
+        batch_size=batch_size,
+    )
+    bulk_upsert(
+        session=session,
+        table=TVShow,
+        rows=[schema_to_row(show, tv_show_columns) for show in shows],
+        coalesce=True,
+        batch_size=batch_size,
+    )
+    bulk_upsert(
+        session=session,
+        table=TVSeason,
+        rows=season_rows,
+        coalesce=True,
+        batch_size=batch_size,
+    )
+
+    replace_associations(
+        session=session,
+        table=tv_show_genres,
+        owner_column="tv_show_id",
+        related_column="genre_id",
+        pairs=genre_pairs,
+        batch_size=batch_size,
+    )
+    replace_associations(
+        session=session,
+        table=tv_show_networks,
+        owner_column="tv_show_id",
+        related_column="network_id",
+        pairs=network_pairs,
+        batch_size=batch_size,
+    )
+    replace_associations(
+        session=session,
+        table=tv_show_creators,
+        owner_column="tv_show_id",
+        related_column="creator_id",
+        pairs=creator_pairs,
+        batch_size=batch_size,
+    )
+
+    return len(shows)
+
+
+def upsert_movies(
+    session: Session = None,
+    movies: Iterable[MediaMovie] = None,
+    batch_size: int = default_batch_size,
+) -> int:
+    """Upsert movies and their genres.
+
+    Returns the number of movies written. The caller commits the session.
+    """
+    if session is None:
+        raise ValueError("Missing a SQLAlchemy Session.")
+
+    movies_by_id: dict[int, MediaMovie] = {
+        movie.tmdb_id: movie for movie in movies or [] if movie.tmdb_id is not None
+    }
+
+    if not movies_by_id:
+        return 0
+
+    movies = list(movies_by_id.values())
+
+    genre_pairs: dict[int, list[int]] = {
+        movie.tmdb_id: _genre_ids(movie)
+        for movie in movies
+        if movie.genres is not None or movie.genre_ids is not None
+    }
+
+    upsert_genres(session=session, media=movies, batch_size=batch_size)
+    bulk_upsert(
+        session=session,
+        table=Movie,
+        rows=[schema_to_row(movie, movie_columns) for movie in movies],
+        coalesce=True,
+        batch_size=batch_size,
+    )
+    replace_associations(
+        session=session,
+        table=movie_genres,
+        owner_column="movie_id",
+        related_column="genre_id",
+        pairs=genre_pairs,
+        batch_size=batch_size,
+    )
+
+    return len(movies)
+
+
+async def async_upsert_tv_shows(
+    session: AsyncSession = None,
+    shows: Iterable[MediaTVShow] = None,
+    batch_size: int = default_batch_size,
+) -> int:
+    """Async counterpart to upsert_tv_shows(). The caller awaits session.commit()."""
+    if session is None:
+        raise ValueError("Missing a SQLAlchemy AsyncSession.")
+
+    shows = list(shows or [])
+
+    return await session.run_sync(
+        lambda sync_session: upsert_tv_shows(
+            session=sync_session, shows=shows, batch_size=batch_size
+        )
+    )
+
+
+async def async_upsert_movies(
+    session: AsyncSession = None,
+    movies: Iterable[MediaMovie] = None,
+    batch_size: int = default_batch_size,
+) -> int:
+    """Async counterpart to upsert_movies(). The caller awaits session.commit()."""
+    if session is None:
+        raise ValueError("Missing a SQLAlchemy AsyncSession.")
+
+    movies = list(movies or [])
+
+    return await session.run_sync(
+        lambda sync_session: upsert_movies(
+            session=sync_session, movies=movies, batch_size=batch_size
+        )
+    )
+
+
+def get_tv_show_writer(
+    session_factory: sessionmaker[Session] = None, **writer_kwargs
+) -> DatabaseWriter:
+    """Return a DatabaseWriter that upserts queued MediaTVShow records.
+
+    writer_kwargs are passed to DatabaseWriter (batch_size, flush_interval, etc).
+    """
+    return DatabaseWriter(
+        session_factory=session_factory,
+        handler=lambda session, records: upsert_tv_shows(
+            session=session, shows=records
+        ),
+        name="tv-show-writer",
+        **writer_kwargs,
+    )
+
+
+def get_movie_writer(
+    session_factory: sessionmaker[Session] = None, **writer_kwargs
+) -> DatabaseWriter:
+    """Return a DatabaseWriter that upserts queued MediaMovie records."""
+    return DatabaseWriter(
+        session_factory=session_factory,
+        handler=lambda session, records: upsert_movies(
+            session=session, movies=records
+        ),
+        name="movie-writer",
+        **writer_kwargs,
+    )
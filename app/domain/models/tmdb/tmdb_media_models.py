@@ -0,0 +1,198 @@
+"""SQLAlchemy models for TMDB media.
+
+Tables are keyed on TMDB's own IDs (tmdb_id), so a record fetched twice maps
+to the same row and can be upserted with INSERT ... ON CONFLICT. See
+domain.models.tmdb.tmdb_media_crud for the bulk upsert functions.
+
+SyncState/SyncCheckpoint hold incremental sync bookkeeping (see
+utils.sync_utils): each record's last stored payload and its fingerprint, and
+the point in time each media type's changes feed was last consumed up to.
+
+Import this module before running create_base_metadata(), so the tables are
+registered on Base.metadata.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from core.database.sqla_base import Base
+import sqlalchemy as sa
+
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+## Association tables
+tv_show_genres = sa.Table(
+    "tv_show_genres",
+    Base.metadata,
+    sa.Column(
+        "tv_show_id",
+        sa.ForeignKey("tv_shows.tmdb_id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    sa.Column(
+        "genre_id", sa.ForeignKey("genres.tmdb_id", ondelete="CASCADE"), primary_key=True
+    ),
+)
+
+movie_genres = sa.Table(
+    "movie_genres",
+    Base.metadata,
+    sa.Column(
+        "movie_id", sa.ForeignKey("movies.tmdb_id", ondelete="CASCADE"), primary_key=True
+    ),
+    sa.Column(
+        "genre_id", sa.ForeignKey("genres.tmdb_id", ondelete="CASCADE"), primary_key=True
+    ),
+)
+
+tv_show_networks = sa.Table(
+    "tv_show_networks",
+    Base.metadata,
+    sa.Column(
+        "tv_show_id",
+        sa.ForeignKey("tv_shows.tmdb_id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    sa.Column(
+        "network_id",
+        sa.ForeignKey("networks.tmdb_id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+)
+
+tv_show_creators = sa.Table(
+    "tv_show_creators",
+    Base.metadata,
+    sa.Column(
+        "tv_show_id",
+        sa.ForeignKey("tv_shows.tmdb_id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    sa.Column(
+        "creator_id",
+        sa.ForeignKey("creators.tmdb_id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+)
+
+
+class Genre(Base):
+    __tablename__ = "genres"
+
+    tmdb_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    name: Mapped[Optional[str]] = mapped_column(sa.String(255))
+
+
+class Network(Base):
+    __tablename__ = "networks"
+
+    tmdb_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    name: Mapped[Optional[str]] = mapped_column(sa.String(255))
+    logo_path: Mapped[Optional[str]] = mapped_column(sa.String(255))
+    origin_country: Mapped[Optional[str]] = mapped_column(sa.String(8))
+
+
+class Creator(Base):
+    __tablename__ = "creators"
+
+    tmdb_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    credit_id: Mapped[Optional[str]] = mapped_column(sa.String(64))
+    name: Mapped[Optional[str]] = mapped_column(sa.String(255))
+    gender: Mapped[Optional[int]]
+    profile_path: Mapped[Optional[str]] = mapped_column(sa.String(255))
+
+
+class TVShow(Base):
+    __tablename__ = "tv_shows"
+
+    tmdb_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    name: Mapped[Optional[str]] = mapped_column(sa.String(255), index=True)
+    original_name: Mapped[Optional[str]] = mapped_column(sa.String(255))
+    overview: Mapped[Optional[str]] = mapped_column(sa.Text)
+    type: Mapped[Optional[str]] = mapped_column(sa.String(64))
+    adult: Mapped[Optional[bool]]
+    in_production: Mapped[Optional[bool]]
+    first_air_date: Mapped[Optional[str]] = mapped_column(sa.String(10))
+    last_air_date: Mapped[Optional[str]] = mapped_column(sa.String(10))
+    number_of_episodes: Mapped[Optional[int]]
+    number_of_seasons: Mapped[Optional[int]]
+    original_language: Mapped[Optional[str]] = mapped_column(sa.String(8))
+    popularity: Mapped[Optional[float]] = mapped_column(index=True)
+    vote_average: Mapped[Optional[float]]
+    vote_count: Mapped[Optional[int]]
+    homepage: Mapped[Optional[str]] = mapped_column(sa.String(512))
+    poster_path: Mapped[Optional[str]] = mapped_column(sa.String(255))
+    backdrop_path: Mapped[Optional[str]] = mapped_column(sa.String(255))
+
+    genres: Mapped[list[Genre]] = relationship(secondary=tv_show_genres)
+    networks: Mapped[list[Network]] = relationship(secondary=tv_show_networks)
+    creators: Mapped[list[Creator]] = relationship(secondary=tv_show_creators)
+    seasons: Mapped[list[TVSeason]] = relationship(
+        back_populates="tv_show",
+        order_by="TVSeason.season_number",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+
+class TVSeason(Base):
+    __tablename__ = "tv_seasons"
+
+    tmdb_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    tv_show_id: Mapped[int] = mapped_column(
+        sa.ForeignKey("tv_shows.tmdb_id", ondelete="CASCADE"), index=True
+    )
+    season_number: Mapped[Optional[int]]
+    name: Mapped[Optional[str]] = mapped_column(sa.String(255))
+    overview: Mapped[Optional[str]] = mapped_column(sa.Text)
+    air_date: Mapped[Optional[str]] = mapped_column(sa.String(10))
+    episode_count: Mapped[Optional[int]]
+    poster_path: Mapped[Optional[str]] = mapped_column(sa.String(255))
+    vote_average: Mapped[Optional[float]]
+
+    tv_show: Mapped[TVShow] = relationship(back_populates="seasons")
+
+
+class Movie(Base):
+    __tablename__ = "movies"
+
+    tmdb_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    title: Mapped[Optional[str]] = mapped_column(sa.String(255), index=True)
+    original_title: Mapped[Optional[str]] = mapped_column(sa.String(255))
+    overview: Mapped[Optional[str]] = mapped_column(sa.Text)
+    imdb_id: Mapped[Optional[str]] = mapped_column(sa.String(16))
+    adult: Mapped[Optional[bool]]
+    video: Mapped[Optional[bool]]
+    release_date: Mapped[Optional[str]] = mapped_column(sa.String(10))
+    runtime: Mapped[Optional[int]]
+    budget: Mapped[Optional[int]] = mapped_column(sa.BigInteger)
+    revenue: Mapped[Optional[int]] = mapped_column(sa.BigInteger)
+    original_language: Mapped[Optional[str]] = mapped_column(sa.String(8))
+    popularity: Mapped[Optional[float]] = mapped_column(index=True)
+    vote_average: Mapped[Optional[float]]
+    vote_count: Mapped[Optional[int]]
+    homepage: Mapped[Optional[str]] = mapped_column(sa.String(512))
+    poster_path: Mapped[Optional[str]] = mapped_column(sa.String(255))
+    backdrop_path: Mapped[Optional[str]] = mapped_column(sa.String(255))
+
+    genres: Mapped[list[Genre]] = relationship(secondary=movie_genres)
+
+
+class SyncState(Base):
+    __tablename__ = "sync_state"
+
+    ## TV and movie IDs overlap, so the media type is part of the key
+    media_type: Mapped[str] = mapped_column(sa.String(8), primary_key=True)
+    tmdb_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    content_hash: Mapped[str] = mapped_column(sa.String(64))
+    synced_at: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True))
+    ## msgpack of the full payload, so lookups can be served without a fetch
+    payload: Mapped[Optional[bytes]] = mapped_column(sa.LargeBinary)
+
+
+class SyncCheckpoint(Base):
+    __tablename__ = "sync_checkpoints"
+
+    media_type: Mapped[str] = mapped_column(sa.String(8), primary_key=True)
+    checkpoint_at: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True))
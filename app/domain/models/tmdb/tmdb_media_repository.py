@@ -0,0 +1,193 @@
+"""Read queries for TMDB media, with explicit relationship loading profiles.
+
+Touching show.genres, show.networks, etc. on a lazily loaded object issues a
+query per relationship per object, so rendering a page of 100 shows can cost
+hundreds of queries. The repositories here load relationships eagerly,
+according to a named profile:
+
+    list:   what a list page renders. Shows/movies with their genres.
+    detail: a single record's page. Adds networks and creators.
+    full:   everything stored, including seasons.
+
+Collections use selectinload (one extra SELECT ... WHERE id IN (...) per
+relationship per page), so the query count per page is constant no matter
+how many rows are on it. Many-to-one relationships use joinedload.
+
+With strict=True (the default), every relationship a profile does not load
+is set to raiseload, so a template touching an unloaded relationship raises
+instead of silently issuing a query.
+
+Usage:
+
+with SessionLocal() as session:
+    shows = TVShowRepository(session).list(page=1, page_size=50)
+    show = TVShowRepository(session).get(1399, profile="full")
+"""
+from __future__ import annotations
+
+from typing import Any, Generic, Iterable, Optional, TypeVar
+
+import sqlalchemy as sa
+
+from domain.models.tmdb.tmdb_media_models import Movie, TVSeason, TVShow
+from sqlalchemy.orm import Session, joinedload, raiseload, selectinload
+
+T = TypeVar("T")
+
+valid_profiles: list[str] = ["list", "detail", "full"]
+
+max_page_size: int = 100
+
+## Model -> profile -> loader options
+load_profiles: dict[type, dict[str, list]] = {
+    TVShow: {
+        "list": [selectinload(TVShow.genres)],
+        "detail": [
+            selectinload(TVShow.genres),
+            selectinload(TVShow.networks),
+            selectinload(TVShow.creators),
+        ],
+        "full": [
+            selectinload(TVShow.genres),
+            selectinload(TVShow.networks),
+            selectinload(TVShow.creators),
+            selectinload(TVShow.seasons),
+        ],
+    },
+    Movie: {
+        "list": [selectinload(Movie.genres)],
+        "detail": [selectinload(Movie.genres)],
+        "full": [selectinload(Movie.genres)],
+    },
+    TVSeason: {
+        "list": [],
+        "detail": [joinedload(TVSeason.tv_show)],
+        "full": [joinedload(TVSeason.tv_show).selectinload(TVShow.genres)],
+    },
+}
+
+
+def get_load_options(model: type = None, profile: str = None, strict: bool = True) -> list:
+    """Return the loader options for a model's profile.
+
+    With strict=True, relationships the profile does not load raise on access.
+    """
+    if model not in load_profiles:
+        raise ValueError(f"No loading profiles for model {getattr(model, '__name__', model)}")
+
+    if profile not in valid_profiles:
+        raise ValueError(f"Invalid loading profile: {profile}. Must be one of {valid_profiles}")
+
+    options = list(load_profiles[model][profile])
+
+    if strict:
+        options.append(raiseload("*"))
+
+    return options
+
+
+class MediaRepository(Generic[T]):
+    """Profile-aware queries for one mapped model.
+
+    Params:
+        session: Session to query with.
+        model: Mapped class, with an entry in load_profiles.
+        strict: Make relationships a profile does not load raise on access.
+    """
+
+    ## Default list ordering; subclasses override
+    order_by: tuple = ()
+
+    def __init__(self, session: Session = None, model: type[T] = None, strict: bool = True) -> None:
+        if session is None:
+            raise ValueError("Missing a SQLAlchemy Session.")
+
+        if model not in load_profiles:
+            raise ValueError(f"No loading profiles for model {getattr(model, '__name__', model)}")
+
+        self.session = session
+        self.model = model
+        self.strict = strict
+
+    def select(self, profile: str = "list") -> sa.Select:
+        """Return a SELECT for the model with the profile's loader options applied."""
+        return sa.select(self.model).options(
+            *get_load_options(model=self.model, profile=profile, strict=self.strict)
+        )
+
+    def get(self, tmdb_id: int = None, profile: str = "detail") -> Optional[T]:
+        """Return one record by ID, or None."""
+        if tmdb_id is None:
+            raise ValueError("Missing TMDB ID")
+
+        stmt = self.select(profile=profile).where(self.model.tmdb_id == tmdb_id)
+
+        return self.session.scalars(stmt).unique().one_or_none()
+
+    def get_many(self, tmdb_ids: Iterable[int] = None, profile: str = "list") -> list[T]:
+        """Return records by ID, in the order the IDs were given. Missing IDs are skipped."""
+        tmdb_ids = list(dict.fromkeys(tmdb_ids or []))
+
+        if not tmdb_ids:
+            return []
+
+        stmt = self.select(profile=profile).where(self.model.tmdb_id.in_(tmdb_ids))
+        by_id = {obj.tmdb_id: obj for obj in self.session.scalars(stmt).unique()}
+
+        return [by_id[_id] for _id in tmdb_ids if _id in by_id]
+
+    def list(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        profile: str = "list",
+        order_by: Any = None,
+    ) -> list[T]:
+        """Return one page of records, 1-indexed."""
+        if page < 1:
+            raise ValueError("page must be 1 or greater")
+
+        if not 1 <= page_size <= max_page_size:
+            raise ValueError(f"page_size must be between 1 and {max_page_size}")
+
+        if order_by is None:
+            order_by = self.order_by
+        elif not isinstance(order_by, (list, tuple)):
+            order_by = (order_by,)
+
+        stmt = (
+            self.select(profile=profile)
+            .order_by(*order_by)
+            .limit(page_size)
+            .offset((page - 1) * page_size)
+        )
+
+        return list(self.session.scalars(stmt).unique())
+
+    def count(self) -> int:
+        return self.session.scalar(sa.select(sa.func.count()).select_from(self.model))
+
+
+class TVShowRepository(MediaRepository[TVShow]):
+    order_by = (TVShow.popularity.desc(), TVShow.tmdb_id)
+
+    def __init__(self, session: Session = None, strict: bool = True) -> None:
+        super().__init__(session=session, model=TVShow, strict=strict)
+
+    def list_seasons(self, tv_show_id: int = None, profile: str = "list") -> list[TVSeason]:
+        """Return a show's seasons in season order."""
+        stmt = (
+            sa.select(TVSeason)
+            .options(*get_load_options(model=TVSeason, profile=profile, strict=self.strict))
+            .where(TVSeason.tv_show_id == tv_show_id)
+            .order_by(TVSeason.season_number)
+        )
+
+        return list(self.session.scalars(stmt).unique())
+
+
+class MovieRepository(MediaRepository[Movie]):
+    order_by = (Movie.popularity.desc(), Movie.tmdb_id)
+
+    def __init__(self, session: Session = None, strict: bool = True) -> None:
+        super().__init__(session=session, model=Movie, strict=strict)
@@ -0,0 +1,316 @@
+"""Full-text search over stored TV shows and movies.
+
+Answers title/overview lookups from the local catalog instead of a round
+trip to TMDB's search API.
+
+SQLite:
+    A single FTS5 virtual table (media_search) indexes name, original_name,
+    title, original_title and overview for both shows and movies. Triggers on
+    tv_shows/movies keep it in sync, so every write path (bulk upsert,
+    DatabaseWriter, session.add) updates the index incrementally. Each row's
+    rowid encodes the media type and TMDB ID (tmdb_id * 2, +1 for movies), so
+    trigger deletes are primary-key lookups.
+
+Postgres:
+    A generated, stored tsvector column (search_vector) on tv_shows/movies,
+    with a GIN index. Postgres maintains it on every write.
+
+Usage:
+
+create_base_metadata(base_obj=Base, engine=engine)
+create_search_index(engine=engine)
+
+with SessionLocal() as session:
+    results = search_media(session=session, query="date with fut")
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+import re
+from typing import Optional
+
+import sqlalchemy as sa
+
+from sqlalchemy.orm import Session
+
+search_table: str = "media_search"
+
+## Media type -> value added to tmdb_id * 2 to build an FTS rowid
+media_type_offsets: dict[str, int] = {"tv": 0, "movie": 1}
+
+## bm25() column weights, in media_search column order:
+#  name, original_name, title, original_title, overview
+bm25_weights: str = "10.0, 5.0, 10.0, 5.0, 1.0"
+
+## Text search configuration used for Postgres tsvectors
+pg_ts_config: str = "simple"
+
+_sqlite_ddl: list[str] = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {search_table} USING fts5(
+        name, original_name, title, original_title, overview,
+        media_type UNINDEXED, tmdb_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    ## TV shows
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tv_shows_search_insert AFTER INSERT ON tv_shows BEGIN
+        INSERT INTO {search_table} (rowid, name, original_name, overview, media_type, tmdb_id)
+        VALUES (new.tmdb_id * 2, new.name, new.original_name, new.overview, 'tv', new.tmdb_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tv_shows_search_update AFTER UPDATE ON tv_shows
+    WHEN old.name IS NOT new.name
+        OR old.original_name IS NOT new.original_name
+        OR old.overview IS NOT new.overview
+    BEGIN
+        DELETE FROM {search_table} WHERE rowid = old.tmdb_id * 2;
+        INSERT INTO {search_table} (rowid, name, original_name, overview, media_type, tmdb_id)
+        VALUES (new.tmdb_id * 2, new.name, new.original_name, new.overview, 'tv', new.tmdb_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tv_shows_search_delete AFTER DELETE ON tv_shows BEGIN
+        DELETE FROM {search_table} WHERE rowid = old.tmdb_id * 2;
+    END
+    """,
+    ## Movies
+    f"""
+    CREATE TRIGGER IF NOT EXISTS movies_search_insert AFTER INSERT ON movies BEGIN
+        INSERT INTO {search_table} (rowid, title, original_title, overview, media_type, tmdb_id)
+        VALUES (new.tmdb_id * 2 + 1, new.title, new.original_title, new.overview, 'movie', new.tmdb_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS movies_search_update AFTER UPDATE ON movies
+    WHEN old.title IS NOT new.title
+        OR old.original_title IS NOT new.original_title
+        OR old.overview IS NOT new.overview
+    BEGIN
+        DELETE FROM {search_table} WHERE rowid = old.tmdb_id * 2 + 1;
+        INSERT INTO {search_table} (rowid, title, original_title, overview, media_type, tmdb_id)
+        VALUES (new.tmdb_id * 2 + 1, new.title, new.original_title, new.overview, 'movie', new.tmdb_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS movies_search_delete AFTER DELETE ON movies BEGIN
+        DELETE FROM {search_table} WHERE rowid = old.tmdb_id * 2 + 1;
+    END
+    """,
+]
+
+_sqlite_rebuild: list[str] = [
+    f"DELETE FROM {search_table}",
+    f"""
+    INSERT INTO {search_table} (rowid, name, original_name, overview, media_type, tmdb_id)
+    SELECT tmdb_id * 2, name, original_name, overview, 'tv', tmdb_id FROM tv_shows
+    """,
+    f"""
+    INSERT INTO {search_table} (rowid, title, original_title, overview, media_type, tmdb_id)
+    SELECT tmdb_id * 2 + 1, title, original_title, overview, 'movie', tmdb_id FROM movies
+    """,
+]
+
+_pg_ddl: list[str] = [
+    f"""
+    ALTER TABLE tv_shows ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{pg_ts_config}', coalesce(name, '')), 'A')
+        || setweight(to_tsvector('{pg_ts_config}', coalesce(original_name, '')), 'B')
+        || setweight(to_tsvector('{pg_ts_config}', coalesce(overview, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_tv_shows_search_vector ON tv_shows USING GIN (search_vector)",
+    f"""
+    ALTER TABLE movies ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{pg_ts_config}', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('{pg_ts_config}', coalesce(original_title, '')), 'B')
+        || setweight(to_tsvector('{pg_ts_config}', coalesce(overview, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_movies_search_vector ON movies USING GIN (search_vector)",
+]
+
+
+@dataclass
+class SearchResult:
+    media_type: str
+    tmdb_id: int
+    ## Show name or movie title
+    name: Optional[str]
+    ## Higher is a better match
+    score: float
+
+
+def create_search_index(engine: sa.Engine = None) -> None:
+    """Create the search index and the objects that keep it up to date.
+
+    Run after create_base_metadata(). Safe to run more than once. On SQLite,
+    rows stored before the index existed are indexed by rebuild_search_index().
+    """
+    if not engine:
+        raise ValueError("Missing a SQLAlchemy engine object.")
+
+    if engine.dialect.name == "sqlite":
+        statements = _sqlite_ddl
+    elif engine.dialect.name == "postgresql":
+        statements = _pg_ddl
+    else:
+        raise ValueError(
+            f"Full-text search is not supported on dialect '{engine.dialect.name}'"
+        )
+
+    try:
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.exec_driver_sql(statement)
+    except Exception as exc:
+        raise Exception(f"Unhandled exception creating search index. Details: {exc}")
+
+
+def rebuild_search_index(engine: sa.Engine = None) -> None:
+    """Re-index every stored show and movie.
+
+    Only needed on SQLite, for rows written before create_search_index() ran.
+    Postgres generated columns are always current.
+    """
+    if not engine:
+        raise ValueError("Missing a SQLAlchemy engine object.")
+
+    if engine.dialect.name != "sqlite":
+        return
+
+    with engine.begin() as conn:
+        for statement in _sqlite_rebuild:
+            conn.exec_driver_sql(statement)
+
+        ## Merge FTS5 b-tree segments after a bulk rebuild
+        conn.exec_driver_sql(f"INSERT INTO {search_table}({search_table}) VALUES ('optimize')")
+
+
+def query_terms(query: str = None) -> list[str]:
+    """Split user input into search terms, dropping FTS/tsquery syntax characters."""
+    if not query:
+        return []
+
+    return re.findall(r"\w+", query.lower())
+
+
+def build_fts_query(terms: list[str] = None, prefix: bool = True) -> str:
+    """Build an FTS5 MATCH expression; every term must match, the last as a prefix.
+
+    Terms are double-quoted, so user input can never be read as FTS5 syntax.
+    """
+    quoted = [f'"{term}"' for term in terms]
+
+    if prefix and quoted:
+        quoted[-1] = f"{quoted[-1]}*"
+
+    return " ".join(quoted)
+
+
+def build_tsquery(terms: list[str] = None, prefix: bool = True) -> str:
+    """Build a Postgres to_tsquery() expression; every term must match, the last as a prefix."""
+    _terms = list(terms)
+
+    if prefix and _terms:
+        _terms[-1] = f"{_terms[-1]}:*"
+
+    return " & ".join(_terms)
+
+
+def search_media(
+    session: Session = None,
+    query: str = None,
+    media_type: str = None,
+    limit: int = 20,
+    prefix: bool = True,
+) -> list[SearchResult]:
+    """Search stored shows and movies, best matches first.
+
+    Every word in query must match. With prefix=True the last word also matches
+    as a prefix, so partial input ("date with fut") finds "A Date With the Future".
+    Pass media_type="tv" or "movie" to search one kind of media.
+    """
+    if session is None:
+        raise ValueError("Missing a SQLAlchemy Session.")
+
+    if media_type and media_type not in media_type_offsets:
+        raise ValueError(
+            f"Invalid media type: {media_type}. Must be one of {list(media_type_offsets)}"
+        )
+
+    terms = query_terms(query)
+
+    if not terms:
+        return []
+
+    dialect_name = session.get_bind().dialect.name
+
+    if dialect_name == "sqlite":
+        rows = _search_sqlite(session, terms, media_type, limit, prefix)
+    elif dialect_name == "postgresql":
+        rows = _search_postgres(session, terms, media_type, limit, prefix)
+    else:
+        raise ValueError(f"Full-text search is not supported on dialect '{dialect_name}'")
+
+    return [
+        SearchResult(
+            media_type=row.media_type,
+            tmdb_id=row.tmdb_id,
+            name=row.name,
+            score=float(row.score),
+        )
+        for row in rows
+    ]
+
+
+def _search_sqlite(session, terms, media_type, limit, prefix):
+    media_filter = "AND media_type = :media_type" if media_type else ""
+
+    ## bm25() is lower-is-better; negate it so score is higher-is-better
+    stmt = sa.text(
+        f"""
+        SELECT media_type, tmdb_id, coalesce(name, title) AS name,
+            -bm25({search_table}, {bm25_weights}) AS score
+        FROM {search_table}
+        WHERE {search_table} MATCH :match {media_filter}
+        ORDER BY bm25({search_table}, {bm25_weights})
+        LIMIT :limit
+        """
+    )
+
+    return session.execute(
+        stmt,
+        {
+            "match": build_fts_query(terms, prefix=prefix),
+            "media_type": media_type,
+            "limit": limit,
+        },
+    ).all()
+
+
+def _search_postgres(session, terms, media_type, limit, prefix):
+    selects: list[str] = []
+
+    if media_type in (None, "tv"):
+        selects.append(
+            "SELECT 'tv' AS media_type, tmdb_id, name, ts_rank(search_vector, q) AS score "
+            f"FROM tv_shows, to_tsquery('{pg_ts_config}', :tsquery) q WHERE search_vector @@ q"
+        )
+
+    if media_type in (None, "movie"):
+        selects.append(
+            "SELECT 'movie' AS media_type, tmdb_id, title AS name, ts_rank(search_vector, q) AS score "
+            f"FROM movies, to_tsquery('{pg_ts_config}', :tsquery) q WHERE search_vector @@ q"
+        )
+
+    stmt = sa.text(f"{' UNION ALL '.join(selects)} ORDER BY score DESC LIMIT :limit")
+
+    return session.execute(
+        stmt, {"tsquery": build_tsquery(terms, prefix=prefix), "limit": limit}
+    ).all()
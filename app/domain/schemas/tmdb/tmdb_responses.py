@@ -29,6 +29,22 @@ class BaseHeaders(BaseModel):
     x_amz_cf_id: str = Field(default=None, alias="x-amz-cf-id")
 
 
+class ReqTimings(BaseModel):
+    """Per-phase request durations in seconds, from utils.http_trace_utils.PhaseTracer.
+
+    connect (which includes DNS) and tls are None when a pooled connection was reused.
+    wait is None unless the client has the utils.http_trace_utils event hooks.
+    """
+
+    connect: Optional[float] = Field(default=None)
+    tls: Optional[float] = Field(default=None)
+    send: Optional[float] = Field(default=None)
+    ttfb: Optional[float] = Field(default=None)
+    body: Optional[float] = Field(default=None)
+    wait: Optional[float] = Field(default=None)
+    total: Optional[float] = Field(default=None)
+
+
 class BaseResponse(BaseModel):
     """Base response schema.
 
@@ -50,6 +66,7 @@ class BaseResponse(BaseModel):
     is_informational: bool = Field(default=None)
     is_stream_consumed: bool = Field(default=None)
     original_response: Response = Field(default=None)
+    timings: ReqTimings = Field(default=None)
 
     @property
     def content_decode(self):
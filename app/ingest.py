@@ -0,0 +1,116 @@
+"""Catalog ingestion entrypoint.
+
+Streams TMDB records by ID into the app database through the staged ingest
+pipeline (utils.pipeline_utils.ingest). Memory use is bounded by the queue
+sizes, not by the number of IDs.
+
+Usage (from the app/ directory):
+
+    python ingest.py tv --start 1 --end 10000 --fetch-workers 16
+    python ingest.py movie --ids-file movie_ids.txt
+    python ingest.py tv --start 1 --end 1000 --profile memory
+    python ingest.py tv --start 1 --end 100000 --fetch-workers 32 --parse-processes 8
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+
+from typing import Iterator
+
+import httpx
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+from lib.constants import valid_media_types
+from main import get_app_session
+from utils.pipeline_utils import ingest
+from utils.profile_utils import profiling
+
+
+def iter_ids_file(path: Path = None) -> Iterator[int]:
+    """Yield one ID per non-empty line, lazily."""
+    with open(path, "r") as in_file:
+        for line in in_file:
+            line = line.strip()
+
+            if line:
+                yield int(line)
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Ingest TMDB records by ID into the app database.")
+    parser.add_argument("media_type", choices=valid_media_types)
+    parser.add_argument("--start", type=int, default=None, help="First ID of a range.")
+    parser.add_argument("--end", type=int, default=None, help="Last ID of a range (inclusive).")
+    parser.add_argument("--ids-file", type=Path, default=None, help="File with one ID per line.")
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    parser.add_argument("--parse-workers", type=int, default=1)
+    parser.add_argument(
+        "--parse-processes",
+        type=int,
+        default=0,
+        help="Parse on this many worker processes (0 parses on --parse-workers threads).",
+    )
+    parser.add_argument(
+        "--parse-chunk-size", type=int, default=32, help="Records per parse process task."
+    )
+    parser.add_argument("--queue-size", type=int, default=200, help="Bound on each stage's queue.")
+    parser.add_argument("--write-batch-size", type=int, default=500)
+    parser.add_argument("--report-interval", type=float, default=10.0)
+    parser.add_argument(
+        "--profile",
+        choices=["cpu", "memory", "all"],
+        default=None,
+        help="Profile the run (overrides PROFILE_MODE). See utils.profile_utils.",
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.ids_file is None and (args.start is None or args.end is None):
+        parser.error("Pass --ids-file, or both --start and --end")
+
+    return args
+
+
+def main(argv: list[str] = None) -> int:
+    args = parse_args(argv)
+
+    if args.ids_file is not None:
+        tmdb_ids = iter_ids_file(args.ids_file)
+    else:
+        tmdb_ids = range(args.start, args.end + 1)
+
+    with profiling(mode=args.profile, name=f"ingest-{args.media_type}"):
+        with httpx.Client(
+            limits=httpx.Limits(
+                max_connections=args.fetch_workers, max_keepalive_connections=args.fetch_workers
+            )
+        ) as client:
+            result = ingest(
+                session_factory=get_app_session(),
+                media_type=args.media_type,
+                tmdb_ids=tmdb_ids,
+                client=client,
+                fetch_workers=args.fetch_workers,
+                parse_workers=args.parse_workers,
+                queue_size=args.queue_size,
+                write_batch_size=args.write_batch_size,
+                report_interval=args.report_interval,
+                parse_processes=args.parse_processes,
+                parse_chunk_size=args.parse_chunk_size,
+            )
+
+    log.info("Ingest finished.\n%s", result.report())
+
+    if result.source_error or result.stages[-1].get("write_errors"):
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,28 +2,45 @@ from __future__ import annotations
 
 from typing import Union
 
-from core.config import api_settings, app_settings, logging_settings
+from core.config import get_api_settings
 from utils.logger import get_logger
 
-log = get_logger(__name__, level=logging_settings.LOG_LEVEL)
+log = get_logger(__name__)
 
 default_req_cache_dir = ".cache"
 default_serialize_dir = ".serialize"
 
-base_url: str = api_settings.BASE_URL
-api_key: str = api_settings.API_READ_KEY
-
 movie_endpoint: str = "movie"
 tv_endpoint: str = "tv"
 auth_endpoint: str = "authentication"
 token_endpoint: str = "token"
 session_endpoint: str = "session"
+changes_endpoint: str = "changes"
 
 popular_tv_endpoint: str = "popular?language=en-US"
 
-basic_auth_headers: dict = {
-    "accept": "application/json",
-    "Authorization": f"Bearer {api_key}",
+valid_media_types: list[str] = ["movie", "tv"]
+
+
+def get_basic_auth_headers() -> dict[str, str]:
+    """Return request headers authenticating with the API read key."""
+    return {
+        "accept": "application/json",
+        "Authorization": f"Bearer {get_api_settings().API_READ_KEY}",
+    }
+
+
+## Values built from API settings are resolved on first access (PEP 562),
+#  so importing this module does not read the environment/.env files.
+_lazy_constants = {
+    "base_url": lambda: get_api_settings().BASE_URL,
+    "api_key": lambda: get_api_settings().API_READ_KEY,
+    "basic_auth_headers": get_basic_auth_headers,
 }
 
-valid_media_types: list[str] = ["movie", "tv"]
+
+def __getattr__(name: str):
+    if name in _lazy_constants:
+        return _lazy_constants[name]()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import argparse
+from functools import lru_cache
 import json
+import logging
 
 from typing import Union
 
-from core.config import api_settings, app_settings, logging_settings
+from core.config import get_api_settings, get_app_settings
 import httpx
 
 from utils.logger import get_logger
@@ -16,44 +19,79 @@ from utils.tmdb_utils import (
     test_key,
 )
 
-log = get_logger(__name__, level=logging_settings.LOG_LEVEL)
+log = get_logger(__name__)
 
 from core.db import Base, create_base_metadata, get_engine, get_session
+
+## Import models so their tables are registered on Base.metadata
+from domain.models.tmdb import tmdb_media_models
+from domain.models.tmdb.tmdb_media_crud import upsert_tv_shows
+from domain.models.tmdb.tmdb_media_search import create_search_index
 from domain.schemas.tmdb import tmdb_media_schemas, tmdb_responses
 from lib.constants import (
     auth_endpoint,
-    basic_auth_headers,
+    get_basic_auth_headers,
     movie_endpoint,
     token_endpoint,
 )
+from sqlalchemy.orm import Session, sessionmaker
+from utils.profile_utils import profile_stage, profiling
 from utils.time_utils import benchmark
 
-engine = get_engine(connection="db/demo.sqlite", echo=True)
-SessionLocal = get_session(engine=engine)
-create_base_metadata(base_obj=Base, engine=engine)
+@lru_cache(maxsize=None)
+def get_app_session(echo: bool = False) -> sessionmaker[Session]:
+    """Create the app's database engine & tables on first use, and return a sessionmaker.
+
+    echo=True logs every statement the engine runs; keep it off for bulk writes.
+    """
+    engine = get_engine(connection="db/demo.sqlite", echo=echo)
+    create_base_metadata(base_obj=Base, engine=engine)
+    create_search_index(engine=engine)
+
+    return get_session(engine=engine)
 
 
 def main():
-    # log.debug(f"App settings: {app_settings}")
-    # log.debug(f"API settings: {api_settings}")
+    # log.debug(f"App settings: {get_app_settings()}")
+    # log.debug(f"API settings: {get_api_settings()}")
 
     log.info("Testing API key")
 
     if not test_key():
         raise ValueError(f"Unable to validate API key.")
 
-    _auth = authenticate(headers=basic_auth_headers)
-    log.debug(f"Auth response: {_auth}")
+    _auth = authenticate(headers=get_basic_auth_headers())
+
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Auth response: %s", _auth)
 
     _token = get_request_token()
     # log.debug(f"Token: {_token}")
 
     token = retrieve_token(_token.text)
-    log.debug(f"Token: {token}")
+    log.debug("Token: %s", token)
+
+    log.info("Getting popular TV shows")
+
+    with profile_stage("fetch"):
+        popular_tv = get_popular_tv()
+
+    with profile_stage("parse"):
+        pop_tv_shows = parse_popular_tv(popular_tv)
+
+    SessionLocal = get_app_session(echo=True)
+
+    with profile_stage("persist"):
+        with SessionLocal() as session:
+            saved = upsert_tv_shows(session=session, shows=pop_tv_shows)
+            session.commit()
 
-    log.info(f"Getting popular TV shows")
-    popular_tv = get_popular_tv()
+    log.info("Saved [%s] popular TV shows to the database", saved)
 
+
+def parse_popular_tv(
+    popular_tv: tmdb_responses.ReqResponse = None,
+) -> list[tmdb_media_schemas.MediaTVShow]:
     pop_tv_dict: dict = popular_tv.text_json()
 
     # for k in pop_tv_dict.keys():
@@ -65,10 +103,14 @@ def main():
         tmdb_media_schemas.MediaResponse.parse_obj(pop_tv_dict)
     )
 
-    log.debug(f"Popular TV: {pop_tv}")
+    ## Rendering the whole response is expensive; skip it unless DEBUG is on
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Popular TV: %s", pop_tv)
 
     log.info(
-        f"Found {pop_tv.total_results} popular TV shows. Results in {pop_tv.total_pages} pages."
+        "Found %s popular TV shows. Results in %s pages.",
+        pop_tv.total_results,
+        pop_tv.total_pages,
     )
 
     pop_tv_shows: list[tmdb_media_schemas.MediaTVShow] = []
@@ -80,12 +122,34 @@ def main():
 
         pop_tv_shows.append(pop_tv_show)
 
-    log.debug(f"Popular TV Shows: {pop_tv_shows}")
-    log.debug(f"Found [{len(pop_tv_shows)}] popular TV shows")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Popular TV Shows: %s", pop_tv_shows)
+
+    log.debug("Found [%s] popular TV shows", len(pop_tv_shows))
+
+    return pop_tv_shows
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fetch popular TV shows into the demo database.")
+    parser.add_argument(
+        "--profile",
+        choices=["cpu", "memory", "all"],
+        default=None,
+        help="Profile the run (overrides PROFILE_MODE). See utils.profile_utils.",
+    )
+    parser.add_argument(
+        "--profile-dir", default=None, help="Directory for profiler output (overrides PROFILE_DIR)."
+    )
+
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
+    args = parse_args()
+
     log.info("Starting app")
-    with benchmark("Run main() function"):
-        main()
+    with profiling(mode=args.profile, name="main", output_dir=args.profile_dir):
+        with benchmark("Run main() function"):
+            main()
     log.info("Finished.")
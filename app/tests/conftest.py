@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from core.db import Base, create_base_metadata, get_engine, get_session
+import pytest
+from utils.logger import configure_logging, flush_logging
+
+responses_dir = Path(__file__).parent.parent / "examples" / "responses"
+
+
+@pytest.fixture(autouse=True)
+def tmp_log_file(tmp_path: Path):
+    """Log to tmp_path, so test runs never write to (or rotate) the app's logs/app.log."""
+    log_file = tmp_path / "logs" / "app.log"
+    configure_logging(log_file=str(log_file))
+
+    yield log_file
+
+    flush_logging()
+    configure_logging()
+
+
+@pytest.fixture
+def tv_show_dict() -> dict:
+    with open(responses_dir / "ex_tvshow_response.json", "r") as in_file:
+        return json.load(in_file)
+
+
+@pytest.fixture
+def movie_dict() -> dict:
+    with open(responses_dir / "ex_movie_response.json", "r") as in_file:
+        return json.load(in_file)
+
+
+@pytest.fixture
+def session_factory(tmp_path: Path):
+    """sessionmaker for a fresh SQLite database with every table created."""
+    engine = get_engine(connection=str(tmp_path / "test.sqlite"))
+    create_base_metadata(base_obj=Base, engine=engine)
+
+    yield get_session(engine=engine)
+
+    engine.dispose()
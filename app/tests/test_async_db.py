@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("greenlet")
+
+from core.database.sqla_upsert import async_bulk_upsert
+from core.db import Base, get_async_engine, get_async_session
+from domain.models.tmdb.tmdb_media_crud import async_upsert_tv_shows
+from domain.models.tmdb.tmdb_media_models import Genre, TVShow
+from domain.schemas.tmdb.tmdb_media_schemas import MediaTVShow
+import sqlalchemy as sa
+
+def test_async_upsert(tmp_path: Path, tv_show_dict: dict):
+    show = MediaTVShow.parse_obj(tv_show_dict)
+
+    async def _run():
+        engine = get_async_engine(connection=str(tmp_path / "async.sqlite"))
+
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+            journal_mode = await conn.exec_driver_sql("PRAGMA journal_mode")
+            assert journal_mode.scalar() == "wal", "SQLite profile not applied"
+
+        AsyncSessionLocal = get_async_session(engine=engine)
+
+        async with AsyncSessionLocal() as session:
+            await async_upsert_tv_shows(session=session, shows=[show])
+            await async_bulk_upsert(
+                session=session,
+                table=Genre,
+                rows=[{"tmdb_id": 10765, "name": "Sci-Fi & Fantasy"}],
+            )
+            await session.commit()
+
+        async with AsyncSessionLocal() as session:
+            name = await session.scalar(
+                sa.select(TVShow.name).where(TVShow.tmdb_id == show.tmdb_id)
+            )
+            genres = await session.scalar(sa.select(sa.func.count(Genre.tmdb_id)))
+
+        await engine.dispose()
+
+        return name, genres
+
+    name, genres = asyncio.run(_run())
+
+    assert name == show.name
+    assert genres == len(show.genres) + 1
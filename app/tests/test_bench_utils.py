@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from benchmarks.bench_utils import compare_results
+
+def test_compare_flags_regressions_in_both_directions():
+    baseline = {
+        "results": {
+            "tv_details/json": {"encode_per_sec": 1000.0, "size_bytes": 2000},
+        }
+    }
+    current = {
+        "results": {
+            "tv_details/json": {"encode_per_sec": 800.0, "size_bytes": 2500},
+        }
+    }
+
+    regressions = compare_results(current=current, baseline=baseline, threshold=0.10)
+
+    assert {r.metric for r in regressions} == {"encode_per_sec", "size_bytes"}
+
+
+def test_compare_ignores_improvements_and_new_cases():
+    baseline = {"results": {"a": {"encode_per_sec": 1000.0, "size_bytes": 2000}}}
+    current = {
+        "results": {
+            "a": {"encode_per_sec": 1500.0, "size_bytes": 1000},
+            "b": {"encode_per_sec": 1.0},
+        }
+    }
+
+    assert not compare_results(current=current, baseline=baseline, threshold=0.10)
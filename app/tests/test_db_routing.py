@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from core.database.sqla_connection_models import saSQLiteConnection
+from core.db import (
+    Base,
+    create_base_metadata,
+    get_engine,
+    get_routing_session,
+)
+from domain.models.tmdb.tmdb_media_models import Genre
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy import pool as sa_pool
+from sqlalchemy.exc import OperationalError
+
+def test_pool_settings_passed_to_engine(tmp_path: Path):
+    connection = saSQLiteConnection(
+        database=str(tmp_path / "pool.sqlite"),
+        poolclass="queue",
+        pool_size=3,
+        max_overflow=2,
+        pool_timeout=5,
+    )
+    engine = get_engine(connection=connection)
+
+    assert isinstance(engine.pool, sa_pool.QueuePool)
+    assert engine.pool.size() == 3
+
+    engine.dispose()
+
+
+def test_invalid_pool_settings():
+    with pytest.raises(ValueError):
+        saSQLiteConnection(poolclass="static", pool_size=5)
+
+    with pytest.raises(ValueError):
+        saSQLiteConnection(poolclass="bogus")
+
+
+def test_routing_session_splits_reads_and_writes(tmp_path: Path):
+    database = str(tmp_path / "routing.sqlite")
+
+    writer = get_engine(connection=saSQLiteConnection(database=database))
+    create_base_metadata(base_obj=Base, engine=writer)
+
+    reader = get_engine(
+        connection=saSQLiteConnection(database=database, read_only=True),
+        sqlite_profile="read_serving",
+    )
+
+    ## The read-only engine must refuse writes outright
+    with pytest.raises(OperationalError):
+        with reader.begin() as conn:
+            conn.execute(sa.insert(Genre.__table__).values(tmdb_id=1, name="Drama"))
+
+    statements: dict[str, int] = {"writer": 0, "reader": 0}
+
+    @sa.event.listens_for(writer, "before_cursor_execute")
+    def _count_writer(*args):
+        statements["writer"] += 1
+
+    @sa.event.listens_for(reader, "before_cursor_execute")
+    def _count_reader(*args):
+        statements["reader"] += 1
+
+    SessionLocal = get_routing_session(writer_engine=writer, reader_engine=reader)
+
+    with SessionLocal() as session:
+        session.add(Genre(tmdb_id=18, name="Drama"))
+        session.commit()
+
+    assert statements["writer"] >= 1, "Flush was not routed to the writer"
+
+    writer_before = statements["writer"]
+
+    with SessionLocal() as session:
+        stored = session.scalar(sa.select(Genre).where(Genre.tmdb_id == 18))
+
+    assert stored.name == "Drama"
+    assert statements["reader"] >= 1, "Read was not routed to the reader"
+    assert statements["writer"] == writer_before, "Read was routed to the writer"
+
+    writer.dispose()
+    reader.dispose()
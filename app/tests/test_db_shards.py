@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from core.database.sqla_shards import ShardedSQLite
+from core.db import get_session
+from domain.models.tmdb.tmdb_media_crud import upsert_tv_shows
+from domain.models.tmdb.tmdb_media_models import Genre, TVShow
+from domain.schemas.tmdb.tmdb_media_schemas import MediaTVShow
+import pytest
+import sqlalchemy as sa
+
+@pytest.fixture
+def shows(tv_show_dict: dict) -> list[MediaTVShow]:
+    return [
+        MediaTVShow.parse_obj(dict(tv_show_dict, id=1000 + i, popularity=float(i), seasons=[]))
+        for i in range(30)
+    ]
+
+
+@pytest.fixture
+def shards(tmp_path: Path):
+    shards = ShardedSQLite(shard_dir=tmp_path / "shards", shard_count=3)
+    shards.create_all()
+
+    yield shards
+
+    shards.dispose()
+
+
+def handler(session, records):
+    upsert_tv_shows(session=session, shows=records)
+
+
+def test_writer_routes_records_to_shards(shards: ShardedSQLite, shows):
+    with shards.get_writer(handler=handler, flush_interval=0.01) as writer:
+        for show in shows:
+            writer.put(show)
+
+    assert shards.count(TVShow) == len(shows)
+
+    for index, session_factory in enumerate(shards.session_factories):
+        with session_factory() as session:
+            ids = session.scalars(sa.select(TVShow.tmdb_id)).all()
+
+        assert ids and all(_id % 3 == index for _id in ids), f"Shard {index} holds foreign IDs"
+
+    assert shards.get(TVShow, 1007).tmdb_id == 1007
+
+
+def test_fan_out_merges_in_order(shards: ShardedSQLite, shows):
+    shards.write(records=shows, handler=handler)
+
+    top = shards.scalars(
+        sa.select(TVShow).order_by(TVShow.popularity.desc()).limit(5),
+        key=lambda show: show.popularity,
+        reverse=True,
+        limit=5,
+    )
+
+    assert [show.tmdb_id for show in top] == [1029, 1028, 1027, 1026, 1025]
+
+
+def test_compact_merges_shards(shards: ShardedSQLite, shows, tmp_path: Path):
+    shards.write(records=shows, handler=handler)
+
+    engine = shards.compact(target=tmp_path / "merged.sqlite")
+
+    with get_session(engine=engine)() as session:
+        assert session.scalar(sa.select(sa.func.count()).select_from(TVShow)) == 30
+        ## Genres are repeated in every shard, but stored once after compaction
+        assert session.scalar(sa.select(sa.func.count()).select_from(Genre)) == len(
+            shows[0].genres
+        )
+        assert len(session.get(TVShow, 1001).genres) == len(shows[0].genres)
+
+    engine.dispose()
+
+
+def test_compact_reports_copy_error(shards: ShardedSQLite, shows, tmp_path: Path):
+    shards.write(records=shows, handler=handler)
+
+    ## A later table missing from the first shard fails the copy mid-transaction
+    last_table = TVShow.metadata.sorted_tables[-1].name
+
+    with shards.engines[0].begin() as conn:
+        conn.exec_driver_sql(f"DROP TABLE {last_table}")
+
+    with pytest.raises(Exception, match="no such table") as exc_info:
+        shards.compact(target=tmp_path / "merged.sqlite")
+
+    assert "locked" not in str(exc_info.value)
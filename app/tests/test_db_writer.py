@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import threading
+
+from core.database.sqla_writer import DatabaseWriter
+from domain.models.tmdb.tmdb_media_crud import get_tv_show_writer
+from domain.models.tmdb.tmdb_media_models import Genre, TVShow
+from domain.schemas.tmdb.tmdb_media_schemas import MediaTVShow
+import sqlalchemy as sa
+
+
+def test_many_producers_one_writer(session_factory, tv_show_dict: dict):
+    def produce(writer: DatabaseWriter, offset: int):
+        for i in range(250):
+            show_id = tv_show_dict["id"] + offset + i
+            writer.put(MediaTVShow.parse_obj(dict(tv_show_dict, id=show_id, seasons=[])))
+
+    writer = get_tv_show_writer(
+        session_factory=session_factory, batch_size=200, flush_interval=0.05
+    )
+
+    with writer:
+        producers = [
+            threading.Thread(target=produce, args=(writer, n * 1000)) for n in range(4)
+        ]
+
+        for producer in producers:
+            producer.start()
+
+        for producer in producers:
+            producer.join()
+
+    stats = writer.stats()
+
+    assert stats["items_written"] == 1000
+    assert stats["errors"] == 0
+    ## Records were committed in batches, not one transaction each
+    assert stats["batches_written"] < 50
+    assert stats["p95_batch_latency"] > 0
+
+    with session_factory() as session:
+        assert session.scalar(sa.select(sa.func.count()).select_from(TVShow)) == 1000
+
+
+def test_failed_batch_rolled_back(session_factory):
+
+    def handler(session, records):
+        for record in records:
+            session.add(Genre(tmdb_id=record, name=str(record)))
+
+        session.flush()
+
+        raise ValueError("Simulated failure after flush")
+
+    with DatabaseWriter(session_factory=session_factory, handler=handler) as writer:
+        writer.put(1)
+        writer.put(2)
+
+    assert len(writer.errors) == 1
+
+    with session_factory() as session:
+        assert session.scalar(sa.select(sa.func.count()).select_from(Genre)) == 0
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import os
+
+from benchmarks.hot_paths_bench import run
+
+
+def test_hot_paths_bench_small_scale():
+    cwd = os.getcwd()
+
+    results = run(scales=["tiny"], min_time=0, sizes={"tiny": 40})
+
+    assert os.getcwd() == cwd
+    assert results["db/upsert_tv_shows/tiny"]["rows_per_sec"] > 0
+    assert results["msgpack/deserialize/tiny"]["size_bytes"] > 0
+    assert {key.rsplit("/", 1)[0] for key in results} == {
+        "parse/tv_show",
+        "parse/media_response",
+        "parse/tv_show_pool",
+        "bad_ids/check_bad_id",
+        "bad_ids/generate_rand_id",
+        "msgpack/serialize",
+        "msgpack/deserialize",
+        "db/upsert_tv_shows",
+        "uuid/get_rand_uuid",
+        "uuid/gen_uuids",
+        "uuid/gen_uuid7s",
+    }
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from benchmarks.load_test import run
+from utils.logger import flush_logging
+
+
+def test_load_test_mock_transport(tmp_log_file: Path):
+    results = run(
+        transport="mock",
+        concurrency_levels=[4],
+        requests=200,
+        error_rate=0.05,
+        rate_limit_rate=0.1,
+        retries=3,
+    )
+
+    result = results["mock/c4"]
+
+    assert result["requests"] == 200
+    assert result["retries"] > 0
+    assert result["errors"] < 5
+    assert result["p50_ms"] <= result["p99_ms"] <= result["max_ms"]
+    assert result["requests_per_sec"] > 0
+
+    flush_logging()
+    assert tmp_log_file.exists(), "Request log lines should go to the test's log file"
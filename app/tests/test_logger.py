@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+import subprocess
+import sys
+
+from core.config import LoggingSetting
+from pydantic import ValidationError
+import pytest
+from utils.logger import (
+    configure_logging,
+    flush_logging,
+    get_log_sampling_stats,
+    get_logger,
+    set_log_sampling,
+)
+
+
+def test_get_logger_is_idempotent():
+    first = get_logger("tests.logger.idempotent")
+    second = get_logger("tests.logger.idempotent", level="DEBUG")
+
+    assert first is second
+    assert len(second.handlers) == 1, "Repeated get_logger() calls must not add handlers"
+    assert second.level == logging.DEBUG
+
+    other = get_logger("tests.logger.other")
+    assert other.handlers[0] is second.handlers[0], "Loggers should share one QueueHandler"
+
+
+def test_records_reach_shared_file(tmp_path: Path):
+    log_file = tmp_path / "logs" / "test.log"
+
+    configure_logging(log_file=str(log_file), console=False)
+
+    try:
+        for name in ("tests.logger.a", "tests.logger.b"):
+            get_logger(name).info("message from %s", name)
+
+        flush_logging()
+
+        lines = log_file.read_text().splitlines()
+    finally:
+        configure_logging()
+
+    assert len(lines) == 2
+    assert "message from tests.logger.a" in lines[0]
+
+
+def test_json_lines_with_sampling(tmp_path: Path):
+    log_file = tmp_path / "logs" / "test.log"
+    log = get_logger("tests.logger.sampled")
+
+    configure_logging(log_file=str(log_file), console=False, log_format="json")
+    sampler = set_log_sampling(log, every_n=10)
+
+    try:
+        for i in range(25):
+            log.info("request %s", i, extra={"tmdb_id": i})
+
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            log.exception("failed")
+
+        flush_logging()
+
+        entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+    finally:
+        set_log_sampling(log, every_n=1)
+        configure_logging()
+
+    assert [e["message"] for e in entries] == ["request 0", "request 10", "request 20", "failed"]
+    assert entries[1]["tmdb_id"] == 10
+    assert entries[1]["suppressed"] == 9
+    assert "ValueError: boom" in entries[-1]["exc"]
+    assert sampler.stats() == {"seen": 26, "passed": 4, "suppressed": 22}
+    assert "tests.logger.sampled" not in get_log_sampling_stats()
+
+
+def test_default_level_resolves_on_first_record():
+    from core.config import get_logging_settings
+
+    log = get_logger("tests.logger.lazy_level")
+    log.debug("first record")
+
+    assert log.level == logging.getLevelName(get_logging_settings().LOG_LEVEL.upper())
+    assert not log.filters, "Level filter should remove itself after resolving"
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "lib.constants",
+        "main",
+        "ingest",
+        "utils.batch_writer",
+        "utils.msgpack_writer",
+        "utils.msgpack_utils",
+        "utils.sync_utils",
+        "utils.media_cache_utils",
+        "utils.pipeline_utils",
+        "utils.parse_pool_utils",
+        "utils.profile_utils",
+    ],
+)
+def test_import_reads_no_settings(module: str):
+    code = (
+        f"import {module}\n"
+        "from core.config import get_api_settings, get_logging_settings\n"
+        "print(get_api_settings.cache_info().currsize, get_logging_settings.cache_info().currsize)"
+    )
+    app_dir = Path(__file__).parent.parent
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=app_dir, capture_output=True, text=True, check=True
+    )
+
+    assert out.stdout.split() == ["0", "0"], f"Importing {module} built a settings object"
+
+
+def test_invalid_log_format_is_reported():
+    with pytest.raises(ValidationError, match="Invalid log format"):
+        LoggingSetting(LOG_FORMAT="xml")
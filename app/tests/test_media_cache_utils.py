@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from domain.models.tmdb.tmdb_media_models import SyncState
+import httpx
+from utils.media_cache_utils import MediaLookupCache
+
+
+def make_client(payloads: dict[int, dict], calls: list[int]) -> httpx.Client:
+    def handler(request: httpx.Request) -> httpx.Response:
+        tmdb_id = int(request.url.path.rsplit("/", 1)[-1])
+        calls.append(tmdb_id)
+
+        if tmdb_id not in payloads:
+            return httpx.Response(404)
+
+        return httpx.Response(200, json=payloads[tmdb_id])
+
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+def expire(session_factory, tmdb_id: int) -> None:
+    with session_factory() as session:
+        state = session.get(SyncState, ("tv", tmdb_id))
+        state.synced_at = state.synced_at - timedelta(days=30)
+        session.commit()
+
+
+def test_fresh_record_skips_network(session_factory, tv_show_dict: dict):
+    calls: list[int] = []
+    tmdb_id = tv_show_dict["id"]
+
+    with make_client({tmdb_id: tv_show_dict}, calls) as client:
+        cache = MediaLookupCache(session_factory=session_factory, client=client)
+
+        assert cache.get_tv_show(tmdb_id).name == tv_show_dict["name"]
+        assert cache.get_tv_show(tmdb_id).name == tv_show_dict["name"]
+        assert cache.get_tv_show(1) is None
+
+        assert calls == [tmdb_id, 1], "A fresh record should be served from the database"
+
+        expire(session_factory, tmdb_id)
+        tv_show_dict["name"] = "Renamed"
+
+        assert cache.get_tv_show(tmdb_id).name == "Renamed"
+        assert cache.stats()["stale_hits"] == 1
+
+        cache.close()
+
+
+def test_stale_while_revalidate(session_factory, tv_show_dict: dict):
+    calls: list[int] = []
+    tmdb_id = tv_show_dict["id"]
+
+    with make_client({tmdb_id: tv_show_dict}, calls) as client:
+        with MediaLookupCache(
+            session_factory=session_factory, client=client, stale_while_revalidate=True
+        ) as cache:
+            cache.get_tv_show(tmdb_id)
+            expire(session_factory, tmdb_id)
+
+            tv_show_dict["name"] = "Renamed"
+
+            assert cache.get_tv_show(tmdb_id).name != "Renamed", "Stale copy should be served"
+
+            cache.wait()
+
+            assert cache.get_tv_show(tmdb_id).name == "Renamed"
+            assert len(calls) == 2
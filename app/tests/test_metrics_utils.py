@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+
+from utils.http_trace_utils import AsyncPhaseTracer, async_trace_event_hooks, new_tracer
+from utils.metrics_utils import MetricsRegistry, endpoint_template, start_metrics_server
+from utils.tmdb_utils import make_request
+
+
+def test_endpoint_template():
+    assert endpoint_template("/3/tv/1399/season/2") == "/tv/{id}/season/{id}"
+    assert endpoint_template("/3/tv/popular") == "/tv/popular"
+
+
+def test_make_request_records_metrics():
+    registry = MetricsRegistry()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"id": 1}, headers={"x-cache": "Hit from cloudfront"})
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        for url in ["https://api.themoviedb.org/3/tv/1", "https://api.themoviedb.org/3/tv/2"]:
+            make_request(url=url, headers={}, client=client, metrics_registry=registry)
+
+    labels = {"endpoint": "/tv/{id}", "method": "GET", "status": "200"}
+    assert registry.get_counter("tmdb_requests_total", labels) == 2
+    assert registry.get_histogram("tmdb_request_duration_seconds", {"endpoint": "/tv/{id}"}).count == 2
+    assert (
+        registry.get_counter(
+            "tmdb_cache_requests_total", {"endpoint": "/tv/{id}", "tier": "cdn", "result": "hit"}
+        )
+        == 2
+    )
+
+    text = registry.render_prometheus()
+    assert "# TYPE tmdb_request_duration_seconds histogram" in text
+    assert 'tmdb_request_duration_seconds_bucket{endpoint="/tv/{id}",le="+Inf"} 2' in text
+
+
+def test_make_request_retries_429():
+    registry = MetricsRegistry()
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"retry-after": "0"})
+
+        return httpx.Response(200, json={})
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        res = make_request(
+            url="https://api.themoviedb.org/3/movie/550",
+            headers={},
+            client=client,
+            retries=2,
+            backoff=0,
+            metrics_registry=registry,
+        )
+
+    assert res.status_code == 200
+    assert len(calls) == 2
+    assert registry.get_counter("tmdb_request_retries_total", {"endpoint": "/movie/{id}"}) == 1
+
+
+def test_metrics_server():
+    registry = MetricsRegistry()
+    registry.record_cache(endpoint="/tv/{id}", tier="db", hit=True)
+
+    server = start_metrics_server(port=0, registry=registry)
+
+    try:
+        host, port = server.server_address[:2]
+        res = httpx.get(f"http://{host}:{port}/metrics")
+    finally:
+        server.shutdown()
+
+    assert res.status_code == 200
+    assert 'tmdb_cache_requests_total{endpoint="/tv/{id}",tier="db",result="hit"} 1' in res.text
+
+
+def test_make_request_phase_timings():
+    ## A real local server, since MockTransport never calls the trace extension
+    server = start_metrics_server(port=0, registry=MetricsRegistry())
+    registry = MetricsRegistry()
+
+    try:
+        host, port = server.server_address[:2]
+
+        with httpx.Client() as client:
+            for _ in range(2):
+                res = make_request(
+                    url=f"http://{host}:{port}/metrics",
+                    headers={},
+                    client=client,
+                    metrics_registry=registry,
+                )
+    finally:
+        server.shutdown()
+
+    assert res.timings.ttfb is not None and res.timings.body is not None
+    assert res.timings.tls is None
+
+    connect = registry.get_histogram(
+        "tmdb_request_phase_seconds", {"endpoint": "/metrics", "phase": "connect"}
+    )
+    ttfb = registry.get_histogram(
+        "tmdb_request_phase_seconds", {"endpoint": "/metrics", "phase": "ttfb"}
+    )
+    assert ttfb.count == 2
+    ## The second request reused the pooled connection
+    assert connect.count == 1
+
+
+def test_async_phase_timings():
+    server = start_metrics_server(port=0, registry=MetricsRegistry())
+
+    async def _get(url: str) -> dict:
+        async with httpx.AsyncClient(event_hooks=async_trace_event_hooks()) as client:
+            tracer = new_tracer(client)
+            res = await client.get(url, extensions={"trace": tracer})
+            await res.aread()
+
+        assert isinstance(tracer, AsyncPhaseTracer)
+
+        return tracer.timings()
+
+    try:
+        host, port = server.server_address[:2]
+        timings = asyncio.run(_get(f"http://{host}:{port}/metrics"))
+    finally:
+        server.shutdown()
+
+    assert timings["connect"] is not None and timings["ttfb"] is not None
+    assert timings["wait"] is not None and timings["wait"] >= 0
+    assert timings["total"] >= timings["ttfb"]
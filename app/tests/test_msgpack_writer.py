@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from pathlib import Path
+import queue
+import threading
+
+import pytest
+from utils.file_utils import atomic_write_bytes, cleanup_temp_files
+from utils.msgpack_utils import msgpack_deserialize
+from utils.msgpack_writer import MsgpackWriter
+
+def test_atomic_write_replaces_file(tmp_path: Path):
+    target = tmp_path / "out.bin"
+
+    atomic_write_bytes(_file=target, data=b"first")
+    atomic_write_bytes(_file=target, data=b"second", fsync=False)
+
+    assert target.read_bytes() == b"second", "Atomic write did not replace file"
+    assert not list(tmp_path.glob("*.tmp")), "Temp file left behind after write"
+
+
+def test_cleanup_temp_files(tmp_path: Path):
+    (tmp_path / ".out.bin.abc123.tmp").write_bytes(b"partial")
+    (tmp_path / "keep.msgpack").write_bytes(b"done")
+
+    assert cleanup_temp_files(_dir=tmp_path) == 1, "Expected 1 temp file removed"
+    assert (tmp_path / "keep.msgpack").exists(), "Completed file was removed"
+
+
+def test_writer_batches_and_writes(tmp_path: Path):
+    records = [{"id": i, "name": f"show {i}"} for i in range(25)]
+
+    with MsgpackWriter(
+        serialize_dir=str(tmp_path), fsync_every=10, batch_size=10
+    ) as writer:
+        paths = [writer.submit(r, filename=f"tv_{r['id']}") for r in records]
+
+    assert writer.items_written == 25, f"Wrote {writer.items_written} of 25 records"
+    assert writer.batches_written >= 3, "Records were not batched by batch_size"
+    assert not writer.errors, f"Writer recorded errors: {writer.errors}"
+
+    for path, record in zip(paths, records):
+        unpacked = msgpack_deserialize(filename=path)
+
+        assert unpacked["success"], unpacked["detail"]["message"]
+        assert unpacked["detail"]["unpacked"] == record, "Round-tripped record differs"
+
+
+def test_writer_flush_waits_for_pending(tmp_path: Path):
+    writer = MsgpackWriter(serialize_dir=str(tmp_path), flush_interval=5)
+    path = writer.submit({"id": 1})
+
+    assert writer.flush(timeout=10), "flush() timed out"
+    assert Path(path).exists(), "Record not on disk after flush()"
+
+    writer.close()
+
+
+def test_writer_backpressure(tmp_path: Path):
+    release = threading.Event()
+
+    class BlockedWriter(MsgpackWriter):
+        def write_batch(self, batch):
+            release.wait(timeout=10)
+
+    writer = BlockedWriter(
+        serialize_dir=str(tmp_path), max_queue_size=1, batch_size=1, flush_interval=0
+    )
+
+    ## First record is taken by the (blocked) writer thread, second fills the queue
+    writer.submit({"id": 1})
+    writer.submit({"id": 2})
+
+    with pytest.raises(queue.Full):
+        writer.submit({"id": 3}, block=False)
+
+    release.set()
+    writer.close()
+
+
+def test_writer_fsyncs_every_file(tmp_path: Path, monkeypatch):
+    import utils.msgpack_writer as msgpack_writer
+
+    file_fsyncs: list[bool] = []
+    dir_fsyncs: list[Path] = []
+    write_temp_bytes = msgpack_writer.write_temp_bytes
+
+    def _write_temp_bytes(_file=None, data=None, fsync=True):
+        file_fsyncs.append(fsync)
+
+        return write_temp_bytes(_file=_file, data=data, fsync=fsync)
+
+    monkeypatch.setattr(msgpack_writer, "write_temp_bytes", _write_temp_bytes)
+    monkeypatch.setattr(msgpack_writer, "fsync_dir", lambda _dir: dir_fsyncs.append(_dir))
+
+    writer = MsgpackWriter(serialize_dir=str(tmp_path), fsync_every=3, batch_size=5)
+
+    for i in range(20):
+        writer.submit({"id": i}, filename=f"tv_{i}")
+        writer.flush()
+
+    writer.close()
+
+    assert file_fsyncs == [True] * 20, "File data renamed into place without fsync"
+    ## 20 single-record batches: a directory fsync every 3rd batch, plus one on close
+    assert len(dir_fsyncs) == 7, f"Expected 7 directory fsyncs, got {len(dir_fsyncs)}"
+    assert writer.files_written == 20
+
+
+def test_writer_close_never_strands_accepted_items():
+    from utils.batch_writer import BaseBatchWriter
+
+    class ListWriter(BaseBatchWriter):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.written: list = []
+
+        def write_batch(self, batch):
+            self.written.extend(batch)
+
+    for _ in range(20):
+        writer = ListWriter(batch_size=8, flush_interval=0, max_queue_size=4)
+        accepted: list[int] = []
+        lock = threading.Lock()
+
+        def _produce(start: int):
+            for i in range(start, start + 200):
+                try:
+                    writer.put(i)
+                except RuntimeError:
+                    return
+
+                with lock:
+                    accepted.append(i)
+
+        producers = [threading.Thread(target=_produce, args=(n * 1000,)) for n in range(4)]
+
+        for producer in producers:
+            producer.start()
+
+        writer.close()
+
+        for producer in producers:
+            producer.join()
+
+        assert sorted(writer.written) == sorted(accepted), "Accepted item was never written"
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import json
+
+from domain.schemas.tmdb.tmdb_media_schemas import MediaTVShow
+from utils.parse_pool_utils import ParsePool
+
+def _raw_shows(show: dict, count: int) -> list[tuple[int, bytes]]:
+    return [(i, json.dumps({**show, "id": i}).encode()) for i in range(1, count + 1)]
+
+
+def test_parse_pool_matches_in_process(tv_show_dict: dict):
+    items = _raw_shows(tv_show_dict, 40)
+    items[6] = (7, b"{not json")
+
+    with ParsePool(media_type="tv", max_workers=2, chunk_size=8, min_pool_batch=16) as pool:
+        pooled = pool.parse(items)
+        small = pool.parse(items[:4])
+
+        assert pool.stats() == {"workers": 2, "pooled": 40, "in_process": 4, "errors": 1}
+
+    assert [parsed.tmdb_id for parsed in pooled] == [i for i in range(1, 41) if i != 7]
+    assert isinstance(small[0].record, MediaTVShow)
+
+    expected = MediaTVShow.parse_obj(pooled[0].payload)
+    record = pooled[0].record
+
+    assert record.tmdb_id == expected.tmdb_id == 1
+    assert [g.id for g in record.genres] == [g.id for g in expected.genres]
+    assert [n.tmdb_id for n in record.networks] == [n.tmdb_id for n in expected.networks]
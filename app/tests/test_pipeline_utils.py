@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from domain.models.tmdb.tmdb_media_models import SyncState, TVShow
+import httpx
+import sqlalchemy as sa
+from utils.pipeline_utils import Pipeline, Stage, ingest
+
+
+def test_pipeline_stages_and_backpressure():
+    totals: list[int] = []
+
+    def _check(n: int) -> int:
+        if n == 13:
+            raise ValueError("unlucky")
+
+        return n
+
+    pipeline = Pipeline(
+        source=range(1, 1001),
+        stages=[
+            Stage(name="double", func=lambda n: n * 2, workers=3, queue_size=5),
+            Stage(name="check", func=lambda n: _check(n // 2), workers=2, queue_size=5),
+            Stage(name="evens", func=lambda n: n if n % 2 == 0 else None, queue_size=5),
+            Stage(name="sum", func=lambda batch: totals.append(sum(batch)), batch_size=50),
+        ],
+        report_interval=None,
+    )
+
+    result = pipeline.run()
+    stages = {stage["stage"]: stage for stage in result.stages}
+
+    assert result.source_items == 1000
+    assert stages["check"]["errors"] == 1
+    assert stages["evens"]["dropped"] == 499
+    assert stages["sum"]["items_in"] == 500
+    assert sum(totals) == sum(range(2, 1001, 2))
+    assert all(stage["queue_depth_max"] <= 5 for stage in result.stages[:3])
+
+
+def test_ingest_tv_shows(session_factory, tv_show_dict: dict):
+    show = tv_show_dict
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        tmdb_id = int(request.url.path.rsplit("/", 1)[-1])
+
+        if tmdb_id % 5 == 0:
+            return httpx.Response(404, json={"status_code": 34})
+
+        return httpx.Response(200, json={**show, "id": tmdb_id})
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        result = ingest(
+            session_factory=session_factory,
+            media_type="tv",
+            tmdb_ids=range(1, 51),
+            headers={},
+            client=client,
+            fetch_workers=4,
+            queue_size=8,
+            write_batch_size=16,
+            report_interval=None,
+        )
+
+    assert result.stages[0]["dropped"] == 10
+    assert result.stages[-1]["items_written"] == 40
+    assert result.stages[-1]["write_errors"] == 0
+
+    with session_factory() as session:
+        assert session.scalar(sa.select(sa.func.count()).select_from(TVShow)) == 40
+        assert session.scalar(sa.select(sa.func.count()).select_from(SyncState)) == 40
+
+
+def test_ingest_parse_processes(session_factory, tv_show_dict: dict):
+    show = tv_show_dict
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        tmdb_id = int(request.url.path.rsplit("/", 1)[-1])
+
+        return httpx.Response(200, json={**show, "id": tmdb_id})
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        result = ingest(
+            session_factory=session_factory,
+            media_type="tv",
+            tmdb_ids=range(1, 101),
+            headers={},
+            client=client,
+            queue_size=50,
+            report_interval=None,
+            parse_processes=2,
+            parse_chunk_size=10,
+        )
+
+    assert [stage["stage"] for stage in result.stages] == ["fetch", "parse", "persist"]
+    assert result.stages[1]["errors"] == 0
+    assert result.stages[-1]["items_written"] == 100
+
+    with session_factory() as session:
+        assert session.scalar(sa.select(sa.func.count()).select_from(TVShow)) == 100
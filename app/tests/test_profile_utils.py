@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import pstats
+
+from core.config import ProfilingSettings
+from pydantic import ValidationError
+import pytest
+from utils.profile_utils import get_active_profiler, profile_stage, profiling
+
+
+def test_profiling_off_is_noop(tmp_path):
+    with profiling(mode="off", output_dir=tmp_path) as profiler:
+        with profile_stage("fetch"):
+            pass
+
+    assert profiler.stages == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profiling_stages(tmp_path):
+    with profiling(mode="all", name="test", output_dir=tmp_path) as profiler:
+        assert get_active_profiler() is profiler
+
+        with profile_stage("fetch"):
+            fetched = [bytes(1024) for _ in range(1000)]
+
+        with profile_stage("parse"):
+            parsed = [len(item) for item in fetched]
+
+    assert get_active_profiler() is None
+    assert [stage.name for stage in profiler.stages] == ["fetch", "parse"]
+
+    fetch = profiler.stages[0]
+    assert fetch.peak_bytes >= 1000 * 1024
+    assert any("test_profile_utils.py" in line for line in fetch.growth)
+
+    assert profiler.memory_report_path.read_text().startswith("== fetch")
+    assert pstats.Stats(str(profiler.pstats_path)).total_calls > 0
+    assert sum(parsed) == 1000 * 1024
+
+
+def test_invalid_profile_mode_is_reported():
+    with pytest.raises(ValidationError, match="Invalid profile mode"):
+        ProfilingSettings(PROFILE_MODE="gpu")
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+from utils.replay_utils import (
+    PackedCassette,
+    ReplayTransport,
+    load_vcr_cassettes,
+    pack_cassette,
+    replay_key,
+)
+
+pytest.importorskip("yaml")
+
+cassette_dir: Path = Path(__file__).parent / "cassettes"
+auth_url: str = "https://api.themoviedb.org/3/authentication"
+
+
+def test_replay_key_sorts_query():
+    assert replay_key("get", "https://x.org/a?b=2&a=1") == "GET https://x.org/a?a=1&b=2"
+
+
+def test_replay_vcr_and_packed(tmp_path):
+    responses = load_vcr_cassettes(cassette_dir)
+
+    with httpx.Client(transport=ReplayTransport(responses)) as client:
+        res = client.get(auth_url)
+
+    assert res.status_code == 200
+    assert res.json()["success"] is True
+    assert "content-encoding" not in res.headers
+
+    pack_path = pack_cassette(responses, tmp_path / "cassettes.pack")
+
+    with PackedCassette(pack_path) as packed:
+        assert len(packed) == len(responses)
+
+        with httpx.Client(transport=ReplayTransport(packed)) as client:
+            assert client.get(auth_url).content == res.content
+
+            with pytest.raises(LookupError):
+                client.get(f"{auth_url}/missing")
+
+
+def test_replay_async_client():
+    transport = ReplayTransport(load_vcr_cassettes(cassette_dir), latency=0.001)
+
+    async def fetch() -> httpx.Response:
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.get(auth_url)
+
+    assert asyncio.run(fetch()).status_code == 200
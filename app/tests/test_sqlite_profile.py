@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from core.database.sqla_sqlite_profile import (
+    SQLiteProfile,
+    deferred_indexes,
+    get_secondary_indexes,
+)
+from core.db import Base, create_base_metadata, get_engine
+
+## Import models so their tables are registered on Base.metadata
+from domain.models.tmdb import tmdb_media_models
+import pytest
+import sqlalchemy as sa
+
+def test_profile_applied_on_connect(tmp_path: Path):
+    engine = get_engine(connection=str(tmp_path / "profile.sqlite"))
+
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        ## synchronous=NORMAL
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+        assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2
+
+    engine.dispose()
+
+
+def test_bulk_load_preset(tmp_path: Path):
+    engine = get_engine(
+        connection=str(tmp_path / "bulk.sqlite"), sqlite_profile="bulk_load"
+    )
+
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 0
+
+    engine.dispose()
+
+
+def test_invalid_profile_values():
+    with pytest.raises(ValueError):
+        SQLiteProfile(synchronous="SOMETIMES")
+
+
+def _index_names(engine: sa.Engine) -> set[str]:
+    inspector = sa.inspect(engine)
+
+    return {
+        index["name"]
+        for table in inspector.get_table_names()
+        for index in inspector.get_indexes(table)
+    }
+
+
+def test_deferred_indexes_rebuilt(tmp_path: Path):
+    engine = get_engine(connection=str(tmp_path / "indexes.sqlite"))
+    create_base_metadata(base_obj=Base, engine=engine)
+
+    expected = {index.name for index in get_secondary_indexes(Base.metadata)}
+
+    with deferred_indexes(engine=engine, metadata_obj=Base.metadata):
+        assert not _index_names(engine) & expected, "Indexes not dropped during load"
+
+    assert expected <= _index_names(engine), "Indexes not rebuilt after load"
+
+    engine.dispose()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from domain.models.tmdb.tmdb_media_models import TVShow
+import httpx
+from utils.sync_utils import get_checkpoint, iter_change_windows, sync_changes
+
+
+class StubTMDB:
+    """Serve /tv/changes and /tv/{id} from in-memory payloads."""
+
+    def __init__(self, shows: dict[int, dict]) -> None:
+        self.shows = shows
+        self.changed: list[int] = list(shows)
+        self.detail_requests: int = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+
+        if path.endswith("/tv/changes"):
+            results = [{"id": _id, "adult": False} for _id in self.changed]
+
+            return httpx.Response(
+                200, json={"results": results, "page": 1, "total_pages": 1}
+            )
+
+        self.detail_requests += 1
+        tmdb_id = int(path.rsplit("/", 1)[-1])
+
+        if tmdb_id not in self.shows:
+            return httpx.Response(404, json={"status_code": 34})
+
+        return httpx.Response(200, json=self.shows[tmdb_id])
+
+
+def test_sync_skips_unchanged_records(session_factory, tv_show_dict: dict):
+    show = tv_show_dict
+    stub = StubTMDB(shows={show["id"]: show})
+    ## An ID in the feed that no longer exists
+    stub.changed.append(999_999_999)
+
+    with httpx.Client(transport=httpx.MockTransport(stub)) as client:
+        first = sync_changes(session_factory=session_factory, media_type="tv", client=client)
+
+        assert (first.written, first.missing, first.failed) == (1, 1, [])
+
+        second = sync_changes(session_factory=session_factory, media_type="tv", client=client)
+
+        assert (second.written, second.unchanged) == (0, 1), "Same payload should skip the write"
+
+        stub.shows[show["id"]] = dict(show, name="Renamed")
+        third = sync_changes(session_factory=session_factory, media_type="tv", client=client)
+
+        assert third.written == 1
+
+    with session_factory() as session:
+        assert session.get(TVShow, show["id"]).name == "Renamed"
+        assert get_checkpoint(session=session, media_type="tv") == third.checkpoint
+
+
+def test_failed_fetch_keeps_checkpoint(session_factory):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/changes"):
+            return httpx.Response(200, json={"results": [{"id": 1}], "total_pages": 1})
+
+        return httpx.Response(500)
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        result = sync_changes(session_factory=session_factory, media_type="movie", client=client)
+
+    assert result.failed == [1]
+    assert result.checkpoint is None
+
+    with session_factory() as session:
+        assert get_checkpoint(session=session, media_type="movie") is None
+
+
+def test_change_windows_fit_tmdb_limit():
+    end = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    windows = list(iter_change_windows(start=end - timedelta(days=30), end=end))
+
+    assert len(windows) == 3
+    assert all((e - s) <= timedelta(days=14) for s, e in windows)
+    assert windows[-1][1] == end.date()
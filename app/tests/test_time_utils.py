@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+from utils.time_utils import TimerRegistry, percentile, timer
+
+
+def test_timer_context_and_decorators(tmp_path: Path):
+    registry = TimerRegistry(report_at_exit=False)
+
+    for _ in range(3):
+        with timer("block", registry=registry) as t:
+            pass
+
+    assert t.elapsed_ns is not None and t.elapsed_ns >= 0
+
+    @timer("sync", registry=registry)
+    def add(a, b):
+        return a + b
+
+    @timer("async", registry=registry)
+    async def double(x):
+        await asyncio.sleep(0)
+        return x * 2
+
+    async def run():
+        async with timer("async_block", registry=registry):
+            return await double(2)
+
+    assert add(1, 2) == 3
+    assert asyncio.run(run()) == 4
+
+    summary = registry.summary()
+
+    assert list(summary) == ["block", "sync", "async", "async_block"]
+    assert summary["block"]["count"] == 3
+    assert summary["async"]["p99_ms"] <= summary["async"]["max_ms"]
+
+    out = registry.export_json(tmp_path / "timings.json")
+    assert json.loads(out.read_text())["sync"]["count"] == 1
+
+
+def test_percentile_interpolates():
+    samples = list(range(1, 101))
+
+    assert percentile(samples, 50) == 50.5
+    assert percentile(samples, 99) == 99.01
+    assert percentile([], 50) == 0.0
+
+
+def test_reservoir_bounds_samples():
+    registry = TimerRegistry(report_at_exit=False, max_samples=100)
+
+    for i in range(1000):
+        registry.record("many", i)
+
+    stats = registry.get("many")
+
+    assert stats.count == 1000
+    assert len(stats.samples) == 100
+    assert stats.max_ns == 999
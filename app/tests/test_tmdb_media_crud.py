@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from domain.models.tmdb.tmdb_media_crud import upsert_movies, upsert_tv_shows
+from domain.models.tmdb.tmdb_media_models import Movie, TVShow
+from domain.schemas.tmdb.tmdb_media_schemas import MediaMovie, MediaTVShow
+import sqlalchemy as sa
+
+
+def test_upsert_tv_show_with_relationships(session_factory, tv_show_dict: dict):
+    show = MediaTVShow.parse_obj(tv_show_dict)
+
+    with session_factory() as session:
+        assert upsert_tv_shows(session=session, shows=[show]) == 1
+        session.commit()
+
+    with session_factory() as session:
+        stored = session.get(TVShow, show.tmdb_id)
+
+        assert stored.name == show.name
+        assert [g.tmdb_id for g in stored.genres] == [g.id for g in show.genres]
+        assert [n.tmdb_id for n in stored.networks] == [
+            n.tmdb_id for n in show.networks
+        ]
+        assert len(stored.seasons) == len(show.seasons)
+
+
+def test_partial_record_keeps_detail_fields(session_factory, tv_show_dict: dict):
+    show = MediaTVShow.parse_obj(tv_show_dict)
+
+    ## Shape of an item on a /tv/popular page
+    popular_item = MediaTVShow.parse_obj(
+        {
+            "id": show.tmdb_id,
+            "name": "Renamed",
+            "popularity": 99.5,
+            "genre_ids": [g.id for g in show.genres],
+        }
+    )
+
+    with session_factory() as session:
+        upsert_tv_shows(session=session, shows=[show])
+        upsert_tv_shows(session=session, shows=[popular_item])
+        session.commit()
+
+    with session_factory() as session:
+        stored = session.get(TVShow, show.tmdb_id)
+
+        assert stored.name == "Renamed"
+        assert stored.popularity == 99.5
+        assert stored.number_of_seasons == show.number_of_seasons
+        assert len(stored.networks) == len(show.networks)
+
+
+def test_bulk_upsert_many_shows(session_factory, tv_show_dict: dict):
+    shows = []
+
+    for i in range(1200):
+        item = dict(tv_show_dict, id=tv_show_dict["id"] + i, seasons=[])
+        shows.append(MediaTVShow.parse_obj(item))
+
+    with session_factory() as session:
+        upsert_tv_shows(session=session, shows=shows, batch_size=500)
+        upsert_tv_shows(session=session, shows=shows, batch_size=500)
+        session.commit()
+
+        count = session.scalar(sa.select(sa.func.count()).select_from(TVShow))
+
+    assert count == 1200
+
+
+def test_upsert_movie(session_factory, movie_dict: dict):
+    movie = MediaMovie.parse_obj(movie_dict)
+
+    with session_factory() as session:
+        upsert_movies(session=session, movies=[movie])
+        session.commit()
+
+    with session_factory() as session:
+        stored = session.get(Movie, movie.tmdb_id)
+
+        assert stored.title == movie.title
+        assert len(stored.genres) == len(movie.genres)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from core.database.sqla_utils import count_queries
+from core.db import Base, create_base_metadata, get_engine, get_session
+from domain.models.tmdb.tmdb_media_crud import upsert_tv_shows
+from domain.models.tmdb.tmdb_media_repository import TVShowRepository
+from domain.schemas.tmdb.tmdb_media_schemas import MediaTVShow
+import pytest
+import sqlalchemy as sa
+
+@pytest.fixture
+def engine(tmp_path: Path, tv_show_dict: dict):
+    engine = get_engine(connection=str(tmp_path / "test.sqlite"))
+    create_base_metadata(base_obj=Base, engine=engine)
+
+    shows = []
+
+    for i in range(120):
+        seasons = [
+            dict(season, id=season["id"] * 1000 + i) for season in tv_show_dict["seasons"]
+        ]
+        shows.append(
+            MediaTVShow.parse_obj(
+                dict(tv_show_dict, id=tv_show_dict["id"] + i, popularity=float(i), seasons=seasons)
+            )
+        )
+
+    with get_session(engine=engine)() as session:
+        upsert_tv_shows(session=session, shows=shows)
+        session.commit()
+
+    yield engine
+
+    engine.dispose()
+
+
+def render(shows, relationships: list[str]) -> None:
+    for show in shows:
+        for name in relationships:
+            for item in getattr(show, name):
+                item.name
+
+
+@pytest.mark.parametrize(
+    "profile,relationships",
+    [
+        ("list", ["genres"]),
+        ("detail", ["genres", "networks", "creators"]),
+        ("full", ["genres", "networks", "creators", "seasons"]),
+    ],
+)
+def test_query_count_is_constant_per_page(engine, profile: str, relationships: list[str]):
+    SessionLocal = get_session(engine=engine)
+    counts = []
+
+    for page_size in (20, 100):
+        with SessionLocal() as session, count_queries(engine) as queries:
+            shows = TVShowRepository(session).list(page_size=page_size, profile=profile)
+            render(shows, relationships)
+
+            assert len(shows) == page_size
+
+        counts.append(len(queries))
+
+    assert counts[0] == counts[1], f"Query count grew with page size: {counts}"
+    assert counts[0] == 1 + len(relationships)
+
+
+def test_lazy_load_raises(engine):
+    with get_session(engine=engine)() as session:
+        show = TVShowRepository(session).list(page_size=1, profile="list")[0]
+
+        with pytest.raises(sa.exc.InvalidRequestError):
+            show.networks
+
+
+def test_get_many_keeps_order(engine):
+    with get_session(engine=engine)() as session:
+        repo = TVShowRepository(session)
+        first_id = repo.list(page_size=1)[0].tmdb_id
+
+        shows = repo.get_many([first_id - 1, 1, first_id], profile="detail")
+
+    assert [s.tmdb_id for s in shows] == [first_id - 1, first_id]
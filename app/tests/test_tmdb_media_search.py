@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from core.db import Base, create_base_metadata, get_engine, get_session
+from domain.models.tmdb.tmdb_media_crud import upsert_movies, upsert_tv_shows
+from domain.models.tmdb.tmdb_media_models import TVShow
+from domain.models.tmdb.tmdb_media_search import (
+    build_fts_query,
+    create_search_index,
+    rebuild_search_index,
+    search_media,
+)
+from domain.schemas.tmdb.tmdb_media_schemas import MediaMovie, MediaTVShow
+import pytest
+import sqlalchemy as sa
+
+@pytest.fixture
+def engine(tmp_path: Path):
+    engine = get_engine(connection=str(tmp_path / "test.sqlite"))
+    create_base_metadata(base_obj=Base, engine=engine)
+
+    yield engine
+
+    engine.dispose()
+
+
+@pytest.fixture
+def media(tv_show_dict: dict, movie_dict: dict) -> tuple[MediaTVShow, MediaMovie]:
+    return MediaTVShow.parse_obj(tv_show_dict), MediaMovie.parse_obj(movie_dict)
+
+
+def test_upserts_update_search_index(engine, media):
+    show, movie = media
+    create_search_index(engine=engine)
+    SessionLocal = get_session(engine=engine)
+
+    with SessionLocal() as session:
+        upsert_tv_shows(session=session, shows=[show])
+        upsert_movies(session=session, movies=[movie])
+        session.commit()
+
+        results = search_media(session=session, query="date with fut")
+        assert [(r.media_type, r.tmdb_id) for r in results] == [("tv", show.tmdb_id)]
+
+        results = search_media(session=session, query="lord", media_type="movie")
+        assert [r.name for r in results] == [movie.title]
+
+        ## Renaming through the upsert path replaces the indexed text
+        renamed = MediaTVShow.parse_obj({"id": show.tmdb_id, "name": "Renamed Show"})
+        upsert_tv_shows(session=session, shows=[renamed])
+        session.commit()
+
+        assert search_media(session=session, query="renamed")[0].tmdb_id == show.tmdb_id
+        assert not search_media(session=session, query="date with fut", media_type="tv")
+
+        session.execute(sa.delete(TVShow))
+        session.commit()
+
+        assert not search_media(session=session, query="renamed")
+
+
+def test_rebuild_indexes_existing_rows(engine, media):
+    show, _ = media
+    SessionLocal = get_session(engine=engine)
+
+    with SessionLocal() as session:
+        upsert_tv_shows(session=session, shows=[show])
+        session.commit()
+
+    create_search_index(engine=engine)
+    rebuild_search_index(engine=engine)
+
+    with SessionLocal() as session:
+        assert search_media(session=session, query="DATE")[0].tmdb_id == show.tmdb_id
+
+
+def test_user_input_is_not_fts_syntax():
+    assert build_fts_query(["lord", "ring"]) == '"lord" "ring"*'
+    assert build_fts_query(["lord"], prefix=False) == '"lord"'
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+import uuid
+
+from utils.uuid_utils import gen_uuid7, gen_uuid7s, gen_uuids, trim_uuid, uuid7_datetime
+
+
+def test_gen_uuids_bulk_v4():
+    uuids = gen_uuids(count=1000)
+
+    assert len(set(uuids)) == 1000
+    assert all(u.version == 4 and u.variant == uuid.RFC_4122 for u in uuids)
+    assert all(len(u) == 32 for u in gen_uuids(count=10, as_hex=True))
+
+    as_str = gen_uuids(count=1, as_str=True)[0]
+    assert str(uuid.UUID(as_str)) == as_str
+
+
+def test_gen_uuid7s_time_ordered():
+    before = datetime.now(timezone.utc) - timedelta(milliseconds=1)
+    uuids = gen_uuid7s(count=5000, as_str=True) + [str(gen_uuid7())]
+
+    assert uuids == sorted(uuids)
+    assert len(set(uuids)) == len(uuids)
+
+    first = uuid.UUID(uuids[0])
+    assert first.version == 7 and first.variant == uuid.RFC_4122
+    assert before <= uuid7_datetime(first) <= datetime.now(timezone.utc)
+
+
+def test_trim_uuid_default_is_not_shared():
+    assert trim_uuid(trim=4) != trim_uuid(trim=4)
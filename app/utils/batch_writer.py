@@ -0,0 +1,308 @@
+"""Background batching writer thread.
+
+A single writer thread consumes items from a bounded queue and hands them
+to write_batch() in groups, either when batch_size items are waiting or when
+flush_interval seconds have passed since the first item of the batch arrived.
+
+Producers only ever touch the queue, so they never block on I/O. When the
+queue is full, put() blocks (or raises queue.Full with block=False), which
+pushes back on producers instead of growing memory without bound.
+
+Child classes implement write_batch(). See utils.msgpack_writer for an example.
+
+Usage:
+
+with SomeWriter(batch_size=500, flush_interval=0.2) as writer:
+    for item in items:
+        writer.put(item)
+"""
+from __future__ import annotations
+
+from collections import deque
+import queue
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+## Sentinels placed on the queue to stop the writer thread, or to end a batch early
+_STOP = object()
+_FLUSH = object()
+
+
+class BaseBatchWriter:
+    """Base class for a single background writer thread.
+
+    Params:
+        batch_size: Maximum number of items passed to a single write_batch() call.
+        flush_interval: Maximum seconds to wait for a batch to fill before writing it.
+        max_queue_size: Bound on pending items. put() blocks when the queue is full.
+        on_batch: Optional callback, called as on_batch(item_count, latency_seconds)
+            after each successful batch.
+        name: Name of the writer thread.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 100,
+        flush_interval: float = 0.2,
+        max_queue_size: int = 1000,
+        on_batch: Optional[Callable[[int, float], None]] = None,
+        name: str = "batch-writer",
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be 1 or greater")
+
+        if flush_interval < 0:
+            raise ValueError("flush_interval must be 0 or greater")
+
+        if max_queue_size < 1:
+            raise ValueError("max_queue_size must be 1 or greater")
+
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_batch = on_batch
+        self.name = name
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._closed: bool = False
+        ## Guards _closed & _putting, so close() can't enqueue _STOP ahead of an
+        #  item a producer is still putting
+        self._state = threading.Condition()
+        self._putting: int = 0
+
+        ## Stats, only written by the writer thread
+        self.batches_written: int = 0
+        self.items_written: int = 0
+        self.errors: list[Exception] = []
+        self.batch_latencies: deque[float] = deque(maxlen=1000)
+
+    def __enter__(self) -> BaseBatchWriter:
+        self.start()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def pending(self) -> int:
+        """Number of items put on the queue but not yet written."""
+        return self._queue.unfinished_tasks
+
+    def start(self) -> None:
+        """Start the writer thread."""
+        if self.is_running:
+            return
+
+        if self._closed:
+            raise RuntimeError(f"Writer [{self.name}] is closed and cannot restart.")
+
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def put(self, item: Any = None, block: bool = True, timeout: float = None) -> None:
+        """Queue an item for the writer thread.
+
+        Blocks while the queue is full. With block=False, or when timeout expires,
+        raises queue.Full instead.
+        """
+        if item is None:
+            raise ValueError("Missing item to write")
+
+        with self._state:
+            if self._closed:
+                raise RuntimeError(f"Writer [{self.name}] is closed.")
+
+            if not self.is_running:
+                self.start()
+
+            self._putting += 1
+
+        try:
+            self._queue.put(item, block=block, timeout=timeout)
+        finally:
+            with self._state:
+                self._putting -= 1
+                self._state.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every item queued so far has been written.
+
+        Writes the batch currently being collected without waiting for
+        flush_interval. Returns False if timeout expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        if not self.is_running:
+            return not self._queue.unfinished_tasks
+
+        try:
+            self._queue.put(_FLUSH, timeout=timeout)
+        except queue.Full:
+            return False
+
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                if not self.is_running:
+                    log.warning(
+                        "Writer [%s] stopped with %s item(s) unwritten.",
+                        self.name,
+                        self._queue.unfinished_tasks,
+                    )
+                    return False
+
+                if deadline is None:
+                    wait_for = 0.1
+                else:
+                    wait_for = min(0.1, deadline - time.monotonic())
+
+                    if wait_for <= 0:
+                        return False
+
+                self._queue.all_tasks_done.wait(timeout=wait_for)
+
+        return True
+
+    def close(self, timeout: float = None) -> None:
+        """Write any remaining items, then stop the writer thread."""
+        with self._state:
+            if self._closed:
+                return
+
+            self._closed = True
+
+            ## The writer thread keeps draining, so in-flight puts finish
+            self._state.wait_for(lambda: self._putting == 0)
+
+        if not self.is_running:
+            return
+
+        self._queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+
+        if self._thread.is_alive():
+            log.warning("Writer [%s] did not stop within %ss.", self.name, timeout)
+
+    def stats(self) -> dict[str, Any]:
+        """Return counters and batch latency figures (in seconds) for this writer.
+
+        Latency figures cover the most recent 1000 batches.
+        """
+        latencies = sorted(self.batch_latencies)
+
+        def _percentile(pct: float) -> float:
+            if not latencies:
+                return 0.0
+
+            return latencies[min(len(latencies) - 1, int(len(latencies) * pct))]
+
+        return {
+            "batches_written": self.batches_written,
+            "items_written": self.items_written,
+            "errors": len(self.errors),
+            "pending": self.pending,
+            "avg_batch_latency": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50_batch_latency": _percentile(0.50),
+            "p95_batch_latency": _percentile(0.95),
+            "max_batch_latency": latencies[-1] if latencies else 0.0,
+        }
+
+    def write_batch(self, batch: list[Any]) -> None:
+        """Write a batch of items. Implemented by child classes."""
+        raise NotImplementedError
+
+    def _record_error(self, exc: Exception) -> None:
+        self.errors.append(exc)
+
+    def _collect_batch(self) -> tuple[list[Any], bool]:
+        """Block for the first item, then gather more until full or the window closes.
+
+        Returns the batch and whether the stop sentinel was seen.
+        """
+        first = self._queue.get()
+
+        if first is _STOP:
+            return [], True
+
+        if first is _FLUSH:
+            self._queue.task_done()
+            return [], False
+
+        batch: list[Any] = [first]
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if item is _STOP:
+                return batch, True
+
+            if item is _FLUSH:
+                self._queue.task_done()
+                break
+
+            batch.append(item)
+
+        return batch, False
+
+    def _run(self) -> None:
+        stop: bool = False
+
+        while not stop:
+            batch, stop = self._collect_batch()
+
+            if batch:
+                start = time.perf_counter()
+
+                try:
+                    self.write_batch(batch)
+
+                    latency = time.perf_counter() - start
+
+                    self.batches_written += 1
+                    self.items_written += len(batch)
+                    self.batch_latencies.append(latency)
+
+                    log.debug(
+                        "Writer [%s] wrote batch of %s item(s) in %.1fms",
+                        self.name,
+                        len(batch),
+                        latency * 1000,
+                    )
+
+                    if self.on_batch:
+                        self.on_batch(len(batch), latency)
+
+                except Exception as exc:
+                    log.error(
+                        "Unhandled exception in writer [%s] writing batch of %s item(s). Details: %s",
+                        self.name,
+                        len(batch),
+                        exc,
+                        exc_info=True,
+                    )
+                    self._record_error(exc)
+
+                for _ in batch:
+                    self._queue.task_done()
+
+            if stop:
+                ## Mark the stop sentinel done
+                self._queue.task_done()
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
+import tempfile
 from typing import Union
 
+## Suffix for in-flight files written by atomic_write_bytes()
+tmp_suffix: str = ".tmp"
+
+
 def check_file_exist(create: bool = True, _file: Union[str, Path] = None) -> bool:
     """Check if a file exists.
 
@@ -44,3 +50,140 @@ def check_file_exist(create: bool = True, _file: Union[str, Path] = None) -> boo
                 return False
 
     return True
+
+
+def fsync_dir(_dir: Union[str, Path] = None) -> None:
+    """Flush a directory entry to disk.
+
+    After renaming a file into place, the rename itself is only durable once
+    the parent directory is fsync'd. Windows does not support opening a
+    directory for fsync, so this is a no-op there.
+    """
+    if not _dir:
+        raise ValueError("Missing a directory path")
+
+    if os.name == "nt":
+        return
+
+    dir_fd = os.open(str(_dir), os.O_RDONLY)
+
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def write_temp_bytes(
+    _file: Union[str, Path] = None, data: bytes = None, fsync: bool = True
+) -> Path:
+    """Write bytes to a hidden temporary file next to _file, optionally fsync'd.
+
+    Returns the temp file's path. Move it into place with os.replace(); the
+    temp file is removed if the write fails.
+    """
+    if not _file:
+        raise ValueError("Missing a file name/path")
+
+    if data is None:
+        raise ValueError("Missing bytes to write")
+
+    if not isinstance(_file, Path):
+        _file = Path(_file)
+
+    _file.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=str(_file.parent), prefix=f".{_file.name}.", suffix=tmp_suffix
+    )
+
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(data)
+
+            if fsync:
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+
+    except Exception:
+        ## Never leave the temp file behind on a failed write
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+
+        raise
+
+    return Path(tmp_path)
+
+
+def atomic_write_bytes(
+    _file: Union[str, Path] = None, data: bytes = None, fsync: bool = True
+) -> Path:
+    """Write bytes to a file atomically.
+
+    Data is written to a hidden temporary file in the destination's directory,
+    optionally fsync'd, then renamed over the destination with os.replace().
+    Readers (and a process restarted after a crash) see either the previous
+    file or the complete new one, never a partially written file.
+
+    Leftover temporary files from a crash can be removed with cleanup_temp_files().
+    """
+    if not _file:
+        raise ValueError("Missing a file name/path")
+
+    if data is None:
+        raise ValueError("Missing bytes to write")
+
+    if not isinstance(_file, Path):
+        _file = Path(_file)
+
+    try:
+        tmp_path = write_temp_bytes(_file=_file, data=data, fsync=fsync)
+    except Exception as exc:
+        raise Exception(
+            f"Unhandled exception writing file atomically: {_file}. Details: {exc}"
+        )
+
+    try:
+        os.replace(tmp_path, _file)
+
+    except Exception as exc:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+
+        raise Exception(
+            f"Unhandled exception writing file atomically: {_file}. Details: {exc}"
+        )
+
+    if fsync:
+        fsync_dir(_file.parent)
+
+    return _file
+
+
+def cleanup_temp_files(_dir: Union[str, Path] = None) -> int:
+    """Remove temporary files left behind by an interrupted atomic_write_bytes().
+
+    Returns the number of files removed.
+    """
+    if not _dir:
+        raise ValueError("Missing a directory path")
+
+    if not isinstance(_dir, Path):
+        _dir = Path(_dir)
+
+    if not _dir.exists():
+        return 0
+
+    removed: int = 0
+
+    for tmp_file in _dir.glob(f".*{tmp_suffix}"):
+        try:
+            tmp_file.unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass
+
+    return removed
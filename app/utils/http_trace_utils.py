@@ -0,0 +1,153 @@
+"""Per-phase HTTP request timings from httpx's "trace" extension.
+
+httpx passes the "trace" request extension down to httpcore, which calls it
+as each phase of a request starts and completes. PhaseTracer records those
+events and reduces them to durations, in seconds:
+
+    connect: TCP connect, including the DNS lookup (httpcore resolves the
+             host inside connect_tcp, so the two cannot be told apart)
+    tls:     TLS handshake
+    send:    writing the request headers & body
+    ttfb:    request sent -> response headers received (server time + 1 RTT)
+    body:    reading the response body
+    wait:    client hands off the request -> first transport event, i.e.
+             time spent waiting for a pooled connection. Needs the event
+             hooks below; None without them.
+    total:   first event -> last event
+
+connect and tls are None when the request reused a pooled connection. A high
+share of connect/tls points at connection setup (pool/reuse clients), a high
+wait at a pool that is too small, a high ttfb at the server, and a high body
+time at bandwidth.
+
+httpcore calls the trace extension synchronously for httpx.Client and awaits
+it for httpx.AsyncClient, so async requests need an AsyncPhaseTracer
+(new_tracer() picks the right one for a client).
+
+trace_event_hooks()/async_trace_event_hooks() return httpx event hooks that
+stamp the request's tracer when the client sends it and when response headers
+arrive. They add the "wait" phase, and stretch "total" to cover the time
+before the transport sees the request.
+
+Usage:
+
+tracer = PhaseTracer()
+res = client.get(url, extensions={"trace": tracer})
+tracer.timings()  # {"connect": 0.012, "tls": 0.031, ..., "total": 0.094}
+
+async with httpx.AsyncClient(event_hooks=async_trace_event_hooks()) as client:
+    tracer = new_tracer(client)
+    res = await client.get(url, extensions={"trace": tracer})
+"""
+from __future__ import annotations
+
+import time
+
+from typing import Any, Awaitable, Callable, Optional, Union
+
+import httpx
+
+## phase -> (start event, end event). Event names have their "connection."/
+#  "http11."/"http2." prefix removed.
+phase_events: dict[str, tuple[str, str]] = {
+    "connect": ("connect_tcp.started", "connect_tcp.complete"),
+    "tls": ("start_tls.started", "start_tls.complete"),
+    "send": ("send_request_headers.started", "send_request_body.complete"),
+    "ttfb": ("send_request_body.complete", "receive_response_headers.complete"),
+    "body": ("receive_response_body.started", "receive_response_body.complete"),
+}
+
+phase_names: list[str] = list(phase_events) + ["wait", "total"]
+
+## Events stamped by the event hooks, not by httpcore
+hook_request_event: str = "hook.request"
+hook_response_event: str = "hook.response"
+
+
+class PhaseTracer:
+    """Callable for httpx's "trace" extension, recording when each event fired."""
+
+    def __init__(self) -> None:
+        ## event name -> time.perf_counter() of its first occurrence
+        self.events: dict[str, float] = {}
+
+    def __call__(self, event_name: str, info: dict[str, Any]) -> None:
+        event = event_name.split(".", 1)[-1]
+        self.events.setdefault(event, time.perf_counter())
+
+    def timings(self) -> dict[str, Optional[float]]:
+        """Return {phase: seconds} for every phase; None where the phase did not happen."""
+        timings: dict[str, Optional[float]] = {}
+
+        for phase, (start, end) in phase_events.items():
+            if start in self.events and end in self.events:
+                timings[phase] = self.events[end] - self.events[start]
+            else:
+                timings[phase] = None
+
+        transport_stamps = [
+            stamp
+            for event, stamp in self.events.items()
+            if event not in (hook_request_event, hook_response_event)
+        ]
+
+        if hook_request_event in self.events and transport_stamps:
+            timings["wait"] = min(transport_stamps) - self.events[hook_request_event]
+        else:
+            timings["wait"] = None
+
+        stamps = list(self.events.values())
+        timings["total"] = max(stamps) - min(stamps) if stamps else None
+
+        return timings
+
+    def stamp(self, event: str = None) -> None:
+        """Record an event by hand (i.e. from an event hook)."""
+        self.events.setdefault(event, time.perf_counter())
+
+
+class AsyncPhaseTracer(PhaseTracer):
+    """PhaseTracer for httpx.AsyncClient, where httpcore awaits the trace callback."""
+
+    async def __call__(self, event_name: str, info: dict[str, Any]) -> None:
+        event = event_name.split(".", 1)[-1]
+        self.events.setdefault(event, time.perf_counter())
+
+
+def new_tracer(client: Union[httpx.Client, httpx.AsyncClient] = None) -> PhaseTracer:
+    """Return a tracer matching the client: AsyncPhaseTracer for an AsyncClient."""
+    if isinstance(client, httpx.AsyncClient):
+        return AsyncPhaseTracer()
+
+    return PhaseTracer()
+
+
+def _stamp_request(request: httpx.Request) -> None:
+    tracer = request.extensions.get("trace")
+
+    if isinstance(tracer, PhaseTracer):
+        tracer.stamp(hook_request_event)
+
+
+def _stamp_response(response: httpx.Response) -> None:
+    tracer = response.request.extensions.get("trace")
+
+    if isinstance(tracer, PhaseTracer):
+        tracer.stamp(hook_response_event)
+
+
+def trace_event_hooks() -> dict[str, list[Callable[[Any], None]]]:
+    """Event hooks for httpx.Client(event_hooks=...) that stamp a request's PhaseTracer."""
+    return {"request": [_stamp_request], "response": [_stamp_response]}
+
+
+def async_trace_event_hooks() -> dict[str, list[Callable[[Any], Awaitable[None]]]]:
+    """Event hooks for httpx.AsyncClient(event_hooks=...) that stamp a request's tracer."""
+
+    async def _async_stamp_request(request: httpx.Request) -> None:
+        _stamp_request(request)
+
+    async def _async_stamp_response(response: httpx.Response) -> None:
+        _stamp_response(response)
+
+    return {"request": [_async_stamp_request], "response": [_async_stamp_response]}
@@ -1,12 +1,46 @@
+"""App logging.
+
+Loggers from get_logger() do no I/O on the calling thread. Each one has the
+same QueueHandler, which puts records on an in-memory queue. A single
+QueueListener thread takes records off the queue and writes them to the
+shared handlers (stdout and one rotating file handler on logs/app.log).
+
+Handlers are configured once per process. get_logger() can be called any
+number of times for the same name without duplicating handlers. Call
+configure_logging() to change the log file or handlers; loggers already
+created pick up the change, since they only hold the QueueHandler.
+
+Pending records are written at interpreter exit. flush_logging() blocks
+until the queue is drained, i.e. before reading the log file in a test.
+
+Structured logs:
+    configure_logging(log_format="json") (or LOG_FORMAT=json) writes one JSON
+    object per line, with any extra={...} fields as keys.
+
+Sampling:
+    set_log_sampling("utils.tmdb_utils.requests", every_n=100) passes 1 in
+    100 records from a logger, plus every WARNING and above. Dropped records
+    are counted (get_log_sampling_stats()), and the next record that passes
+    carries the number dropped before it as "suppressed".
+
+Log with %-style arguments, i.e. log.info("Requesting %s", url), so the
+message is only formatted for records that are actually written.
+"""
 from __future__ import annotations
 
+import atexit
+import copy
+from datetime import datetime, timezone
+import json
 import logging
 
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+import queue
 import sys
+import threading
 import time
-from typing import Any, Union
+from typing import Any, Optional, Union
 
 from pydantic import BaseModel, BaseSettings, Field, ValidationError, validator
 
@@ -41,6 +75,22 @@ def ensure_log_file(log_file: str = default_log_file):
         return True
 
 
+class LazyRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that creates its log directory on the first write.
+
+    Opened with delay=True, so creating a logger does not touch the filesystem.
+    """
+
+    def __init__(self, filename, *args, **kwargs) -> None:
+        kwargs["delay"] = True
+        super().__init__(filename, *args, **kwargs)
+
+    def _open(self):
+        ensure_log_file(self.baseFilename)
+
+        return super()._open()
+
+
 class LoggerConfig(BaseModel):
     format: str = Field(default=default_fmt)
     datefmt: str = Field(default=default_date_fmt)
@@ -84,38 +134,390 @@ class FileLogger(BaseLogger):
     backup_count: int = 3
 
 
-def get_console_handler():
+## LogRecord attributes that are not extra={...} fields
+_record_attrs: frozenset[str] = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None))
+) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "func": record.funcName,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+        }
+
+        for key, value in vars(record).items():
+            if key not in _record_attrs and not key.startswith("_"):
+                entry[key] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def get_formatter(log_format: str = "text", fmt: str = default_fmt) -> logging.Formatter:
+    """Return the formatter for a log format ("text" or "json")."""
+    if log_format == "json":
+        return JsonFormatter()
+
+    if log_format == "text":
+        return logging.Formatter(fmt=fmt, datefmt=default_date_fmt)
+
+    raise ValueError(f"Invalid log format: {log_format}. Must be 'text' or 'json'")
+
+
+class SamplingFilter(logging.Filter):
+    """Pass 1 in every_n records, and every record at always_level or above.
+
+    max_per_second optionally caps passed records per second on top of
+    every_n (records at always_level or above are never dropped). Dropped
+    records are counted; the next passed record gets the count since the
+    last passed record as record.suppressed.
+    """
+
+    def __init__(
+        self,
+        every_n: int = 1,
+        max_per_second: float = None,
+        always_level: int = logging.WARNING,
+    ) -> None:
+        super().__init__()
+
+        if every_n < 1:
+            raise ValueError("every_n must be 1 or greater")
+
+        self.every_n = every_n
+        self.max_per_second = max_per_second
+        self.always_level = always_level
+
+        self.seen = 0
+        self.passed = 0
+        self.suppressed = 0
+        self._pending_suppressed = 0
+
+        self._window_start = 0.0
+        self._window_count = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        with self._lock:
+            self.seen += 1
+
+            if record.levelno < self.always_level and not self._sample():
+                self.suppressed += 1
+                self._pending_suppressed += 1
+
+                return False
+
+            self.passed += 1
+
+            if self._pending_suppressed:
+                record.suppressed = self._pending_suppressed
+                self._pending_suppressed = 0
+
+        return True
+
+    def _sample(self) -> bool:
+        if (self.seen - 1) % self.every_n:
+            return False
+
+        if self.max_per_second is None:
+            return True
+
+        now = time.monotonic()
+
+        if now - self._window_start >= 1.0:
+            self._window_start = now
+            self._window_count = 0
+
+        if self._window_count >= self.max_per_second:
+            return False
+
+        self._window_count += 1
+
+        return True
+
+    def stats(self) -> dict[str, int]:
+        return {"seen": self.seen, "passed": self.passed, "suppressed": self.suppressed}
+
+
+class StdoutHandler(logging.StreamHandler):
+    """StreamHandler writing to whatever sys.stdout is at emit time.
+
+    The listener outlives any one redirect of sys.stdout (i.e. pytest's
+    capture), so it must not hold on to the stream it was created with.
+    """
+
+    def __init__(self) -> None:
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+
+def get_console_handler(log_format: str = "text"):
     console_config = ConsoleLogger()
 
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(console_config.formatter)
+    console_handler = StdoutHandler()
+
+    if log_format == "text":
+        console_handler.setFormatter(console_config.formatter)
+    else:
+        console_handler.setFormatter(get_formatter(log_format))
 
     return console_handler
 
 
-def get_file_handler():
-    file_config = FileLogger(log_file=default_log_file)
+def get_file_handler(log_file: str = default_log_file, log_format: str = "text"):
+    file_config = FileLogger(log_file=log_file)
 
     ## If using TimedRotatingFileHandler, replace maxBytes & backupCount with: when=file_config.ROTATE_WHEN,
-    file_handler = RotatingFileHandler(
+    file_handler = LazyRotatingFileHandler(
         file_config.log_file,
         maxBytes=file_config.max_bytes,
         backupCount=file_config.backup_count,
     )
-    file_handler.setFormatter(file_config.formatter)
+
+    if log_format == "text":
+        file_handler.setFormatter(file_config.formatter)
+    else:
+        file_handler.setFormatter(get_formatter(log_format))
 
     return file_handler
 
 
-def get_logger(logger_name, level="INFO"):
-    ensure_log_file()
+class LazyQueueHandler(QueueHandler):
+    """QueueHandler that starts the listener thread on the first record.
+
+    Creating loggers (i.e. at import) does not start a thread.
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if _listener is None:
+            get_log_listener()
+
+        super().emit(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merge args into the message, keeping the traceback in exc_text.
+
+        The stdlib version folds the traceback into msg, which would leave the
+        JSON formatter nothing to put in its "exc" key.
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
 
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exc_formatter.formatException(record.exc_info)
+
+            record.exc_info = None
+
+        return record
+
+
+_exc_formatter = logging.Formatter()
+
+## Shared by every logger. The queue is unbounded, so logging never blocks
+#  the caller; task_done() calls from the listener make flush_logging() work.
+_log_queue: queue.Queue = queue.Queue(-1)
+_queue_handler: QueueHandler = LazyQueueHandler(_log_queue)
+_listener: Optional[QueueListener] = None
+_lock = threading.RLock()
+
+## Logger name -> SamplingFilter installed by set_log_sampling()
+_sampling_filters: dict[str, SamplingFilter] = {}
+
+
+def configure_logging(
+    log_file: Optional[str] = default_log_file,
+    console: bool = True,
+    log_format: str = None,
+) -> QueueListener:
+    """(Re)build the shared handlers and start the listener thread.
+
+    Params:
+        log_file: Path of the rotating log file. None disables file logging.
+        console: Write records to stdout.
+        log_format: "text" or "json". Defaults to the LOG_FORMAT setting.
+
+    Any running listener is drained and stopped first, so this can be called
+    again to reconfigure. Returns the running QueueListener.
+    """
+    global _listener
+
+    if log_format is None:
+        ## Imported here; core.config is not needed until the first record
+        from core.config import get_logging_settings
+
+        log_format = get_logging_settings().LOG_FORMAT
+
+    handlers: list[logging.Handler] = []
+
+    if console:
+        handlers.append(get_console_handler(log_format=log_format))
+
+    if log_file:
+        handlers.append(get_file_handler(log_file=str(log_file), log_format=log_format))
+
+    with _lock:
+        stop_logging()
+
+        _listener = QueueListener(_log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+    return _listener
+
+
+def get_log_listener() -> QueueListener:
+    """Return the running QueueListener, starting it with defaults if needed."""
+    with _lock:
+        if _listener is None:
+            return configure_logging()
+
+        return _listener
+
+
+def flush_logging() -> None:
+    """Block until every queued record has been handled."""
+    listener = get_log_listener()
+
+    _log_queue.join()
+
+    for handler in listener.handlers:
+        handler.flush()
+
+
+def stop_logging() -> None:
+    """Write any queued records, stop the listener, and close its handlers."""
+    global _listener
+
+    with _lock:
+        if _listener is None:
+            return
+
+        _listener.stop()
+
+        for handler in _listener.handlers:
+            handler.close()
+
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+## Level of a get_logger(level=None) logger until its first record (passes everything)
+_unresolved_level: int = 1
+
+
+class _SettingsLevelFilter(logging.Filter):
+    """Set a logger's level from LOG_LEVEL on its first record, then remove itself.
+
+    Installed by get_logger(level=None), so creating the logger (i.e. at
+    import) does not read the logging settings. A level set with
+    logger.setLevel() in the meantime is kept.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        ## Imported here; core.config is not needed until the first record
+        from core.config import get_logging_settings
+
+        logger = logging.getLogger(record.name)
+        ## Rebind, not removeFilter(): Filterer.filter() is iterating the current list
+        logger.filters = [f for f in logger.filters if f is not self]
+
+        if logger.level == _unresolved_level:
+            logger.setLevel(get_logging_settings().LOG_LEVEL.upper())
+
+        return record.levelno >= logger.level
+
+
+def get_logger(logger_name, level: Optional[str] = None):
+    """Return a logger that writes through the shared queue.
+
+    Safe to call repeatedly for the same name; the logger gets the shared
+    QueueHandler once. level is updated on every call. With level=None the
+    logger uses the LOG_LEVEL setting, read when the first record is logged.
+    """
     logger = logging.getLogger(logger_name)
-    logger.setLevel(level.upper())
-    logger.addHandler(get_console_handler())
-    logger.addHandler(get_file_handler())
+
+    for _filter in [f for f in logger.filters if isinstance(f, _SettingsLevelFilter)]:
+        logger.removeFilter(_filter)
+
+    if level is None:
+        logger.setLevel(_unresolved_level)
+        logger.addFilter(_SettingsLevelFilter())
+    else:
+        logger.setLevel(level.upper())
+
+    if _queue_handler not in logger.handlers:
+        logger.addHandler(_queue_handler)
 
     ## Propagate error up to parent
     logger.propagate = False
 
-    return logger
\ No newline at end of file
+    return logger
+
+
+def set_log_sampling(
+    logger: Union[logging.Logger, str] = None,
+    every_n: int = 1,
+    max_per_second: float = None,
+    always_level: int = logging.WARNING,
+) -> Optional[SamplingFilter]:
+    """Sample a logger's records; see SamplingFilter.
+
+    Replaces any sampling already set on the logger. every_n=1 with no
+    max_per_second removes sampling and returns None. The filter runs on the
+    calling thread, before the record is queued or its message formatted.
+    """
+    if logger is None:
+        raise ValueError("Missing logger (or logger name) to sample.")
+
+    if isinstance(logger, str):
+        logger = logging.getLogger(logger)
+
+    with _lock:
+        old = _sampling_filters.pop(logger.name, None)
+
+        if old is not None:
+            logger.removeFilter(old)
+
+        if every_n == 1 and max_per_second is None:
+            return None
+
+        _filter = SamplingFilter(
+            every_n=every_n, max_per_second=max_per_second, always_level=always_level
+        )
+        logger.addFilter(_filter)
+        _sampling_filters[logger.name] = _filter
+
+    return _filter
+
+
+def get_log_sampling_stats() -> dict[str, dict[str, int]]:
+    """Return {logger name: {seen, passed, suppressed}} for every sampled logger."""
+    with _lock:
+        return {name: _filter.stats() for name, _filter in _sampling_filters.items()}
@@ -0,0 +1,254 @@
+"""Read-through database cache for TMDB show & movie lookups.
+
+MediaLookupCache.get_tv_show()/get_movie() return the stored record when it
+was fetched less than max_age ago, and only call the API on a miss or a
+stale record. Fetched payloads are written back through
+utils.sync_utils.store_payloads(), so the cache and the incremental sync
+share one copy of each record (SyncState.payload/synced_at).
+
+With stale_while_revalidate=True, a stale record is returned immediately
+and refreshed on a background thread. Concurrent lookups of the same stale
+ID schedule one refresh, not one each. If a refresh fails, the stale record
+keeps being served until a fetch succeeds.
+
+Usage:
+
+with MediaLookupCache(
+    session_factory=SessionLocal, max_age=timedelta(hours=6), stale_while_revalidate=True
+) as cache:
+    show = cache.get_tv_show(tmdb_id=1399)
+"""
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import timedelta
+import threading
+
+from typing import Optional, Union
+
+import httpx
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+from domain.models.tmdb.tmdb_media_models import SyncState
+from domain.schemas.tmdb.tmdb_media_schemas import MediaMovie, MediaTVShow
+from sqlalchemy.orm import Session, sessionmaker
+from utils.metrics_utils import MetricsRegistry, metrics
+from utils.msgpack_utils import msgpack_loads
+from utils.sync_utils import (
+    as_utc,
+    content_hash,
+    detail_fetchers,
+    media_schemas,
+    store_payloads,
+    utcnow,
+    validate_media_type,
+)
+
+
+class MediaLookupCache:
+    """Serve show/movie lookups from the database, fetching only when stale.
+
+    Params:
+        session_factory: A sessionmaker, i.e. from core.db.get_session().
+        max_age: How long a stored record is served without re-fetching.
+        stale_while_revalidate: Return stale records immediately and refresh
+            them in the background, instead of waiting on the fetch.
+        headers: Request headers. Defaults to the API read key.
+        client: httpx.Client to fetch with. One is created (and closed by
+            close()) if not passed.
+        max_workers: Background refresh threads.
+        metrics_registry: Registry cache hits/misses are recorded in (tier "db").
+            Defaults to utils.metrics_utils.metrics.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker[Session] = None,
+        max_age: Union[timedelta, int, float] = timedelta(days=1),
+        stale_while_revalidate: bool = False,
+        headers: dict = None,
+        client: httpx.Client = None,
+        max_workers: int = 4,
+        metrics_registry: MetricsRegistry = None,
+    ) -> None:
+        if session_factory is None:
+            raise ValueError("Missing a sessionmaker to cache lookups in.")
+
+        if not isinstance(max_age, timedelta):
+            max_age = timedelta(seconds=max_age)
+
+        self.session_factory = session_factory
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+        self.headers = headers
+        self.max_workers = max_workers
+        self.metrics_registry = metrics_registry or metrics
+
+        self._owns_client = client is None
+        self.client = client or httpx.Client()
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._refreshing: dict[tuple[str, int], Future] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get_tv_show(self, tmdb_id: int = None) -> Optional[MediaTVShow]:
+        """Return a TV show, or None if TMDB has no show with this ID."""
+        return self.get_media(media_type="tv", tmdb_id=tmdb_id)
+
+    def get_movie(self, tmdb_id: int = None) -> Optional[MediaMovie]:
+        """Return a movie, or None if TMDB has no movie with this ID."""
+        return self.get_media(media_type="movie", tmdb_id=tmdb_id)
+
+    def get_media(
+        self, media_type: str = None, tmdb_id: int = None
+    ) -> Optional[Union[MediaTVShow, MediaMovie]]:
+        validate_media_type(media_type)
+
+        if not tmdb_id:
+            raise ValueError("Missing TMDB ID")
+
+        tmdb_id = int(tmdb_id)
+        schema = media_schemas[media_type]
+
+        with self.session_factory() as session:
+            state = session.get(SyncState, (media_type, tmdb_id))
+
+        endpoint = f"/{media_type}/{{id}}"
+
+        if state is None or state.payload is None:
+            self.misses += 1
+            self.metrics_registry.record_cache(endpoint=endpoint, tier="db", hit=False)
+            payload = self.refresh(media_type=media_type, tmdb_id=tmdb_id)
+
+            return schema.parse_obj(payload) if payload is not None else None
+
+        stored = schema.parse_obj(msgpack_loads(state.payload))
+
+        if utcnow() - as_utc(state.synced_at) <= self.max_age:
+            self.hits += 1
+            self.metrics_registry.record_cache(endpoint=endpoint, tier="db", hit=True)
+
+            return stored
+
+        self.stale_hits += 1
+        ## A stale record still costs a fetch, now or in the background
+        self.metrics_registry.record_cache(endpoint=endpoint, tier="db", hit=False)
+
+        if self.stale_while_revalidate:
+            self._schedule_refresh(media_type=media_type, tmdb_id=tmdb_id)
+
+            return stored
+
+        try:
+            payload = self.refresh(media_type=media_type, tmdb_id=tmdb_id)
+        except Exception as exc:
+            log.warning(
+                "Serving stale %s [%s]; refresh failed. Details: %s", media_type, tmdb_id, exc
+            )
+
+            return stored
+
+        return schema.parse_obj(payload) if payload is not None else None
+
+    def refresh(self, media_type: str = None, tmdb_id: int = None) -> Optional[dict]:
+        """Fetch a record from the API and store it. Returns the payload, or None on 404."""
+        res = detail_fetchers[media_type](
+            headers=self.headers, tmdb_id=tmdb_id, client=self.client
+        )
+
+        if res.status_code == 404:
+            return None
+
+        if not res.is_success:
+            raise Exception(
+                f"Unable to fetch {media_type} [{tmdb_id}]. [{res.status_code}: {res.reason_phrase}]"
+            )
+
+        payload = res.text_json()
+
+        with self.session_factory() as session:
+            try:
+                state = session.get(SyncState, (media_type, tmdb_id))
+
+                if state is not None and state.content_hash == content_hash(payload):
+                    ## Unchanged; only mark the record fresh again
+                    state.synced_at = utcnow()
+                else:
+                    store_payloads(session=session, media_type=media_type, payloads=[payload])
+
+                session.commit()
+            except Exception as exc:
+                session.rollback()
+                raise Exception(
+                    f"Unhandled exception storing {media_type} [{tmdb_id}]. Details: {exc}"
+                )
+
+        return payload
+
+    def _schedule_refresh(self, media_type: str = None, tmdb_id: int = None) -> Future:
+        key = (media_type, tmdb_id)
+
+        with self._lock:
+            future = self._refreshing.get(key)
+
+            if future is not None:
+                return future
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="media-cache"
+                )
+
+            future = self._executor.submit(self._background_refresh, media_type, tmdb_id)
+            self._refreshing[key] = future
+
+        return future
+
+    def _background_refresh(self, media_type: str, tmdb_id: int) -> None:
+        try:
+            self.refresh(media_type=media_type, tmdb_id=tmdb_id)
+        except Exception as exc:
+            log.warning(
+                "Background refresh of %s [%s] failed. Details: %s", media_type, tmdb_id, exc
+            )
+        finally:
+            with self._lock:
+                self._refreshing.pop((media_type, tmdb_id), None)
+
+    def wait(self) -> None:
+        """Block until every scheduled background refresh has finished."""
+        with self._lock:
+            futures = list(self._refreshing.values())
+
+        for future in futures:
+            future.result()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshing": len(self._refreshing),
+        }
+
+    def close(self) -> None:
+        """Finish background refreshes and release the HTTP client."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+        if self._owns_client:
+            self.client.close()
+
+    def __enter__(self) -> "MediaLookupCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
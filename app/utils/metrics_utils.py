@@ -0,0 +1,341 @@
+"""In-process request metrics with a Prometheus text exporter.
+
+utils.tmdb_utils.make_request() records every request into the default
+registry (metrics), labelled by endpoint template, so /tv/1399 and /tv/60059
+are both counted as /tv/{id}:
+
+    tmdb_requests_total{endpoint,method,status}   requests by status code
+    tmdb_request_duration_seconds{endpoint}       latency histogram
+    tmdb_request_phase_seconds{endpoint,phase}    per-phase latency histogram
+        (connect/tls/send/ttfb/body, see utils.http_trace_utils)
+    tmdb_response_bytes_total{endpoint}           response body bytes
+    tmdb_request_retries_total{endpoint}          retried attempts
+    tmdb_cache_requests_total{endpoint,tier,result}
+        cache lookups by tier ("db" for MediaLookupCache, "cdn" from
+        TMDB's x-cache response header) and result ("hit"/"miss")
+
+Export with render_prometheus() (text), write_prometheus(path) (file dump,
+i.e. for node_exporter's textfile collector), or start_metrics_server(port)
+(serves GET /metrics on a daemon thread).
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import re
+import threading
+
+from typing import Optional, Union
+
+from utils.file_utils import atomic_write_bytes
+
+## Prometheus client default latency buckets, in seconds
+default_latency_buckets: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+
+prometheus_content_type: str = "text/plain; version=0.0.4; charset=utf-8"
+
+## (name, type, help) for the metrics the TMDB client records
+tmdb_metric_help: list[tuple[str, str, str]] = [
+    ("tmdb_requests_total", "counter", "Requests sent to the TMDB API."),
+    ("tmdb_request_duration_seconds", "histogram", "TMDB API request latency."),
+    ("tmdb_request_phase_seconds", "histogram", "TMDB API request latency by phase."),
+    ("tmdb_response_bytes_total", "counter", "Response body bytes received from TMDB."),
+    ("tmdb_request_retries_total", "counter", "Retried TMDB API request attempts."),
+    ("tmdb_cache_requests_total", "counter", "Cache lookups by tier and result."),
+]
+
+_numeric_segment = re.compile(r"^\d+$")
+
+LabelValues = tuple[tuple[str, str], ...]
+
+
+def endpoint_template(path: str = None, api_prefix: str = "/3") -> str:
+    """Collapse a request path to its endpoint template.
+
+    Numeric path segments become {id}, and the API version prefix is removed:
+    /3/tv/1399/season/2 -> /tv/{id}/season/{id}
+    """
+    if not path:
+        return "/"
+
+    if api_prefix and (path == api_prefix or path.startswith(f"{api_prefix}/")):
+        path = path[len(api_prefix) :]
+
+    segments = [
+        "{id}" if _numeric_segment.match(segment) else segment
+        for segment in path.strip("/").split("/")
+    ]
+
+    return "/" + "/".join(segments)
+
+
+def escape_label(value: str = None) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels: LabelValues = None, extra: dict[str, str] = None) -> str:
+    pairs = list(labels or ()) + list((extra or {}).items())
+
+    if not pairs:
+        return ""
+
+    return "{" + ",".join(f'{k}="{escape_label(v)}"' for k, v in pairs) + "}"
+
+
+def format_value(value: float = None) -> str:
+    if value == float("inf"):
+        return "+Inf"
+
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+
+    return repr(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus exposes it."""
+
+    def __init__(self, buckets: tuple[float, ...] = default_latency_buckets) -> None:
+        self.buckets = tuple(sorted(buckets))
+        ## Non-cumulative counts per bucket; the last slot is +Inf
+        self.counts: list[int] = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float = None) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """Return [(upper bound, cumulative count)], ending with +Inf."""
+        total = 0
+        result = []
+
+        for bound, count in zip(list(self.buckets) + [float("inf")], self.counts):
+            total += count
+            result.append((bound, total))
+
+        return result
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms, keyed by metric name and labels."""
+
+    def __init__(self) -> None:
+        self._counters: dict[str, dict[LabelValues, float]] = {}
+        self._histograms: dict[str, dict[LabelValues, Histogram]] = {}
+        self._meta: dict[str, tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+        for name, _type, _help in tmdb_metric_help:
+            self.describe(name=name, metric_type=_type, help_text=_help)
+
+    def describe(self, name: str = None, metric_type: str = None, help_text: str = None) -> None:
+        """Set a metric's TYPE and HELP lines."""
+        self._meta[name] = (metric_type, help_text)
+
+    def inc(self, name: str = None, labels: dict[str, str] = None, value: float = 1) -> None:
+        key = tuple((labels or {}).items())
+
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(
+        self,
+        name: str = None,
+        labels: dict[str, str] = None,
+        value: float = None,
+        buckets: tuple[float, ...] = default_latency_buckets,
+    ) -> None:
+        key = tuple((labels or {}).items())
+
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets=buckets)
+
+            histogram.observe(value)
+
+    def get_counter(self, name: str = None, labels: dict[str, str] = None) -> float:
+        return self._counters.get(name, {}).get(tuple((labels or {}).items()), 0)
+
+    def get_counter_total(self, name: str = None) -> float:
+        """Return a counter summed over every label set."""
+        with self._lock:
+            return sum(self._counters.get(name, {}).values())
+
+    def get_histogram(self, name: str = None, labels: dict[str, str] = None) -> Optional[Histogram]:
+        return self._histograms.get(name, {}).get(tuple((labels or {}).items()))
+
+    def record_request(
+        self,
+        endpoint: str = None,
+        method: str = "GET",
+        status: Union[int, str] = None,
+        elapsed: float = None,
+        response_bytes: int = 0,
+        retries: int = 0,
+        cdn_cache: str = None,
+    ) -> None:
+        """Record one (possibly retried) request to an endpoint template.
+
+        cdn_cache is the response's x-cache header, if any.
+        """
+        labels = {"endpoint": endpoint}
+
+        self.inc(
+            "tmdb_requests_total",
+            {"endpoint": endpoint, "method": method, "status": str(status)},
+        )
+
+        if elapsed is not None:
+            self.observe("tmdb_request_duration_seconds", labels, elapsed)
+
+        if response_bytes:
+            self.inc("tmdb_response_bytes_total", labels, response_bytes)
+
+        if retries:
+            self.inc("tmdb_request_retries_total", labels, retries)
+
+        if cdn_cache:
+            self.record_cache(
+                endpoint=endpoint, tier="cdn", hit=cdn_cache.lower().startswith("hit")
+            )
+
+    def record_phases(
+        self, endpoint: str = None, timings: dict[str, Optional[float]] = None
+    ) -> None:
+        """Record per-phase durations (PhaseTracer.timings()) for an endpoint template.
+
+        Phases that did not happen (None), and the total, are skipped.
+        """
+        for phase, seconds in (timings or {}).items():
+            if seconds is None or phase == "total":
+                continue
+
+            self.observe(
+                "tmdb_request_phase_seconds", {"endpoint": endpoint, "phase": phase}, seconds
+            )
+
+    def record_cache(self, endpoint: str = None, tier: str = None, hit: bool = None) -> None:
+        """Record a cache lookup for an endpoint template."""
+        self.inc(
+            "tmdb_cache_requests_total",
+            {"endpoint": endpoint, "tier": tier, "result": "hit" if hit else "miss"},
+        )
+
+    def render_prometheus(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines: list[str] = []
+
+        with self._lock:
+            for name, series in self._counters.items():
+                lines.extend(self._header(name, "counter"))
+
+                for labels, value in series.items():
+                    lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+
+            for name, series in self._histograms.items():
+                lines.extend(self._header(name, "histogram"))
+
+                for labels, histogram in series.items():
+                    for bound, count in histogram.cumulative():
+                        le = {"le": format_value(float(bound))}
+                        lines.append(f"{name}_bucket{format_labels(labels, le)} {count}")
+
+                    lines.append(f"{name}_sum{format_labels(labels)} {format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def _header(self, name: str, default_type: str) -> list[str]:
+        metric_type, help_text = self._meta.get(name, (default_type, None))
+        header = []
+
+        if help_text:
+            header.append(f"# HELP {name} {help_text}")
+
+        header.append(f"# TYPE {name} {metric_type}")
+
+        return header
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+## Default registry the TMDB client records into
+metrics = MetricsRegistry()
+
+
+def write_prometheus(path: Union[str, Path] = None, registry: MetricsRegistry = None) -> Path:
+    """Atomically write the registry's Prometheus text to a file."""
+    if not path:
+        raise ValueError("Missing path to write metrics to")
+
+    registry = registry or metrics
+
+    return atomic_write_bytes(
+        _file=path, data=registry.render_prometheus().encode("utf-8"), fsync=False
+    )
+
+
+def start_metrics_server(
+    port: int = 9100, host: str = "127.0.0.1", registry: MetricsRegistry = None
+) -> ThreadingHTTPServer:
+    """Serve GET /metrics on a daemon thread. Returns the server; call .shutdown() to stop.
+
+    Pass port=0 to pick a free port (see server.server_address).
+    """
+    registry = registry or metrics
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        ## Keep-alive, so scrapers can reuse their connection
+        protocol_version = "HTTP/1.1"
+        ## Headers & body are separate writes; without this, delayed ACKs add ~40ms
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+
+            body = registry.render_prometheus().encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", prometheus_content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args) -> None:
+            ## Scrapes are frequent; keep them out of stderr
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+
+    return server
@@ -6,36 +6,64 @@ from pathlib import Path
 from typing import Any, Optional, Union
 from uuid import UUID, uuid4
 
-from core.config import logging_settings
 import msgpack
 
 from utils.logger import get_logger
 
-log = get_logger(__name__, level=logging_settings.LOG_LEVEL)
+log = get_logger(__name__)
 
 from lib.constants import default_serialize_dir
+from utils.file_utils import atomic_write_bytes
 
-def msgpack_serialize(
-    _json: dict = None, filename: str = None
-) -> dict[str, Union[bool, str, dict[str, Union[str, dict]]]]:
-    if not _json:
-        raise ValueError("Missing Python dict data to serialize")
+def msgpack_dumps(_json: Any = None) -> bytes:
+    """Pack Python data to msgpack bytes, without touching disk."""
+    return msgpack.packb(_json)
+
+
+def msgpack_loads(in_bytes: bytes = None) -> Any:
+    """Unpack msgpack bytes to Python data."""
+    if in_bytes is None:
+        raise ValueError("Missing msgpack bytes to unpack")
+
+    return msgpack.unpackb(in_bytes)
+
+
+def build_serialize_path(
+    filename: str = None, serialize_dir: str = default_serialize_dir
+) -> str:
+    """Return the .msgpack path a file will be serialized to.
 
+    Generates a random filename if none is passed.
+    """
     if not filename:
         log.debug(f"Missing filename. Generating a random filename.")
 
         filename = str(uuid4())
 
     if filename.endswith(".msgpack"):
-        filename.replace(".msgpack", "")
+        filename = filename[: -len(".msgpack")]
+
+    return f"{serialize_dir}/{filename}.msgpack"
+
+
+def msgpack_serialize(
+    _json: dict = None, filename: str = None, fsync: bool = True
+) -> dict[str, Union[bool, str, dict[str, Union[str, dict]]]]:
+    """Serialize a dict to a .msgpack file in the serialize dir.
+
+    The file is written to a temp file and renamed into place, so a crash
+    never leaves a partially written file. For high-volume writes that should
+    not block the caller, use utils.msgpack_writer.MsgpackWriter.
+    """
+    if not _json:
+        raise ValueError("Missing Python dict data to serialize")
 
-    filename = f"{default_serialize_dir}/{filename}.msgpack"
+    filename = build_serialize_path(filename=filename)
 
     if _json:
         try:
-            with open(f"{filename}", "wb") as outfile:
-                packed = msgpack.packb(_json)
-                outfile.write(packed)
+            packed = msgpack_dumps(_json)
+            atomic_write_bytes(_file=filename, data=packed, fsync=fsync)
 
             return_obj = {
                 "success": True,
@@ -64,7 +92,7 @@ def msgpack_deserialize(
     try:
         with open(f"{filename}", "rb") as infile:
             in_bytes = infile.read()
-            unpacked = msgpack.unpackb(in_bytes)
+            unpacked = msgpack_loads(in_bytes)
 
         return_obj = {
             "success": True,
@@ -0,0 +1,170 @@
+"""Background msgpack persistence.
+
+MsgpackWriter moves msgpack serialization off the caller's thread. Producers
+(i.e. fetch workers) call .submit(), which only places the record on a bounded
+queue. A single writer thread packs queued records in batches, writes each one
+to a temp file and renames it into place, so a crash never leaves a half-written
+.msgpack file behind.
+
+Each batch is written in two passes: every record goes to an fsync'd temp file,
+then the temp files are renamed into place. A file's data is always on disk
+before its rename. What fsync_every spaces out is the directory fsync that
+makes the renames themselves durable: 1 fsyncs the directory after every
+batch, N after every Nth batch (and on close). A crash between directory
+fsyncs can lose the most recent renames, but never leaves a partial file.
+0 skips fsync entirely and leaves flushing to the OS, which is not crash-safe.
+
+Usage:
+
+with MsgpackWriter(fsync_every=50) as writer:
+    for show in shows:
+        writer.submit(show, filename=f"tv_{show['id']}")
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from typing import Any, Callable, Optional
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+from lib.constants import default_serialize_dir
+from utils.batch_writer import BaseBatchWriter
+from utils.file_utils import cleanup_temp_files, fsync_dir, write_temp_bytes
+from utils.msgpack_utils import build_serialize_path, msgpack_dumps
+
+class MsgpackWriter(BaseBatchWriter):
+    """Serialize records to .msgpack files from a single background thread.
+
+    Params:
+        serialize_dir: Directory .msgpack files are written to.
+        fsync_every: fsync the directory every Nth batch. File data is always
+            fsync'd before its rename. 0 disables fsync.
+        batch_size: Maximum records written per batch.
+        flush_interval: Maximum seconds to wait for a batch to fill.
+        max_queue_size: Bound on queued records. submit() blocks when full.
+        on_batch: Optional callback, called as on_batch(item_count, latency_seconds).
+    """
+
+    def __init__(
+        self,
+        serialize_dir: str = default_serialize_dir,
+        fsync_every: int = 1,
+        batch_size: int = 100,
+        flush_interval: float = 0.2,
+        max_queue_size: int = 1000,
+        on_batch: Optional[Callable[[int, float], None]] = None,
+    ) -> None:
+        if fsync_every < 0:
+            raise ValueError("fsync_every must be 0 or greater")
+
+        super().__init__(
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            max_queue_size=max_queue_size,
+            on_batch=on_batch,
+            name="msgpack-writer",
+        )
+
+        self.serialize_dir = serialize_dir
+        self.fsync_every = fsync_every
+
+        self.files_written: int = 0
+        self._batches: int = 0
+        ## Directories with renames not yet made durable by fsync_dir()
+        self._unsynced_dirs: set[Path] = set()
+
+    def start(self) -> None:
+        """Remove temp files left by a previous crash, then start the writer thread."""
+        if not self.is_running:
+            removed = cleanup_temp_files(_dir=self.serialize_dir)
+
+            if removed:
+                log.warning(
+                    "Removed %s incomplete temp file(s) from %s", removed, self.serialize_dir
+                )
+
+        super().start()
+
+    def submit(
+        self,
+        _json: Any = None,
+        filename: str = None,
+        block: bool = True,
+        timeout: float = None,
+    ) -> str:
+        """Queue a record to be serialized.
+
+        Returns the path the record will be written to. Generates a random
+        filename if none is passed. Raises queue.Full if block=False (or
+        timeout expires) while the queue is full.
+        """
+        if not _json:
+            raise ValueError("Missing Python data to serialize")
+
+        path = build_serialize_path(filename=filename, serialize_dir=self.serialize_dir)
+
+        self.put((path, _json), block=block, timeout=timeout)
+
+        return path
+
+    def close(self, timeout: float = None) -> None:
+        """Write any remaining records, then fsync directories with pending renames."""
+        super().close(timeout=timeout)
+
+        if not self.is_running:
+            self._sync_dirs()
+
+    def write_batch(self, batch: list[tuple[str, Any]]) -> None:
+        fsync = bool(self.fsync_every)
+        staged: list[tuple[Path, Path]] = []
+
+        ## Pass 1: write (and fsync) every temp file
+        for path, _json in batch:
+            try:
+                tmp_path = write_temp_bytes(_file=path, data=msgpack_dumps(_json), fsync=fsync)
+                staged.append((tmp_path, Path(path)))
+
+            except Exception as exc:
+                ## One bad record should not drop the rest of the batch
+                log.error("Unhandled exception serializing %s. Details: %s", path, exc)
+                self._record_error(exc)
+
+        ## Pass 2: rename into place, only after all of the batch's data is on disk
+        for tmp_path, path in staged:
+            try:
+                os.replace(tmp_path, path)
+
+            except Exception as exc:
+                log.error("Unhandled exception renaming %s into place. Details: %s", path, exc)
+                self._record_error(exc)
+
+                try:
+                    os.unlink(tmp_path)
+                except FileNotFoundError:
+                    pass
+
+                continue
+
+            self.files_written += 1
+
+            if fsync:
+                self._unsynced_dirs.add(path.parent)
+
+        self._batches += 1
+
+        if fsync and self._batches % self.fsync_every == 0:
+            self._sync_dirs()
+
+    def _sync_dirs(self) -> None:
+        while self._unsynced_dirs:
+            _dir = self._unsynced_dirs.pop()
+
+            try:
+                fsync_dir(_dir)
+            except Exception as exc:
+                log.error("Unhandled exception syncing directory %s. Details: %s", _dir, exc)
+                self._record_error(exc)
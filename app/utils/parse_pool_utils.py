@@ -0,0 +1,209 @@
+"""Decode & validate TMDB payloads on a process pool.
+
+Pydantic validation is CPU-bound and holds the GIL, so parsing on threads
+tops out at one core. ParsePool sends raw response bodies to worker
+processes in chunks (one IPC round trip per chunk, not per record). Each
+worker decodes and validates its chunk and returns one msgpack blob.
+
+What comes back is the validated record as plain data (record.dict()). It is
+exposed through as_record(), an attribute view, so code written against the
+schema objects (i.e. upsert_tv_shows) works unchanged without validating a
+second time in the parent process.
+
+Batches smaller than min_pool_batch are parsed in-process. For a handful of
+records the IPC costs more than the validation.
+
+Usage:
+
+with ParsePool(media_type="tv", max_workers=8) as pool:
+    parsed = pool.parse([(tmdb_id, raw_bytes), ...])
+"""
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import json
+import multiprocessing
+import os
+import threading
+from types import SimpleNamespace
+
+from typing import Any, Iterable, Optional
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+from domain.schemas.tmdb.tmdb_media_schemas import MediaMovie, MediaTVShow
+from utils.msgpack_utils import msgpack_dumps, msgpack_loads
+
+## Kept local (not utils.sync_utils.media_schemas) so workers import as little as possible
+_schemas: dict = {"tv": MediaTVShow, "movie": MediaMovie}
+
+default_chunk_size: int = 32
+default_min_pool_batch: int = 16
+
+
+@dataclass
+class ParsedMedia:
+    tmdb_id: int
+    payload: dict
+    ## The validated schema object, or an attribute view of one (see as_record())
+    record: Any = None
+
+
+def as_record(data: Any = None) -> Any:
+    """Return validated record data (schema.dict()) with attribute access, recursively."""
+    if isinstance(data, dict):
+        return SimpleNamespace(**{key: as_record(value) for key, value in data.items()})
+
+    if isinstance(data, list):
+        return [as_record(value) for value in data]
+
+    return data
+
+
+def decode_validate_chunk(media_type: str = None, chunk: list[tuple[int, bytes]] = None) -> bytes:
+    """Decode & validate raw payloads. Runs in a worker process.
+
+    Returns msgpack of [[tmdb_id, payload, record.dict()] or [tmdb_id, None, error], ...].
+    """
+    schema = _schemas[media_type]
+    results: list[list] = []
+
+    for tmdb_id, raw in chunk:
+        try:
+            payload = json.loads(raw)
+            record = schema.parse_obj(payload)
+            results.append([tmdb_id, payload, record.dict()])
+        except Exception as exc:
+            results.append([tmdb_id, None, f"{type(exc).__name__}: {exc}"])
+
+    return msgpack_dumps(results)
+
+
+class ParsePool:
+    """Decode & validate payloads, in worker processes for large batches.
+
+    Params:
+        media_type: "tv" or "movie".
+        max_workers: Worker processes. Defaults to the CPU count.
+        chunk_size: Payloads sent to a worker per task.
+        min_pool_batch: Batches smaller than this are parsed in-process.
+    """
+
+    def __init__(
+        self,
+        media_type: str = None,
+        max_workers: int = None,
+        chunk_size: int = default_chunk_size,
+        min_pool_batch: int = default_min_pool_batch,
+    ) -> None:
+        if media_type not in _schemas:
+            raise ValueError(f"Invalid media type: {media_type}. Must be one of {list(_schemas)}")
+
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be 1 or greater")
+
+        self.media_type = media_type
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.min_pool_batch = min_pool_batch
+
+        self.errors = 0
+        self.recent_errors: deque[str] = deque(maxlen=20)
+        self.pooled = 0
+        self.in_process = 0
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def parse(self, items: Iterable[tuple[int, bytes]] = None) -> list[ParsedMedia]:
+        """Decode & validate (tmdb_id, raw bytes) pairs. Items that fail are logged and skipped."""
+        items = list(items or [])
+
+        if not items:
+            return []
+
+        if len(items) < self.min_pool_batch:
+            with self._lock:
+                self.in_process += len(items)
+
+            return self._parse_in_process(items)
+
+        chunks = [items[i : i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        executor = self._get_executor()
+        futures = [
+            executor.submit(decode_validate_chunk, self.media_type, chunk) for chunk in chunks
+        ]
+
+        parsed: list[ParsedMedia] = []
+
+        for future in futures:
+            for tmdb_id, payload, result in msgpack_loads(future.result()):
+                if payload is None:
+                    self._record_error(tmdb_id, result)
+                    continue
+
+                parsed.append(
+                    ParsedMedia(tmdb_id=tmdb_id, payload=payload, record=as_record(result))
+                )
+
+        with self._lock:
+            self.pooled += len(items)
+
+        return parsed
+
+    def _parse_in_process(self, items: list[tuple[int, bytes]]) -> list[ParsedMedia]:
+        schema = _schemas[self.media_type]
+        parsed: list[ParsedMedia] = []
+
+        for tmdb_id, raw in items:
+            try:
+                payload = json.loads(raw)
+                parsed.append(
+                    ParsedMedia(tmdb_id=tmdb_id, payload=payload, record=schema.parse_obj(payload))
+                )
+            except Exception as exc:
+                self._record_error(tmdb_id, f"{type(exc).__name__}: {exc}")
+
+        return parsed
+
+    def _record_error(self, tmdb_id: int, error: str) -> None:
+        log.warning("Unable to parse %s [%s]. Details: %s", self.media_type, tmdb_id, error)
+
+        with self._lock:
+            self.errors += 1
+            self.recent_errors.append(f"{tmdb_id}: {error}")
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                ## spawn, not fork: the parent runs pipeline & logging threads,
+                #  and forking with their locks held can deadlock a worker
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+
+            return self._executor
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "workers": self.max_workers,
+            "pooled": self.pooled,
+            "in_process": self.in_process,
+            "errors": self.errors,
+        }
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self) -> ParsePool:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,514 @@
+"""Staged, bounded-memory pipelines, and the TMDB catalog ingest built on one.
+
+A Pipeline pulls items from a source iterable and passes them through a list
+of Stages. Each stage has its own worker threads, and stages are connected by
+bounded queues: when a stage falls behind, the queue in front of it fills,
+and put() blocks the stage before it, back to the source. Memory stays
+bounded by the queue sizes no matter how many items the source yields.
+
+A stage function takes one item and returns the item for the next stage, or
+None to drop it. With batch_size > 1, it takes a list of up to batch_size
+items and returns an iterable of results. An exception drops the item (or
+batch), is counted, and the pipeline keeps going.
+
+Per stage, the pipeline tracks items in/out, dropped items, errors, busy time
+and queue depth; Pipeline.stats() returns them, and progress is logged every
+report_interval seconds.
+
+ingest() runs the catalog ingestion pipeline:
+
+    ID source -> fetch (raw bytes) -> decode (JSON) -> validate (schema) -> persist
+
+With parse_processes set, decode & validate run as one batched "parse"
+stage on a process pool instead (see utils.parse_pool_utils), so parsing
+isn't limited to the one core the GIL allows:
+
+    ID source -> fetch (raw bytes) -> parse (worker processes) -> persist
+
+Persisting goes through a DatabaseWriter, which commits in batches from one
+thread, and writes sync state (SyncState) with each record so incremental
+syncs and the lookup cache see ingested records as fresh.
+
+Usage:
+
+with httpx.Client() as client:
+    result = ingest(
+        session_factory=SessionLocal, media_type="tv", tmdb_ids=range(1, 10_001), client=client
+    )
+
+log.info(result.report())
+"""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+import json
+import queue
+import threading
+import time
+
+from typing import Any, Callable, Iterable, Optional
+
+import httpx
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+from core.database.sqla_writer import DatabaseWriter
+from sqlalchemy.orm import Session, sessionmaker
+from utils.parse_pool_utils import ParsedMedia, ParsePool, default_chunk_size
+from utils.sync_utils import detail_fetchers, media_schemas, store_payloads, validate_media_type
+
+## Placed on a stage's queue to stop one of its workers
+_STOP = object()
+
+
+class Stage:
+    """One step of a Pipeline.
+
+    Params:
+        name: Stage name, used in stats & logs.
+        func: Called as func(item) -> next item or None. With batch_size > 1,
+            called as func(items) -> iterable of next items.
+        workers: Worker threads for this stage.
+        queue_size: Bound on items waiting for this stage.
+        batch_size: Items passed to func per call.
+        batch_timeout: Seconds to wait for a batch to fill before running it short.
+    """
+
+    def __init__(
+        self,
+        name: str = None,
+        func: Callable[[Any], Any] = None,
+        workers: int = 1,
+        queue_size: int = 100,
+        batch_size: int = 1,
+        batch_timeout: float = 0.05,
+    ) -> None:
+        if not name:
+            raise ValueError("Missing stage name")
+
+        if func is None:
+            raise ValueError(f"Missing function for stage [{name}]")
+
+        if workers < 1 or queue_size < 1 or batch_size < 1:
+            raise ValueError(f"workers, queue_size and batch_size must be 1 or greater [{name}]")
+
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    items_in: int = 0
+    items_out: int = 0
+    dropped: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    queue_depth_max: int = 0
+    queue_depth_total: int = 0
+    queue_depth_samples: int = 0
+    ## Most recent errors, as "item: exception"
+    recent_errors: deque = field(default_factory=lambda: deque(maxlen=20))
+
+    def summary(self, elapsed: float = None) -> dict[str, Any]:
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "items_per_sec": self.items_in / elapsed if elapsed else 0.0,
+            "utilization": (
+                self.busy_seconds / (elapsed * self.workers) if elapsed else 0.0
+            ),
+            "queue_depth_avg": (
+                self.queue_depth_total / self.queue_depth_samples
+                if self.queue_depth_samples
+                else 0.0
+            ),
+            "queue_depth_max": self.queue_depth_max,
+        }
+
+
+@dataclass
+class PipelineResult:
+    elapsed: float
+    source_items: int
+    stages: list[dict[str, Any]]
+    source_error: Optional[str] = None
+
+    def report(self) -> str:
+        """Return a table of per-stage stats."""
+        lines = [
+            f"{self.source_items} item(s) in {self.elapsed:.2f}s",
+            f"{'stage':<12} {'workers':>7} {'in':>9} {'out':>9} {'dropped':>8} {'errors':>7} "
+            f"{'items/s':>10} {'util':>6} {'q avg':>7} {'q max':>6}",
+        ]
+
+        for stage in self.stages:
+            lines.append(
+                f"{stage['stage']:<12} {stage['workers']:>7} {stage['items_in']:>9} "
+                f"{stage['items_out']:>9} {stage['dropped']:>8} {stage['errors']:>7} "
+                f"{stage['items_per_sec']:>10.1f} {stage['utilization']:>6.0%} "
+                f"{stage['queue_depth_avg']:>7.1f} {stage['queue_depth_max']:>6}"
+            )
+
+        return "\n".join(lines)
+
+
+class Pipeline:
+    """Run source items through stages on worker threads, with bounded queues between them.
+
+    Params:
+        source: Iterable of input items. Consumed lazily, on its own thread.
+        stages: Stages, in order. The last stage's results are discarded.
+        report_interval: Seconds between progress log lines. None disables.
+    """
+
+    def __init__(
+        self,
+        source: Iterable[Any] = None,
+        stages: list[Stage] = None,
+        report_interval: Optional[float] = 10.0,
+    ) -> None:
+        if source is None:
+            raise ValueError("Missing source of pipeline items")
+
+        if not stages:
+            raise ValueError("Missing pipeline stages")
+
+        self.source = source
+        self.stages = stages
+        self.report_interval = report_interval
+
+        self._queues: list[queue.Queue] = [queue.Queue(maxsize=s.queue_size) for s in stages]
+        self._stats: list[StageStats] = [
+            StageStats(name=s.name, workers=s.workers) for s in stages
+        ]
+        self._locks: list[threading.Lock] = [threading.Lock() for _ in stages]
+        self._running: list[int] = [s.workers for s in stages]
+        self._source_items = 0
+        self._source_error: Optional[str] = None
+        self._start: Optional[float] = None
+        self._done = threading.Event()
+
+    def run(self) -> PipelineResult:
+        """Run the pipeline to completion."""
+        self._start = time.perf_counter()
+
+        threads = [threading.Thread(target=self._feed, name="pipeline-source", daemon=True)]
+
+        for index, stage in enumerate(self.stages):
+            threads.extend(
+                threading.Thread(
+                    target=self._work,
+                    args=(index,),
+                    name=f"pipeline-{stage.name}-{n}",
+                    daemon=True,
+                )
+                for n in range(stage.workers)
+            )
+
+        for thread in threads:
+            thread.start()
+
+        monitor = None
+
+        if self.report_interval:
+            monitor = threading.Thread(target=self._monitor, name="pipeline-monitor", daemon=True)
+            monitor.start()
+
+        for thread in threads:
+            thread.join()
+
+        self._done.set()
+
+        if monitor is not None:
+            monitor.join()
+
+        return self.result()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start if self._start else 0.0
+
+    def stats(self) -> list[dict[str, Any]]:
+        elapsed = self.elapsed()
+
+        return [stats.summary(elapsed=elapsed) for stats in self._stats]
+
+    def result(self) -> PipelineResult:
+        return PipelineResult(
+            elapsed=self.elapsed(),
+            source_items=self._source_items,
+            stages=self.stats(),
+            source_error=self._source_error,
+        )
+
+    def _feed(self) -> None:
+        first_queue = self._queues[0]
+
+        try:
+            for item in self.source:
+                first_queue.put(item)
+                self._source_items += 1
+        except Exception as exc:
+            log.error(
+                "Pipeline source failed after %s item(s). Details: %s", self._source_items, exc
+            )
+            self._source_error = str(exc)
+        finally:
+            for _ in range(self.stages[0].workers):
+                first_queue.put(_STOP)
+
+    def _next_batch(self, index: int) -> tuple[list[Any], bool]:
+        """Block for one item, then gather up to batch_size. Returns (items, stop)."""
+        stage = self.stages[index]
+        in_queue = self._queues[index]
+        stats = self._stats[index]
+
+        depth = in_queue.qsize()
+        first = in_queue.get()
+
+        with self._locks[index]:
+            stats.queue_depth_max = max(stats.queue_depth_max, depth)
+            stats.queue_depth_total += depth
+            stats.queue_depth_samples += 1
+
+        if first is _STOP:
+            return [], True
+
+        items = [first]
+
+        if stage.batch_size > 1:
+            deadline = time.monotonic() + stage.batch_timeout
+
+            while len(items) < stage.batch_size:
+                try:
+                    item = in_queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+                if item is _STOP:
+                    return items, True
+
+                items.append(item)
+
+        return items, False
+
+    def _work(self, index: int) -> None:
+        stage = self.stages[index]
+        stats = self._stats[index]
+        lock = self._locks[index]
+        out_queue = self._queues[index + 1] if index + 1 < len(self.stages) else None
+
+        stop = False
+
+        while not stop:
+            items, stop = self._next_batch(index)
+
+            if not items:
+                continue
+
+            start = time.perf_counter()
+            outputs: list[Any] = []
+            failed = False
+
+            try:
+                if stage.batch_size > 1:
+                    outputs = [out for out in (stage.func(items) or []) if out is not None]
+                else:
+                    out = stage.func(items[0])
+                    outputs = [] if out is None else [out]
+            except Exception as exc:
+                failed = True
+                log.warning(
+                    "Stage [%s] failed on %s item(s). Details: %s", stage.name, len(items), exc
+                )
+
+                with lock:
+                    stats.errors += len(items)
+                    stats.recent_errors.append(f"{_describe(items[0])}: {exc}")
+
+            busy = time.perf_counter() - start
+
+            with lock:
+                stats.items_in += len(items)
+                stats.items_out += len(outputs)
+                stats.busy_seconds += busy
+
+                if not failed and out_queue is not None:
+                    stats.dropped += max(0, len(items) - len(outputs))
+
+            if out_queue is not None:
+                for out in outputs:
+                    out_queue.put(out)
+
+        with lock:
+            self._running[index] -= 1
+            last_worker = self._running[index] == 0
+
+        if last_worker and out_queue is not None:
+            for _ in range(self.stages[index + 1].workers):
+                out_queue.put(_STOP)
+
+    def _monitor(self) -> None:
+        while not self._done.wait(self.report_interval):
+            log.info(
+                "Pipeline progress (%.0fs): %s",
+                self.elapsed(),
+                ", ".join(
+                    f"{stats.name} {stats.items_in} in/q {q.qsize()}"
+                    for stats, q in zip(self._stats, self._queues)
+                ),
+            )
+
+
+def _describe(item: Any, limit: int = 80) -> str:
+    text = repr(item)
+
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+@dataclass
+class FetchedMedia:
+    tmdb_id: int
+    raw: bytes
+
+
+def ingest(
+    session_factory: sessionmaker[Session] = None,
+    media_type: str = None,
+    tmdb_ids: Iterable[int] = None,
+    headers: dict = None,
+    client: httpx.Client = None,
+    fetch_workers: int = 8,
+    parse_workers: int = 1,
+    queue_size: int = 200,
+    write_batch_size: int = 500,
+    report_interval: Optional[float] = 10.0,
+    parse_processes: int = 0,
+    parse_chunk_size: int = default_chunk_size,
+) -> PipelineResult:
+    """Fetch, parse and store media by ID, with bounded memory.
+
+    IDs TMDB returns 404 for are dropped by the fetch stage. The persist
+    stage's items_in counts records handed to the writer; once it has
+    drained, items_written and write_errors (failed batches) are added.
+
+    parse_processes > 0 parses on that many worker processes, parse_chunk_size
+    records per task. Records that fail to parse there count as parse stage
+    errors, not drops.
+    """
+    if session_factory is None:
+        raise ValueError("Missing a sessionmaker to write with.")
+
+    if tmdb_ids is None:
+        raise ValueError("Missing TMDB IDs to ingest")
+
+    validate_media_type(media_type)
+
+    fetch = detail_fetchers[media_type]
+    schema = media_schemas[media_type]
+
+    def _fetch(tmdb_id: int) -> Optional[FetchedMedia]:
+        res = fetch(headers=headers, tmdb_id=tmdb_id, client=_client)
+
+        if res.status_code == 404:
+            return None
+
+        if not res.is_success:
+            raise Exception(f"[{res.status_code}: {res.reason_phrase}] for ID {tmdb_id}")
+
+        return FetchedMedia(tmdb_id=int(tmdb_id), raw=res.content)
+
+    def _decode(fetched: FetchedMedia) -> ParsedMedia:
+        return ParsedMedia(tmdb_id=fetched.tmdb_id, payload=json.loads(fetched.raw))
+
+    def _validate(parsed: ParsedMedia) -> ParsedMedia:
+        parsed.record = schema.parse_obj(parsed.payload)
+
+        return parsed
+
+    def _store(session: Session, batch: list[ParsedMedia]) -> None:
+        store_payloads(
+            session=session,
+            media_type=media_type,
+            payloads=[parsed.payload for parsed in batch],
+            records=[parsed.record for parsed in batch],
+        )
+
+    def _parse(batch: list[FetchedMedia]) -> list[ParsedMedia]:
+        return pool.parse([(fetched.tmdb_id, fetched.raw) for fetched in batch])
+
+    if parse_processes:
+        pool = ParsePool(
+            media_type=media_type, max_workers=parse_processes, chunk_size=parse_chunk_size
+        )
+        parse_stages = [
+            ## Two threads, so one collects results while the other keeps the pool fed
+            Stage(
+                name="parse",
+                func=_parse,
+                workers=2,
+                queue_size=queue_size,
+                batch_size=parse_chunk_size * parse_processes,
+                batch_timeout=0.1,
+            )
+        ]
+    else:
+        pool = None
+        parse_stages = [
+            Stage(name="decode", func=_decode, workers=parse_workers, queue_size=queue_size),
+            Stage(name="validate", func=_validate, workers=parse_workers, queue_size=queue_size),
+        ]
+
+    _client = client or httpx.Client()
+    writer = DatabaseWriter(
+        session_factory=session_factory,
+        handler=_store,
+        batch_size=write_batch_size,
+        max_queue_size=queue_size,
+        name=f"ingest-{media_type}-writer",
+    )
+
+    pipeline = Pipeline(
+        source=tmdb_ids,
+        stages=[
+            Stage(name="fetch", func=_fetch, workers=fetch_workers, queue_size=queue_size),
+            *parse_stages,
+            Stage(name="persist", func=writer.put, queue_size=queue_size),
+        ],
+        report_interval=report_interval,
+    )
+
+    try:
+        with writer:
+            result = pipeline.run()
+    finally:
+        if client is None:
+            _client.close()
+
+        if pool is not None:
+            pool.close()
+
+    if pool is not None:
+        parse = result.stages[1]
+        ## Pool failures are per record, so the stage saw them as drops
+        parse["errors"] += pool.errors
+        parse["dropped"] -= pool.errors
+        parse["in_process"] = pool.in_process
+
+    persist = result.stages[-1]
+    persist["items_written"] = writer.items_written
+    persist["write_errors"] = len(writer.errors)
+
+    return result
@@ -0,0 +1,284 @@
+"""Opt-in CPU (cProfile) and memory (tracemalloc) profiling.
+
+Wrap an entrypoint in profiling() and mark its stages with profile_stage().
+Both are no-ops unless profiling is switched on, by the mode argument (i.e.
+from main.py --profile) or the PROFILE_MODE setting:
+
+    off:    nothing is profiled (default)
+    cpu:    run under cProfile, and write a .pstats file to PROFILE_DIR
+    memory: run under tracemalloc, snapshotting at every stage boundary
+    all:    both
+
+For memory, each profile_stage() reports traced memory at its end, its peak,
+the top allocation sites still alive, and the top growth since the previous
+stage boundary. The report is logged and written to PROFILE_DIR.
+
+Usage:
+
+with profiling(name="crawl"):
+    with profile_stage("fetch"):
+        responses = fetch(...)
+    with profile_stage("parse"):
+        shows = parse(responses)
+    with profile_stage("persist"):
+        save(shows)
+
+Inspect a .pstats file with: python -m pstats profiles/crawl-<timestamp>.pstats
+"""
+from __future__ import annotations
+
+import contextlib
+import cProfile
+from dataclasses import dataclass, field
+from datetime import datetime
+import io
+from pathlib import Path
+import pstats
+import tracemalloc
+
+from typing import Iterator, Optional, Union
+
+from core.config import allowed_profile_modes, get_profiling_settings
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+## Frames kept per traced allocation. 1 is cheapest; raise it to see callers.
+default_trace_frames: int = 1
+
+## Allocations made by the profiler itself, or by the import machinery
+_snapshot_filters: list[tracemalloc.Filter] = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+_active: Optional[Profiler] = None
+
+
+def format_bytes(size: int = None) -> str:
+    for unit in ["B", "KiB", "MiB"]:
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+
+        size /= 1024
+
+    return f"{size:.1f} GiB"
+
+
+@dataclass
+class StageReport:
+    """Memory at the end of one profiled stage."""
+
+    name: str
+    current_bytes: int
+    peak_bytes: int
+    top: list[str] = field(default_factory=list)
+    growth: list[str] = field(default_factory=list)
+
+    def render(self) -> str:
+        lines = [
+            f"== {self.name}: current {format_bytes(self.current_bytes)}, "
+            f"peak {format_bytes(self.peak_bytes)}",
+            "  top allocation sites:",
+        ]
+        lines.extend(f"    {line}" for line in self.top)
+        lines.append("  growth since previous stage:")
+        lines.extend(f"    {line}" for line in self.growth)
+
+        return "\n".join(lines)
+
+
+class Profiler:
+    """Runs cProfile and/or tracemalloc between start() and stop().
+
+    Params:
+        mode: One of "off", "cpu", "memory", "all".
+        name: Prefix for output filenames.
+        output_dir: Directory .pstats files & memory reports are written to.
+        top_n: Entries per report section.
+        trace_frames: Frames tracemalloc keeps per allocation.
+    """
+
+    def __init__(
+        self,
+        mode: str = "off",
+        name: str = "profile",
+        output_dir: Union[str, Path] = "profiles",
+        top_n: int = 10,
+        trace_frames: int = default_trace_frames,
+    ) -> None:
+        if mode not in allowed_profile_modes:
+            raise ValueError(f"Invalid profile mode: {mode}. Must be one of {allowed_profile_modes}")
+
+        self.mode = mode
+        self.name = name
+        self.output_dir = Path(output_dir)
+        self.top_n = top_n
+        self.trace_frames = trace_frames
+
+        self.stages: list[StageReport] = []
+        self.pstats_path: Optional[Path] = None
+        self.memory_report_path: Optional[Path] = None
+
+        self._cpu: Optional[cProfile.Profile] = None
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._started_tracemalloc = False
+        self._stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+
+    @property
+    def cpu(self) -> bool:
+        return self.mode in ("cpu", "all")
+
+    @property
+    def memory(self) -> bool:
+        return self.mode in ("memory", "all")
+
+    def start(self) -> None:
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.trace_frames)
+                self._started_tracemalloc = True
+
+            self._last_snapshot = self._take_snapshot()
+            tracemalloc.reset_peak()
+
+        if self.cpu:
+            self._cpu = cProfile.Profile()
+            self._cpu.enable()
+
+    def begin_stage(self) -> None:
+        if self.memory:
+            tracemalloc.reset_peak()
+
+    def end_stage(self, name: str = None) -> Optional[StageReport]:
+        """Snapshot memory at a stage boundary and report on the stage that just ended."""
+        if not self.memory:
+            return None
+
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = self._take_snapshot()
+
+        report = StageReport(
+            name=name,
+            current_bytes=current,
+            peak_bytes=peak,
+            top=[str(stat) for stat in snapshot.statistics("lineno")[: self.top_n]],
+            growth=[
+                str(stat)
+                for stat in snapshot.compare_to(self._last_snapshot, "lineno")[: self.top_n]
+                if stat.size_diff
+            ],
+        )
+
+        self._last_snapshot = snapshot
+        self.stages.append(report)
+
+        log.info("Memory profile, stage %s\n%s", name, report.render())
+
+        return report
+
+    def stop(self) -> None:
+        """Stop profiling and write the outputs."""
+        if self._cpu is not None:
+            self._cpu.disable()
+            self.pstats_path = self._output_path("pstats")
+            self._cpu.dump_stats(str(self.pstats_path))
+
+            log.info("CPU profile written to %s\n%s", self.pstats_path, self.cpu_summary())
+
+        if self.memory:
+            if not self.stages:
+                self.end_stage(name="total")
+
+            self.memory_report_path = self._output_path("memory.txt")
+            self.memory_report_path.write_text(
+                "\n\n".join(stage.render() for stage in self.stages) + "\n"
+            )
+
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+            log.info("Memory profile written to %s", self.memory_report_path)
+
+    def cpu_summary(self, sort_by: str = "cumulative") -> str:
+        """Return the top_n functions from the CPU profile, as pstats prints them."""
+        if self._cpu is None:
+            return ""
+
+        out = io.StringIO()
+        pstats.Stats(self._cpu, stream=out).sort_stats(sort_by).print_stats(self.top_n)
+
+        return out.getvalue()
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_snapshot_filters)
+
+    def _output_path(self, suffix: str) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        return self.output_dir / f"{self.name}-{self._stamp}.{suffix}"
+
+
+def get_active_profiler() -> Optional[Profiler]:
+    return _active
+
+
+@contextlib.contextmanager
+def profiling(
+    mode: str = None,
+    name: str = "profile",
+    output_dir: Union[str, Path] = None,
+    top_n: int = None,
+) -> Iterator[Profiler]:
+    """Profile the enclosed block. Arguments left as None come from ProfilingSettings.
+
+    While active, profile_stage() blocks anywhere in the program report to it.
+    """
+    global _active
+
+    settings = get_profiling_settings()
+    profiler = Profiler(
+        mode=mode or settings.PROFILE_MODE,
+        name=name,
+        output_dir=output_dir or settings.PROFILE_DIR,
+        top_n=top_n or settings.PROFILE_TOP_N,
+    )
+
+    if profiler.mode == "off":
+        yield profiler
+        return
+
+    if _active is not None:
+        raise RuntimeError("A profiling() block is already active")
+
+    _active = profiler
+    profiler.start()
+
+    try:
+        yield profiler
+    finally:
+        _active = None
+        profiler.stop()
+
+
+@contextlib.contextmanager
+def profile_stage(name: str = None) -> Iterator[None]:
+    """Mark a stage (i.e. fetch, parse, persist) for the active profiler. No-op if none."""
+    if not name:
+        raise ValueError("Missing stage name")
+
+    profiler = _active
+
+    if profiler is None:
+        yield
+        return
+
+    profiler.begin_stage()
+
+    try:
+        yield
+    finally:
+        profiler.end_stage(name=name)
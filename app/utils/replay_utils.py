@@ -0,0 +1,294 @@
+"""Replay recorded HTTP responses through an httpx transport.
+
+ReplayTransport answers requests from recorded responses keyed by method +
+URL, without touching the network. Lookups are a dict get (or an mmap slice),
+so the transport adds next to nothing to a request; latency/jitter can be
+added back to simulate the real API.
+
+Responses come from:
+    - load_vcr_cassettes(): VCR.py/pytest-vcr YAML cassettes, a file or a
+      directory of them (i.e. tests/cassettes). Needs PyYAML.
+    - PackedCassette: a single packed file, mmapped, written by
+      pack_cassette(). Only the index is read up front; bodies are sliced out
+      of the mapping on demand, so large recordings load instantly and share
+      pages between processes (i.e. pytest-xdist workers).
+
+Usage:
+
+responses = load_vcr_cassettes("tests/cassettes")
+pack_cassette(responses, "tests/cassettes.pack")
+
+with httpx.Client(transport=ReplayTransport(PackedCassette("tests/cassettes.pack"))) as client:
+    res = get_popular_tv(client=client)
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+import mmap
+from pathlib import Path
+import random
+import struct
+import time
+from urllib.parse import urlencode
+
+from typing import Iterator, Mapping, Optional, Protocol, Union
+
+import httpx
+from utils.msgpack_utils import msgpack_dumps, msgpack_loads
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+## Recorded headers that describe the original wire encoding, not the
+#  (already decoded) body we replay
+_dropped_headers: frozenset[str] = frozenset(
+    {"content-encoding", "content-length", "transfer-encoding", "connection"}
+)
+
+pack_magic: bytes = b"TMDBRPL1"
+## magic + index length (unsigned 64-bit, little endian)
+_pack_header = struct.Struct(f"<{len(pack_magic)}sQ")
+
+
+def replay_key(method: str = None, url: Union[str, httpx.URL] = None) -> str:
+    """Return the lookup key for a request: "METHOD url", with query params sorted."""
+    url = httpx.URL(url)
+    key = f"{method.upper()} {url.copy_with(query=None)}"
+
+    if url.params:
+        key += "?" + urlencode(sorted(url.params.multi_items()))
+
+    return key
+
+
+@dataclass
+class RecordedResponse:
+    status_code: int
+    headers: list[tuple[str, str]] = field(default_factory=list)
+    content: bytes = b""
+
+
+class ResponseStore(Protocol):
+    def get(self, key: str) -> Optional[RecordedResponse]: ...
+
+
+def load_vcr_cassettes(path: Union[str, Path] = None) -> dict[str, RecordedResponse]:
+    """Load VCR YAML cassettes (a file, or every *.yaml/*.yml in a directory).
+
+    If a request was recorded more than once, the last recording wins.
+    """
+    if yaml is None:
+        raise ImportError("PyYAML is required to load VCR cassettes: pip install pyyaml")
+
+    if not path:
+        raise ValueError("Missing cassette path")
+
+    path = Path(path)
+
+    if not path.exists():
+        raise FileNotFoundError(f"Could not find cassette(s): {path}")
+
+    files = sorted([*path.glob("*.yaml"), *path.glob("*.yml")]) if path.is_dir() else [path]
+    responses: dict[str, RecordedResponse] = {}
+
+    for cassette_file in files:
+        with open(cassette_file, "r") as in_file:
+            cassette = yaml.safe_load(in_file) or {}
+
+        for interaction in cassette.get("interactions", []):
+            request = interaction["request"]
+            response = interaction["response"]
+
+            content = response.get("content")
+
+            if content is None:
+                ## Older cassettes store the body as {"string": ...}
+                content = (response.get("body") or {}).get("string", "")
+
+            if isinstance(content, str):
+                content = content.encode("utf-8")
+
+            status = response["status"]["code"] if "status" in response else response["status_code"]
+
+            headers = [
+                (name, value)
+                for name, values in (response.get("headers") or {}).items()
+                if name.lower() not in _dropped_headers
+                for value in (values if isinstance(values, list) else [values])
+            ]
+
+            responses[replay_key(request["method"], request["uri"])] = RecordedResponse(
+                status_code=int(status), headers=headers, content=content
+            )
+
+    return responses
+
+
+def pack_cassette(
+    responses: Mapping[str, RecordedResponse] = None, path: Union[str, Path] = None
+) -> Path:
+    """Write responses to a packed cassette file, readable with PackedCassette.
+
+    Layout: header (magic, index length), msgpack index
+    {key: [status, headers, offset, length]}, then the bodies back to back.
+    Offsets are relative to the end of the index.
+    """
+    if responses is None:
+        raise ValueError("Missing responses to pack")
+
+    if not path:
+        raise ValueError("Missing packed cassette path")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    index: dict[str, list] = {}
+    offset = 0
+
+    for key, response in responses.items():
+        index[key] = [
+            response.status_code,
+            [list(header) for header in response.headers],
+            offset,
+            len(response.content),
+        ]
+        offset += len(response.content)
+
+    index_bytes = msgpack_dumps(index)
+
+    with open(path, "wb") as out_file:
+        out_file.write(_pack_header.pack(pack_magic, len(index_bytes)))
+        out_file.write(index_bytes)
+
+        for response in responses.values():
+            out_file.write(response.content)
+
+    return path
+
+
+class PackedCassette:
+    """Read-only, mmapped view of a file written by pack_cassette()."""
+
+    def __init__(self, path: Union[str, Path] = None) -> None:
+        if not path:
+            raise ValueError("Missing packed cassette path")
+
+        self.path = Path(path)
+
+        with open(self.path, "rb") as in_file:
+            self._mmap = mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, index_length = _pack_header.unpack_from(self._mmap, 0)
+
+        if magic != pack_magic:
+            self._mmap.close()
+            raise ValueError(f"Not a packed cassette: {self.path}")
+
+        index_start = _pack_header.size
+        self._body_start = index_start + index_length
+        self.index: dict[str, list] = msgpack_loads(self._mmap[index_start : self._body_start])
+
+    def get(self, key: str) -> Optional[RecordedResponse]:
+        entry = self.index.get(key)
+
+        if entry is None:
+            return None
+
+        status, headers, offset, length = entry
+        start = self._body_start + offset
+
+        return RecordedResponse(
+            status_code=status,
+            headers=[tuple(header) for header in headers],
+            content=self._mmap[start : start + length],
+        )
+
+    def keys(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def __enter__(self) -> PackedCassette:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def load_cassette(path: Union[str, Path] = None) -> ResponseStore:
+    """Open a packed cassette, or load VCR YAML cassette(s), based on the path."""
+    path = Path(path)
+
+    if path.is_file() and path.suffix not in (".yaml", ".yml"):
+        return PackedCassette(path)
+
+    return load_vcr_cassettes(path)
+
+
+class ReplayTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Serve recorded responses to a sync or async httpx client.
+
+    Params:
+        responses: dict from load_vcr_cassettes(), a PackedCassette, or any
+            object with get(key) -> RecordedResponse.
+        latency: Seconds to wait before each response.
+        jitter: Up to this many extra seconds, uniformly random, per response.
+
+    A request with no recording raises LookupError, so a test can't silently
+    pass against the wrong URL.
+    """
+
+    def __init__(
+        self, responses: ResponseStore = None, latency: float = 0.0, jitter: float = 0.0
+    ) -> None:
+        if responses is None:
+            raise ValueError("Missing recorded responses to replay")
+
+        self.responses = responses
+        self.latency = latency
+        self.jitter = jitter
+
+        self._rand = random.Random(0)
+
+    def _lookup(self, request: httpx.Request) -> httpx.Response:
+        key = replay_key(request.method, request.url)
+        recorded = self.responses.get(key)
+
+        if recorded is None:
+            raise LookupError(f"No recorded response for {key}")
+
+        return httpx.Response(
+            recorded.status_code,
+            headers=recorded.headers,
+            content=recorded.content,
+            request=request,
+        )
+
+    def _delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+
+        return self.latency + self._rand.random() * self.jitter
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        delay = self._delay()
+
+        if delay:
+            time.sleep(delay)
+
+        return self._lookup(request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        delay = self._delay()
+
+        if delay:
+            await asyncio.sleep(delay)
+
+        return self._lookup(request)
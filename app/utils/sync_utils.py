@@ -0,0 +1,367 @@
+"""Incremental sync from TMDB's changes feed.
+
+Instead of re-fetching the whole catalog, sync_changes() asks TMDB which IDs
+changed since the last checkpoint (/tv/changes, /movie/changes), re-fetches
+only those, and advances the checkpoint once the whole window succeeded.
+
+Every stored record has a fingerprint (SyncState.content_hash) of the payload
+it was written from. A re-fetched payload with the same fingerprint is
+skipped without touching the database, so the changes feed reporting an edit
+to a field we don't store (or the same ID twice across overlapping windows)
+costs one GET and no write.
+
+Usage:
+
+with httpx.Client() as client:
+    result = sync_changes(session_factory=SessionLocal, media_type="tv", client=client)
+
+log.info(result)
+
+Pass an httpx.Client(transport=httpx.MockTransport(handler)) to run against
+stubbed responses.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+import hashlib
+import json
+
+from typing import Any, Iterable, Iterator, Optional
+
+from core.database.sqla_upsert import bulk_upsert, iter_batches
+import httpx
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+from domain.models.tmdb.tmdb_media_crud import upsert_movies, upsert_tv_shows
+from domain.models.tmdb.tmdb_media_models import SyncCheckpoint, SyncState
+from domain.schemas.tmdb.tmdb_media_schemas import MediaMovie, MediaTVShow
+from lib.constants import valid_media_types
+import sqlalchemy as sa
+
+from sqlalchemy.orm import Session, sessionmaker
+from utils.msgpack_utils import msgpack_dumps
+from utils.tmdb_utils import get_movie_details, get_tv_episode, iter_changed_ids
+
+## TMDB rejects changes windows longer than 14 days
+max_changes_window: timedelta = timedelta(days=14)
+## How far back the first sync (no checkpoint yet) looks for changes
+default_lookback: timedelta = timedelta(days=1)
+
+detail_fetchers: dict = {"tv": get_tv_episode, "movie": get_movie_details}
+media_schemas: dict = {"tv": MediaTVShow, "movie": MediaMovie}
+media_upserters: dict = {
+    "tv": lambda session, records: upsert_tv_shows(session=session, shows=records),
+    "movie": lambda session, records: upsert_movies(session=session, movies=records),
+}
+
+
+@dataclass
+class SyncResult:
+    media_type: str
+    ## IDs looked at
+    checked: int = 0
+    ## Payloads fetched successfully
+    fetched: int = 0
+    ## Records written (new or changed fingerprint)
+    written: int = 0
+    ## Records skipped because the fingerprint matched
+    unchanged: int = 0
+    ## IDs TMDB returned 404 for (deleted/never existed)
+    missing: int = 0
+    ## IDs that failed to fetch or parse; the checkpoint does not advance
+    failed: list[int] = field(default_factory=list)
+    checkpoint: Optional[datetime] = None
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def as_utc(dt: datetime = None) -> Optional[datetime]:
+    """Return dt as an aware UTC datetime. SQLite returns naive datetimes."""
+    if dt is None:
+        return None
+
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+
+    return dt.astimezone(timezone.utc)
+
+
+def content_hash(payload: Any = None) -> str:
+    """Return a stable fingerprint of a JSON payload.
+
+    Keys are sorted, so the same content hashes the same regardless of key order.
+    """
+    canonical = json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def validate_media_type(media_type: str = None) -> str:
+    if media_type not in valid_media_types:
+        raise ValueError(
+            f"Type [{media_type}] is not an accepted media type. Must be one of {valid_media_types}"
+        )
+
+    return media_type
+
+
+def get_checkpoint(session: Session = None, media_type: str = None) -> Optional[datetime]:
+    """Return the time a media type's changes were last consumed up to, or None."""
+    checkpoint = session.get(SyncCheckpoint, validate_media_type(media_type))
+
+    if checkpoint is None:
+        return None
+
+    return as_utc(checkpoint.checkpoint_at)
+
+
+def set_checkpoint(
+    session: Session = None, media_type: str = None, checkpoint_at: datetime = None
+) -> None:
+    """Store a media type's checkpoint. The caller commits the session."""
+    bulk_upsert(
+        session=session,
+        table=SyncCheckpoint,
+        rows=[
+            {
+                "media_type": validate_media_type(media_type),
+                "checkpoint_at": checkpoint_at,
+            }
+        ],
+    )
+
+
+def get_stored_hashes(
+    session: Session = None, media_type: str = None, tmdb_ids: list[int] = None
+) -> dict[int, str]:
+    """Return {tmdb_id: content_hash} for the IDs that have been synced before."""
+    hashes: dict[int, str] = {}
+
+    for batch in iter_batches(list(tmdb_ids or []), batch_size=500):
+        rows = session.execute(
+            sa.select(SyncState.tmdb_id, SyncState.content_hash).where(
+                SyncState.media_type == media_type, SyncState.tmdb_id.in_(batch)
+            )
+        )
+        hashes.update({tmdb_id: _hash for tmdb_id, _hash in rows})
+
+    return hashes
+
+
+def store_payloads(
+    session: Session = None,
+    media_type: str = None,
+    payloads: list[dict] = None,
+    records: list[Any] = None,
+) -> int:
+    """Upsert media records parsed from API payloads, with their sync state.
+
+    Pass records (the payloads already parsed, in the same order) to skip
+    parsing them again. Returns the number of records written. The caller
+    commits the session.
+    """
+    if not payloads:
+        return 0
+
+    schema = media_schemas[validate_media_type(media_type)]
+    synced_at = utcnow()
+
+    if records is None:
+        records = [schema.parse_obj(payload) for payload in payloads]
+    states = [
+        {
+            "media_type": media_type,
+            "tmdb_id": payload["id"],
+            "content_hash": content_hash(payload),
+            "synced_at": synced_at,
+            "payload": msgpack_dumps(payload),
+        }
+        for payload in payloads
+    ]
+
+    media_upserters[media_type](session, records)
+    bulk_upsert(session=session, table=SyncState, rows=states)
+
+    return len(records)
+
+
+def iter_change_windows(
+    start: datetime = None, end: datetime = None
+) -> Iterator[tuple[date, date]]:
+    """Split start..end into (start_date, end_date) windows TMDB will accept."""
+    window_start = start
+
+    while True:
+        window_end = min(window_start + max_changes_window, end)
+
+        yield window_start.date(), window_end.date()
+
+        if window_end >= end:
+            return
+
+        window_start = window_end
+
+
+def refresh_media(
+    session_factory: sessionmaker[Session] = None,
+    media_type: str = None,
+    tmdb_ids: Iterable[int] = None,
+    headers: dict = None,
+    client: httpx.Client = None,
+    batch_size: int = 100,
+    result: SyncResult = None,
+) -> SyncResult:
+    """Fetch media by ID and write the records whose fingerprint changed.
+
+    IDs are handled batch_size at a time: stored fingerprints for the batch are
+    read in one query, and changed records are written in one transaction.
+    """
+    if session_factory is None:
+        raise ValueError("Missing a sessionmaker to read & write sync state with.")
+
+    validate_media_type(media_type)
+
+    if result is None:
+        result = SyncResult(media_type=media_type)
+
+    fetch = detail_fetchers[media_type]
+
+    for batch in iter_batches(list(dict.fromkeys(tmdb_ids or [])), batch_size=batch_size):
+        with session_factory() as session:
+            stored_hashes = get_stored_hashes(
+                session=session, media_type=media_type, tmdb_ids=batch
+            )
+
+        payloads: list[dict] = []
+
+        for tmdb_id in batch:
+            result.checked += 1
+
+            try:
+                res = fetch(headers=headers, tmdb_id=tmdb_id, client=client)
+
+                if res.status_code == 404:
+                    result.missing += 1
+                    continue
+
+                if not res.is_success:
+                    result.failed.append(tmdb_id)
+                    continue
+
+                payload = res.text_json()
+                result.fetched += 1
+
+                if stored_hashes.get(tmdb_id) == content_hash(payload):
+                    result.unchanged += 1
+                    continue
+
+                payloads.append(payload)
+
+            except Exception as exc:
+                log.error("Unable to refresh %s [%s]. Details: %s", media_type, tmdb_id, exc)
+                result.failed.append(tmdb_id)
+
+        if not payloads:
+            continue
+
+        with session_factory() as session:
+            try:
+                store_payloads(session=session, media_type=media_type, payloads=payloads)
+                session.commit()
+            except Exception as exc:
+                session.rollback()
+                raise Exception(
+                    f"Unhandled exception writing {len(payloads)} {media_type} record(s). Details: {exc}"
+                )
+
+        result.written += len(payloads)
+
+    return result
+
+
+def sync_changes(
+    session_factory: sessionmaker[Session] = None,
+    media_type: str = None,
+    headers: dict = None,
+    client: httpx.Client = None,
+    end: datetime = None,
+    batch_size: int = 100,
+) -> SyncResult:
+    """Re-fetch media TMDB reports as changed since the last checkpoint.
+
+    The first sync (no checkpoint) looks back default_lookback. The checkpoint
+    only advances to end (default: now) if every changed ID was refreshed, so
+    a failed run is retried from the same point; fingerprints keep the retry
+    from re-writing what already succeeded.
+    """
+    if session_factory is None:
+        raise ValueError("Missing a sessionmaker to read & write sync state with.")
+
+    validate_media_type(media_type)
+
+    end = as_utc(end) or utcnow()
+
+    with session_factory() as session:
+        start = get_checkpoint(session=session, media_type=media_type)
+
+    if start is None:
+        start = end - default_lookback
+
+    _client = client or httpx.Client()
+
+    try:
+        changed_ids: dict[int, None] = {}
+
+        for start_date, end_date in iter_change_windows(start=start, end=end):
+            changed_ids.update(
+                dict.fromkeys(
+                    iter_changed_ids(
+                        media_type=media_type,
+                        start_date=start_date,
+                        end_date=end_date,
+                        headers=headers,
+                        client=_client,
+                    )
+                )
+            )
+
+        log.info("%s %s ID(s) changed since %s", len(changed_ids), media_type, start)
+
+        result = refresh_media(
+            session_factory=session_factory,
+            media_type=media_type,
+            tmdb_ids=changed_ids,
+            headers=headers,
+            client=_client,
+            batch_size=batch_size,
+        )
+
+    finally:
+        if client is None:
+            _client.close()
+
+    if result.failed:
+        log.warning(
+            "%s %s ID(s) failed to refresh. Checkpoint stays at %s",
+            len(result.failed),
+            media_type,
+            start,
+        )
+
+        return result
+
+    with session_factory() as session:
+        set_checkpoint(session=session, media_type=media_type, checkpoint_at=end)
+        session.commit()
+
+    result.checkpoint = end
+
+    return result
@@ -1,41 +1,300 @@
+"""Named timers with percentile summaries.
+
+Timings are measured with time.perf_counter_ns() and recorded in a
+TimerRegistry under a name. Each name keeps an exact count/total/max and a
+bounded sample of durations for percentiles (p50/p95/p99).
+
+A timer works as a context manager (with/async with) or as a decorator on
+sync and async functions:
+
+with timer("fetch"):
+    ...
+
+@timer("parse")
+def parse(...): ...
+
+@timer("persist")
+async def persist(...): ...
+
+The first recorded timing registers a summary report at interpreter exit.
+Call timers.export_json(path) for a machine-readable copy.
+
+benchmark()/async_benchmark() keep their old behavior (print each elapsed
+time), and also record into the registry.
+"""
 from __future__ import annotations
 
-from contextlib import asynccontextmanager, contextmanager
+import atexit
+import functools
+import inspect
+import json
+import math
+from pathlib import Path
+import random
+import sys
+import threading
 import time
 
-@contextmanager
-def benchmark(description: str = "Unnamed function timer") -> None:
+from typing import Any, Callable, Optional, TextIO, Union
+
+## Samples kept per name for percentiles. Beyond this, reservoir sampling
+#  keeps a uniform sample; count/total/max stay exact.
+default_max_samples: int = 10_000
+
+
+def percentile(sorted_samples: list[int] = None, pct: float = None) -> float:
+    """Return the pct (0-100) percentile of sorted samples, by linear interpolation."""
+    if not sorted_samples:
+        return 0.0
+
+    rank = (len(sorted_samples) - 1) * pct / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+
+    if low == high:
+        return float(sorted_samples[low])
+
+    return sorted_samples[low] + (sorted_samples[high] - sorted_samples[low]) * (rank - low)
+
+
+class TimingStats:
+    """Duration statistics for one timer name. Durations are nanoseconds."""
+
+    def __init__(self, max_samples: int = default_max_samples) -> None:
+        self.max_samples = max_samples
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.min_ns: Optional[int] = None
+        self.samples: list[int] = []
+
+        self._rand = random.Random(0)
+
+    def add(self, elapsed_ns: int = None) -> None:
+        self.count += 1
+        self.total_ns += elapsed_ns
+        self.max_ns = max(self.max_ns, elapsed_ns)
+        self.min_ns = elapsed_ns if self.min_ns is None else min(self.min_ns, elapsed_ns)
+
+        if len(self.samples) < self.max_samples:
+            self.samples.append(elapsed_ns)
+        else:
+            ## Reservoir sampling (Algorithm R)
+            index = self._rand.randrange(self.count)
+
+            if index < self.max_samples:
+                self.samples[index] = elapsed_ns
+
+    def summary(self) -> dict[str, float]:
+        """Return count and millisecond statistics."""
+        ordered = sorted(self.samples)
+        ns_to_ms = 1e-6
+
+        return {
+            "count": self.count,
+            "total_ms": self.total_ns * ns_to_ms,
+            "mean_ms": (self.total_ns / self.count) * ns_to_ms if self.count else 0.0,
+            "min_ms": (self.min_ns or 0) * ns_to_ms,
+            "p50_ms": percentile(ordered, 50) * ns_to_ms,
+            "p95_ms": percentile(ordered, 95) * ns_to_ms,
+            "p99_ms": percentile(ordered, 99) * ns_to_ms,
+            "max_ms": self.max_ns * ns_to_ms,
+        }
+
+
+class TimerRegistry:
+    """Thread-safe collection of TimingStats, keyed by timer name.
+
+    Params:
+        report_at_exit: Print report() at interpreter exit, once anything was recorded.
+        export_path: Also write export_json() to this path at exit.
+        max_samples: Samples kept per name for percentiles.
+    """
+
+    def __init__(
+        self,
+        report_at_exit: bool = True,
+        export_path: Union[str, Path, None] = None,
+        max_samples: int = default_max_samples,
+    ) -> None:
+        self.report_at_exit = report_at_exit
+        self.export_path = export_path
+        self.max_samples = max_samples
+
+        self._stats: dict[str, TimingStats] = {}
+        self._lock = threading.Lock()
+        self._exit_hook_registered = False
+
+    def record(self, name: str = None, elapsed_ns: int = None) -> None:
+        with self._lock:
+            stats = self._stats.get(name)
+
+            if stats is None:
+                stats = self._stats[name] = TimingStats(max_samples=self.max_samples)
+
+            stats.add(elapsed_ns)
+
+            if not self._exit_hook_registered:
+                atexit.register(self._at_exit)
+                self._exit_hook_registered = True
+
+    def get(self, name: str = None) -> Optional[TimingStats]:
+        return self._stats.get(name)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Return {name: statistics} for every timer, in first-recorded order."""
+        with self._lock:
+            return {name: stats.summary() for name, stats in self._stats.items()}
+
+    def report(self, file: TextIO = None) -> None:
+        """Print a table of every timer's statistics."""
+        file = file or sys.stdout
+        summary = self.summary()
+
+        if not summary:
+            return
+
+        width = max(len("timer"), *(len(name) for name in summary))
+        columns = ["count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+
+        print(f"{'timer':<{width}}  " + "  ".join(f"{c:>10}" for c in columns), file=file)
+
+        for name, stats in summary.items():
+            values = [f"{stats['count']:>10}"] + [f"{stats[c]:>10.3f}" for c in columns[1:]]
+            print(f"{name:<{width}}  " + "  ".join(values), file=file)
+
+    def export_json(self, path: Union[str, Path] = None) -> Path:
+        """Write summary() to a JSON file. Returns the path written."""
+        if not path:
+            raise ValueError("Missing path to export timings to")
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.summary(), indent=2))
+
+        return path
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def _at_exit(self) -> None:
+        if self.report_at_exit:
+            self.report()
+
+        if self.export_path:
+            self.export_json(self.export_path)
+
+
+## Default registry used by timer()/benchmark()
+timers = TimerRegistry()
+
+
+class Timer:
+    """Time a block or function and record it under name.
+
+    Use through timer()/benchmark(). One Timer object can decorate any number
+    of functions and be called concurrently; as a context manager, create
+    one per block.
+    """
+
+    def __init__(
+        self,
+        name: str = None,
+        registry: TimerRegistry = None,
+        echo: bool = False,
+    ) -> None:
+        if not name:
+            raise ValueError("Missing timer name")
+
+        self.name = name
+        self.registry = registry or timers
+        self.echo = echo
+
+        self.elapsed_ns: Optional[int] = None
+        self._start: Optional[int] = None
+
+    @property
+    def elapsed(self) -> Optional[float]:
+        """Seconds measured by the last with-block."""
+        return None if self.elapsed_ns is None else self.elapsed_ns / 1e9
+
+    def _finish(self, start_ns: int) -> int:
+        elapsed_ns = time.perf_counter_ns() - start_ns
+        self.registry.record(self.name, elapsed_ns)
+
+        if self.echo:
+            print(f"{self.name}: {elapsed_ns / 1e9} seconds")
+
+        return elapsed_ns
+
+    def __enter__(self) -> Timer:
+        self._start = time.perf_counter_ns()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.elapsed_ns = self._finish(self._start)
+
+    async def __aenter__(self) -> Timer:
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        self.__exit__(exc_type, exc_value, traceback)
+
+    def __call__(self, func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs) -> Any:
+                start = time.perf_counter_ns()
+
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self._finish(start)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            start = time.perf_counter_ns()
+
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._finish(start)
+
+        return wrapper
+
+
+def timer(name: str = None, registry: TimerRegistry = None) -> Timer:
+    """Return a Timer recording under name. See the module docstring."""
+    return Timer(name=name, registry=registry)
+
+
+def benchmark(description: str = "Unnamed function timer") -> Timer:
     """Time a function call.
 
     Run a function with this context manager to time function execution.
+    Prints the elapsed time, and records it under description (see timers).
 
     Usage:
 
     with benchmark("Short description here"):
         ...
     """
-    start = time.time()
-    yield
-    elapsed = time.time() - start
+    return Timer(name=description, echo=True)
 
-    print(f"{description}: {elapsed} seconds")
 
-
-@asynccontextmanager
-async def async_benchmark(description: str = "Unnamed async function timer") -> None:
+def async_benchmark(description: str = "Unnamed async function timer") -> Timer:
     """Time an asynchronous operation.
 
     Run an async function/operation with this context manager to time function execution.
 
     Usage:
 
-    with async_benchmark("Short description here"):
+    async with async_benchmark("Short description here"):
         ...
     """
-    start = time.monotonic()
-
-    try:
-        yield
-    finally:
-        elapsed = time.monotonic() - start
-        print(f"{description}: {elapsed}s")
+    return Timer(name=description, echo=True)
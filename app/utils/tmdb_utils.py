@@ -1,21 +1,31 @@
 from __future__ import annotations
 
+from datetime import date
 import json
 import random
+import time
 
-from typing import Union
+from typing import Iterator, Union
 
-from core.config import api_settings, logging_settings
+from core.config import get_api_settings, get_logging_settings
 import httpx
 
-from utils.logger import get_logger
+from utils.logger import SamplingFilter, get_logger, set_log_sampling
 
-log = get_logger(__name__, level=logging_settings.LOG_LEVEL)
+log = get_logger(__name__)
+
+## Per-request lines go to their own logger, sampled at LOG_REQUEST_SAMPLE_N
+#  (set up by the first make_request(), not at import). Non-200 responses are
+#  logged as errors, which are never sampled out.
+req_log = get_logger(f"{__name__}.requests")
+_req_log_sampled: bool = False
 
 from domain.schemas.tmdb import tmdb_media_schemas, tmdb_responses
 from lib.constants import (
     auth_endpoint,
-    basic_auth_headers,
+    changes_endpoint,
+    get_basic_auth_headers,
+    movie_endpoint,
     popular_tv_endpoint,
     session_endpoint,
     token_endpoint,
@@ -23,52 +33,196 @@ from lib.constants import (
     valid_media_types,
 )
 from utils.file_utils import check_file_exist
+from utils.http_trace_utils import PhaseTracer
+from utils.metrics_utils import MetricsRegistry, endpoint_template, metrics
 
-def authenticate(
-    headers: dict = basic_auth_headers,
+## Responses worth retrying: rate limited, or a transient server error
+retry_status_codes: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+## Upper bound on a server-sent Retry-After, in seconds
+max_retry_after: float = 60.0
+
+
+def _sample_request_log() -> None:
+    """Apply LOG_REQUEST_SAMPLE_N to req_log, unless sampling was already set on it."""
+    global _req_log_sampled
+
+    if not any(isinstance(f, SamplingFilter) for f in req_log.filters):
+        set_log_sampling(req_log, every_n=get_logging_settings().LOG_REQUEST_SAMPLE_N)
+
+    _req_log_sampled = True
+
+
+def build_req_response(
+    res: httpx.Response = None, timings: dict = None
 ) -> tmdb_responses.ReqResponse:
-    """Make authentication request.
+    """Convert an HTTPX Response into a ReqResponse.
 
-    https://developer.themoviedb.org/docs/authentication-application
+    timings are per-phase durations, i.e. from PhaseTracer.timings().
     """
-    url = f"{api_settings.BASE_URL}/{auth_endpoint}"
+    res_dict = {
+        "url": str(res.url),
+        "headers": res.headers,
+        "status_code": res.status_code,
+        "reason_phrase": res.reason_phrase,
+        "text": res.text,
+        "content": res.content,
+        "history": res.history,
+        "is_client_error": res.is_client_error,
+        "is_server_error": res.is_server_error,
+        "is_redirect": res.is_redirect,
+        "is_error": res.is_error,
+        "is_success": res.is_success,
+        "is_informational": res.is_informational,
+        "is_stream_consumed": res.is_stream_consumed,
+        "original_response": res,
+        "timings": timings,
+    }
+
+    return tmdb_responses.ReqResponse.parse_obj(res_dict)
+
+
+def get_retry_delay(res: httpx.Response = None, attempt: int = 0, backoff: float = 0.5) -> float:
+    """Seconds to wait before retrying: the Retry-After header if sent, else exponential backoff."""
+    retry_after = res.headers.get("retry-after") if res is not None else None
+
+    if retry_after:
+        try:
+            return min(float(retry_after), max_retry_after)
+        except ValueError:
+            pass
 
-    log.info(f"Requesting {url}")
+    return backoff * (2**attempt)
+
+
+def make_request(
+    url: str = None,
+    headers: dict = None,
+    params: dict = None,
+    client: httpx.Client = None,
+    retries: int = None,
+    backoff: float = None,
+    metrics_registry: MetricsRegistry = None,
+) -> tmdb_responses.ReqResponse:
+    """GET a URL and return the response as a ReqResponse.
+
+    Pass a long-lived httpx.Client to reuse its connection pool across requests
+    (or an httpx.Client(transport=httpx.MockTransport(...)) to stub the API).
+    Without one, a client is opened and closed for this request.
+
+    429/5xx responses and transport errors are retried up to retries times
+    (default: the REQUEST_RETRIES setting), waiting per get_retry_delay().
+    Every request is recorded in metrics_registry (default:
+    utils.metrics_utils.metrics) under its endpoint template. The recorded
+    latency is what the caller waited, including retries. Per-phase timings
+    of the final attempt (see utils.http_trace_utils) are recorded too, and
+    returned as the response's .timings.
+    """
+    if not url:
+        raise ValueError("Missing URL to request")
+
+    if not headers:
+        headers = get_basic_auth_headers()
+
+    if retries is None:
+        retries = get_api_settings().REQUEST_RETRIES
+
+    if backoff is None:
+        backoff = get_api_settings().REQUEST_BACKOFF
+
+    registry = metrics_registry or metrics
+    endpoint = endpoint_template(httpx.URL(url).path)
+
+    if not _req_log_sampled:
+        _sample_request_log()
+
+    req_log.info("Requesting %s", url, extra={"url": url})
+
+    _client = client or httpx.Client()
+    start = time.perf_counter()
+    attempt = 0
 
     try:
-        with httpx.Client() as client:
-            res = client.get(url, headers=headers)
-
-            auth_dict = {
-                "url": str(res.url),
-                "headers": res.headers,
-                "status_code": res.status_code,
-                "reason_phrase": res.reason_phrase,
-                "text": res.text,
-                "content": res.content,
-                "history": res.history,
-                "is_client_error": res.is_client_error,
-                "is_server_error": res.is_server_error,
-                "is_redirect": res.is_redirect,
-                "is_error": res.is_error,
-                "is_success": res.is_success,
-                "is_informational": res.is_informational,
-                "is_stream_consumed": res.is_stream_consumed,
-                "original_response": res,
-            }
-
-            _auth: tmdb_responses.ReqResponse = tmdb_responses.ReqResponse.parse_obj(
-                auth_dict
+        while True:
+            tracer = PhaseTracer()
+
+            try:
+                res = _client.get(
+                    url, headers=headers, params=params, extensions={"trace": tracer}
+                )
+            except httpx.TransportError as transport_exc:
+                if attempt >= retries:
+                    registry.record_request(
+                        endpoint=endpoint,
+                        status="error",
+                        elapsed=time.perf_counter() - start,
+                        retries=attempt,
+                    )
+                    raise
+
+                req_log.warning(
+                    "Retrying %s after transport error: %s", url, transport_exc
+                )
+                time.sleep(get_retry_delay(None, attempt, backoff))
+                attempt += 1
+                continue
+
+            if res.status_code in retry_status_codes and attempt < retries:
+                req_log.warning("Retrying %s after %s response", url, res.status_code)
+                time.sleep(get_retry_delay(res, attempt, backoff))
+                attempt += 1
+                continue
+
+            break
+
+        registry.record_request(
+            endpoint=endpoint,
+            status=res.status_code,
+            elapsed=time.perf_counter() - start,
+            response_bytes=len(res.content),
+            retries=attempt,
+            cdn_cache=res.headers.get("x-cache"),
+        )
+
+        timings = tracer.timings()
+        registry.record_phases(endpoint=endpoint, timings=timings)
+
+        _res: tmdb_responses.ReqResponse = build_req_response(res, timings=timings)
+
+        if not res.status_code == 200:
+            req_log.error(
+                "Non-200 response [%s: %s]: %s",
+                res.status_code,
+                res.reason_phrase,
+                res.text,
+                extra={"url": url, "status_code": res.status_code},
             )
 
-            # log.debug(f"Auth: {_auth}")
+        return _res
 
-            if not res.status_code == 200:
-                log.error(
-                    f"Non-200 response [{res.status_code}: {res.reason_phrase}]: {res.text}"
-                )
+    except Exception as exc:
+        raise Exception(f"Unhandled exception requesting {url}. Details: {exc}")
+
+    finally:
+        if client is None:
+            _client.close()
+
+
+def authenticate(
+    headers: dict = None,
+    client: httpx.Client = None,
+) -> tmdb_responses.ReqResponse:
+    """Make authentication request.
+
+    https://developer.themoviedb.org/docs/authentication-application
+    """
+    url = f"{get_api_settings().BASE_URL}/{auth_endpoint}"
+
+    try:
+        _auth = make_request(url=url, headers=headers, client=client)
+
+        # log.debug(f"Auth: {_auth}")
 
-            return _auth
+        return _auth
 
     except Exception as exc:
         raise Exception(
@@ -77,7 +231,8 @@ def authenticate(
 
 
 def get_request_token(
-    headers: dict = basic_auth_headers,
+    headers: dict = None,
+    client: httpx.Client = None,
 ) -> tmdb_responses.ReqResponse:
     """Request a token for session verification.
 
@@ -85,44 +240,14 @@ def get_request_token(
     be used for authentication during the script's operations, and
     can be passed into a session.
     """
-    url = f"{api_settings.BASE_URL}/{auth_endpoint}/{token_endpoint}/new"
-
-    log.info(f"Requesting {url}")
+    url = f"{get_api_settings().BASE_URL}/{auth_endpoint}/{token_endpoint}/new"
 
     try:
-        with httpx.Client() as client:
-            res = client.get(url, headers=headers)
-
-            token_dict = {
-                "url": str(res.url),
-                "headers": res.headers,
-                "status_code": res.status_code,
-                "reason_phrase": res.reason_phrase,
-                "text": res.text,
-                "content": res.content,
-                "history": res.history,
-                "is_client_error": res.is_client_error,
-                "is_server_error": res.is_server_error,
-                "is_redirect": res.is_redirect,
-                "is_error": res.is_error,
-                "is_success": res.is_success,
-                "is_informational": res.is_informational,
-                "is_stream_consumed": res.is_stream_consumed,
-                "original_response": res,
-            }
-
-            _token: tmdb_responses.ReqResponse = tmdb_responses.ReqResponse.parse_obj(
-                token_dict
-            )
+        _token = make_request(url=url, headers=headers, client=client)
 
-            if not res.status_code == 200:
-                log.error(
-                    f"Non-200 response [{res.status_code}: {res.reason_phrase}]: {_token.text}"
-                )
+        # log.debug(f"Token: {_token}")
 
-            # log.debug(f"Token: {_token}")
-
-            return _token
+        return _token
 
     except Exception as exc:
         raise Exception(
@@ -148,58 +273,24 @@ def retrieve_token(token_dict: Union[str, dict[str, Union[bool, str]]] = None):
     return token
 
 
-def test_key(headers: dict = basic_auth_headers) -> bool:
-    url = f"{api_settings.BASE_URL}/{auth_endpoint}"
-
-    log.info(f"Requesting {url}")
+def test_key(headers: dict = None, client: httpx.Client = None) -> bool:
+    url = f"{get_api_settings().BASE_URL}/{auth_endpoint}"
 
     try:
-        with httpx.Client() as client:
-            res = client.get(url, headers=headers)
-
-            valid_token_dict = {
-                "url": str(res.url),
-                "headers": res.headers,
-                "status_code": res.status_code,
-                "reason_phrase": res.reason_phrase,
-                "text": res.text,
-                "content": res.content,
-                "history": res.history,
-                "is_client_error": res.is_client_error,
-                "is_server_error": res.is_server_error,
-                "is_redirect": res.is_redirect,
-                "is_error": res.is_error,
-                "is_success": res.is_success,
-                "is_informational": res.is_informational,
-                "is_stream_consumed": res.is_stream_consumed,
-                "original_response": res,
-            }
-
-            valid_token: tmdb_responses.ReqResponse = (
-                tmdb_responses.ReqResponse.parse_obj(valid_token_dict)
-            )
+        valid_token = make_request(url=url, headers=headers, client=client)
 
-            # log.debug(f"Valid token: {valid_token.text}")
+        # log.debug(f"Valid token: {valid_token.text}")
 
-            if not res.status_code == 200:
-                log.error(
-                    f"Non-200 response [{res.status_code}: {res.reason_phrase}]: {res.text}"
-                )
-
-            valid = json.loads(res.text)
+        valid = json.loads(valid_token.text)
 
-            if valid["status_code"] == 1:
-                log.info(f"API token is valid")
-                return True
-            else:
-                log.error(
-                    f"Unabled to validate API key. Reason: {valid_token.reason_phrase}"
-                )
-                return False
-
-            # log.debug(f"Valid key: {_token}")
-
-            # return _token
+        if valid["status_code"] == 1:
+            log.info("API token is valid")
+            return True
+        else:
+            log.error(
+                "Unabled to validate API key. Reason: %s", valid_token.reason_phrase
+            )
+            return False
 
     except Exception as exc:
         raise Exception(
@@ -207,7 +298,7 @@ def test_key(headers: dict = basic_auth_headers) -> bool:
         )
 
 
-def get_popular_tv(headers: dict = basic_auth_headers, page: int = 1):
+def get_popular_tv(headers: dict = None, page: int = 1, client: httpx.Client = None):
     if not isinstance(page, int):
         if isinstance(page, str):
             page = int(page)
@@ -217,44 +308,14 @@ def get_popular_tv(headers: dict = basic_auth_headers, page: int = 1):
 
         raise ValueError("Page must be an int")
 
-    url = f"{api_settings.BASE_URL}/{tv_endpoint}/{popular_tv_endpoint}&page={page}"
-
-    log.info(f"Requesting {url}")
+    url = f"{get_api_settings().BASE_URL}/{tv_endpoint}/{popular_tv_endpoint}&page={page}"
 
     try:
-        with httpx.Client() as client:
-            res = client.get(url, headers=headers)
-
-            popular_tv_dict = {
-                "url": str(res.url),
-                "headers": res.headers,
-                "status_code": res.status_code,
-                "reason_phrase": res.reason_phrase,
-                "text": res.text,
-                "content": res.content,
-                "history": res.history,
-                "is_client_error": res.is_client_error,
-                "is_server_error": res.is_server_error,
-                "is_redirect": res.is_redirect,
-                "is_error": res.is_error,
-                "is_success": res.is_success,
-                "is_informational": res.is_informational,
-                "is_stream_consumed": res.is_stream_consumed,
-                "original_response": res,
-            }
-
-            popular_tv: tmdb_responses.ReqResponse = (
-                tmdb_responses.ReqResponse.parse_obj(popular_tv_dict)
-            )
+        popular_tv = make_request(url=url, headers=headers, client=client)
 
-            # log.debug(f"Popular TV ({type(popular_tv)}): {popular_tv}")
+        # log.debug(f"Popular TV ({type(popular_tv)}): {popular_tv}")
 
-            if not res.status_code == 200:
-                log.error(
-                    f"Non-200 response [{res.status_code}: {res.reason_phrase}]: {res.text}"
-                )
-
-            return popular_tv
+        return popular_tv
 
     except Exception as exc:
         raise Exception(
@@ -262,57 +323,129 @@ def get_popular_tv(headers: dict = basic_auth_headers, page: int = 1):
         )
 
 
-def get_tv_episode(headers: dict = basic_auth_headers, tmdb_id: int = None):
+def get_tv_episode(
+    headers: dict = None, tmdb_id: int = None, client: httpx.Client = None
+):
     if not tmdb_id:
         raise ValueError("Missing TMDB ID")
 
     if not isinstance(tmdb_id, int):
         tmdb_id = int(tmdb_id)
 
-    url = f"https://api.themoviedb.org/3/tv/{tmdb_id}"
+    url = f"{get_api_settings().BASE_URL}/{tv_endpoint}/{tmdb_id}"
+
+    try:
+        tv_show = make_request(url=url, headers=headers, client=client)
+
+        # log.debug(f"TV show ({type(tv_show)}): {tv_show}")
+
+        return tv_show
+
+    except Exception as exc:
+        raise Exception(
+            f"Unhandled exception requesting TV show [{tmdb_id}]. Details: {exc}"
+        )
 
-    log.info(f"Requesting {url}")
+
+def get_movie_details(
+    headers: dict = None, tmdb_id: int = None, client: httpx.Client = None
+):
+    if not tmdb_id:
+        raise ValueError("Missing TMDB ID")
+
+    if not isinstance(tmdb_id, int):
+        tmdb_id = int(tmdb_id)
+
+    url = f"{get_api_settings().BASE_URL}/{movie_endpoint}/{tmdb_id}"
 
     try:
-        with httpx.Client() as client:
-            res = client.get(url, headers=headers)
-
-            popular_tv_dict = {
-                "url": str(res.url),
-                "headers": res.headers,
-                "status_code": res.status_code,
-                "reason_phrase": res.reason_phrase,
-                "text": res.text,
-                "content": res.content,
-                "history": res.history,
-                "is_client_error": res.is_client_error,
-                "is_server_error": res.is_server_error,
-                "is_redirect": res.is_redirect,
-                "is_error": res.is_error,
-                "is_success": res.is_success,
-                "is_informational": res.is_informational,
-                "is_stream_consumed": res.is_stream_consumed,
-                "original_response": res,
-            }
-
-            popular_tv: tmdb_responses.ReqResponse = (
-                tmdb_responses.ReqResponse.parse_obj(popular_tv_dict)
-            )
+        movie = make_request(url=url, headers=headers, client=client)
 
-            # log.debug(f"Popular TV ({type(popular_tv)}): {popular_tv}")
+        return movie
 
-            if not res.status_code == 200:
-                log.error(
-                    f"Non-200 response [{res.status_code}: {res.reason_phrase}]: {res.text}"
-                )
+    except Exception as exc:
+        raise Exception(
+            f"Unhandled exception requesting movie [{tmdb_id}]. Details: {exc}"
+        )
+
+
+def get_media_changes(
+    media_type: str = None,
+    start_date: date = None,
+    end_date: date = None,
+    page: int = 1,
+    headers: dict = None,
+    client: httpx.Client = None,
+) -> tmdb_responses.ReqResponse:
+    """Request one page of IDs changed between start_date and end_date.
+
+    TMDB accepts a window of at most 14 days. Without dates, TMDB returns
+    changes from the last 24 hours.
+
+    https://developer.themoviedb.org/reference/changes-tv-list
+    https://developer.themoviedb.org/reference/changes-movie-list
+    """
+    if media_type not in valid_media_types:
+        raise ValueError(
+            f"Type [{media_type}] is not an accepted media type. Must be one of {valid_media_types}"
+        )
+
+    url = f"{get_api_settings().BASE_URL}/{media_type}/{changes_endpoint}"
+
+    params: dict = {"page": page}
+
+    if start_date:
+        params["start_date"] = start_date.isoformat()
 
-            return popular_tv
+    if end_date:
+        params["end_date"] = end_date.isoformat()
+
+    try:
+        changes = make_request(url=url, headers=headers, params=params, client=client)
+
+        return changes
 
     except Exception as exc:
         raise Exception(
-            f"Unhandled exception making authentication request. Details: {exc}"
+            f"Unhandled exception requesting {media_type} changes. Details: {exc}"
+        )
+
+
+def iter_changed_ids(
+    media_type: str = None,
+    start_date: date = None,
+    end_date: date = None,
+    headers: dict = None,
+    client: httpx.Client = None,
+) -> Iterator[int]:
+    """Yield every ID on every page of a changes window."""
+    page = 1
+    total_pages = 1
+
+    while page <= total_pages:
+        res = get_media_changes(
+            media_type=media_type,
+            start_date=start_date,
+            end_date=end_date,
+            page=page,
+            headers=headers,
+            client=client,
         )
 
+        if not res.is_success:
+            raise Exception(
+                f"Unable to list {media_type} changes. [{res.status_code}: {res.reason_phrase}]"
+            )
+
+        changes = res.text_json()
+        total_pages = changes.get("total_pages") or 1
+
+        for item in changes.get("results") or []:
+            if item.get("id") is not None:
+                yield item["id"]
+
+        page += 1
+
 
 def get_bad_ids(bad_id_file: str = "bad_ids") -> list[int]:
     """Read bad IDs from a file."""